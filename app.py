@@ -3,12 +3,20 @@ import streamlit as st
 import sys
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from utils import (
+    IncrementalMatcher,
+    MailPrefetch,
+    SenderDirectory,
     get_class_list_from_aca2000,
     get_students_for_classes,
-    fetch_naver_email,
-    find_missing_students,
+    iter_naver_email,
+    last_class_selection,
+    load_cached_class_list,
+    prefetch_rosters,
+    release_driver,
+    remember_class_selection,
 )
 # Selenium imports - uncomment when get_driver() is used
 # from selenium import webdriver
@@ -40,9 +48,45 @@ def get_secret(key, default=""):
     except (AttributeError, KeyError):
         return default
 
+def _release_refreshed_driver(future):
+    """Wait for a stale class-list refresh and give its driver back to the pool."""
+    try:
+        release_driver(future.result()[1])
+    except Exception:
+        pass
+
+def _naver_passkey(backend):
+    """IMAP needs the Naver app password; the Selenium login uses the account password."""
+    return (user_app_pw or user_pw) if backend == "imap" else user_pw
+
+def _start_mail_prefetch():
+    """Speculatively start the Naver login (and 2FA) and list the default range."""
+    if not user_email_id or not user_pw or "mail_prefetch" in st.session_state:
+        return
+    backend = get_secret("MAIL_BACKEND", "selenium")
+    st.session_state.mail_prefetch = MailPrefetch(
+        headless=False, naver_id=user_email_id,
+        naver_passkey=_naver_passkey(backend),
+        start_date=datetime.now().date() - timedelta(days=7),
+        end_date=datetime.now().date(),
+        backend=backend, directory=SenderDirectory(),
+    )
+
+def _prefetch_last_rosters(driver, class_info):
+    """Speculatively read rosters of the classes selected last time."""
+    last = {n: class_info[n] for n in last_class_selection() if n in class_info}
+    return prefetch_rosters(driver, last) if driver and last else None
+
+def _refresh_classes_and_prefetch():
+    """Background class-list refresh that also reads last-selected rosters ahead."""
+    class_info, driver = get_class_list_from_aca2000(headless=True)
+    roster_prefetch = _prefetch_last_rosters(driver, class_info)
+    return class_info, driver, roster_prefetch.result() if roster_prefetch else {}
+
 # Load Naver credentials from secrets
 user_email_id = get_secret("NAVER_ID")
 user_pw = get_secret("NAVER_PW")
+user_app_pw = get_secret("NAVER_APP_PW")
 
 # # Quick IMAP connectivity check
 # if st.button("🔍 Test Naver Login"):
@@ -87,32 +131,59 @@ if st.button("🔍 Fetch Classes from ACA2000"):
     # Clear previous logs
     st.session_state.process_logs = []
 
-    # Clean up any stale driver from previous run
+    # Give any stale driver from the previous run back to the warm pool, once
+    # the roster prefetch still reading through it has finished
+    stale_prefetch = st.session_state.pop("roster_prefetch", None)
+    if stale_prefetch is not None:
+        stale_prefetch.join()
     if "aca_driver" in st.session_state and st.session_state.aca_driver:
-        try:
-            st.session_state.aca_driver.quit()
-        except Exception:
-            pass
+        release_driver(st.session_state.aca_driver)
         st.session_state.aca_driver = None
-
-    with st.status("Connecting to ACA2000...", expanded=True) as status:
-        try:
-            class_info, driver = get_class_list_from_aca2000(headless=True)
-            if class_info and driver:
-                st.session_state.class_info = class_info
-                st.session_state.aca_driver = driver
-                st.session_state.fetch_status = f"✅ Found {len(class_info)} classes!"
-                try:
-                    driver.minimize_window()  # Only works in non-headless mode
-                except Exception:
-                    pass
-                status.update(label=st.session_state.fetch_status, state="complete", expanded=False)
-            else:
-                st.session_state.fetch_status = "❌ No classes found or connection failed."
+    stale_refresh = st.session_state.pop("aca_refresh", None)
+    if stale_refresh is not None:
+        # Its Chrome uses the same profile as the next login: wait for it first
+        _release_refreshed_driver(stale_refresh)
+    # The mail prefetch follows this fetch, with the dates chosen now
+    stale_mail_prefetch = st.session_state.pop("mail_prefetch", None)
+    if stale_mail_prefetch is not None:
+        stale_mail_prefetch.close()
+
+    # Show the cached class list right away and revalidate it in the background;
+    # the live login/driver is picked up when the selection is submitted
+    cached_class_info = load_cached_class_list()
+    if cached_class_info:
+        executor = ThreadPoolExecutor(max_workers=1)
+        st.session_state.aca_refresh = executor.submit(_refresh_classes_and_prefetch)
+        executor.shutdown(wait=False)
+        st.session_state.class_info = cached_class_info
+        st.session_state.fetch_status = (
+            f"✅ Showing {len(cached_class_info)} cached classes (refreshing in background)"
+        )
+        st.success(st.session_state.fetch_status)
+    else:
+        with st.status("Connecting to ACA2000...", expanded=True) as status:
+            try:
+                class_info, driver = get_class_list_from_aca2000(headless=True)
+                if class_info and driver:
+                    st.session_state.class_info = class_info
+                    st.session_state.aca_driver = driver
+                    try:
+                        driver.minimize_window()  # Only works in non-headless mode
+                    except Exception:
+                        pass
+                    st.session_state.roster_prefetch = _prefetch_last_rosters(driver, class_info)
+                    st.session_state.fetch_status = f"✅ Found {len(class_info)} classes!"
+                    status.update(label=st.session_state.fetch_status, state="complete", expanded=False)
+                else:
+                    st.session_state.fetch_status = "❌ No classes found or connection failed."
+                    status.update(label=st.session_state.fetch_status, state="error", expanded=False)
+            except Exception as e:
+                st.session_state.fetch_status = f"❌ Error: {e}"
                 status.update(label=st.session_state.fetch_status, state="error", expanded=False)
-        except Exception as e:
-            st.session_state.fetch_status = f"❌ Error: {e}"
-            status.update(label=st.session_state.fetch_status, state="error", expanded=False)
+
+    # Use the idle time while classes are being chosen: start the Naver login and mail listing
+    if st.session_state.get("class_info"):
+        _start_mail_prefetch()
 
 # Show persistent logs from all steps
 if "process_logs" in st.session_state and st.session_state.process_logs:
@@ -155,6 +226,19 @@ if "class_info" in st.session_state and st.session_state.class_info:
         email_start_date = date_cols[0].date_input("Start Date", value=datetime.now().date() - timedelta(days=7))
         email_end_date = date_cols[1].date_input("End Date", value=datetime.now().date())
 
+        # Mail source: browser scraping or IMAP (faster, needs NAVER_APP_PW)
+        mail_backends = {"Browser (Selenium)": "selenium", "IMAP": "imap"}
+        default_backend = get_secret("MAIL_BACKEND", "selenium")
+        mail_backend_label = st.radio(
+            "**Mail Source:**",
+            list(mail_backends.keys()),
+            index=list(mail_backends.values()).index(default_backend)
+            if default_backend in mail_backends.values()
+            else 0,
+            horizontal=True,
+        )
+        mail_backend = mail_backends[mail_backend_label]
+
         # Submit button
         submitted = st.form_submit_button("🚀 Find lazy students from Selected Classes")
 
@@ -175,16 +259,43 @@ if "class_info" in st.session_state and st.session_state.class_info:
             name: class_info[name]
             for name in selected_classes
         }
+        remember_class_selection(selected_classes)
 
         try:
             with st.status("Agent is running...", expanded=True) as status:
                 # Fetch students for selected classes using existing driver
                 st.write("Fetching students for selected classes...")
                 driver = st.session_state.pop("aca_driver", None)
+                refresh = st.session_state.pop("aca_refresh", None)
+                # Let the roster prefetch finish with the driver before it is reused
+                roster_prefetch = st.session_state.pop("roster_prefetch", None)
+                prefetched = roster_prefetch.result() if roster_prefetch else {}
+                if not driver and refresh is not None:
+                    # Cached picker: wait for the background login/revalidation
+                    st.write("Waiting for ACA2000 login...")
+                    try:
+                        fresh_class_info, driver, prefetched = refresh.result()
+                    except Exception as e:
+                        fresh_class_info, driver = {}, None
+                        st.write(f"⚠️ ACA2000 refresh failed: {e}")
+                    if fresh_class_info and fresh_class_info != class_info:
+                        st.session_state.class_info = fresh_class_info
+                        gone = [n for n in selected_class_ids if n not in fresh_class_info]
+                        if gone:
+                            st.warning(f"⚠️ No longer offered, skipped: {', '.join(gone)}")
+                        selected_class_ids = {
+                            name: fresh_class_info[name]
+                            for name in selected_class_ids
+                            if name in fresh_class_info
+                        }
                 if not driver:
                     st.error("❌ ACA2000 session expired. Please fetch classes again.")
                     st.stop()
-                student_list = get_students_for_classes(driver, selected_class_ids)
+                student_list = get_students_for_classes(
+                    driver, selected_class_ids,
+                    workers=int(get_secret("ACA2000_WORKERS", "3")),
+                    prefetched=prefetched,
+                )
                 # Driver is now quit by get_students_for_classes
                 total_students = sum(len(s) for s in student_list.values())
                 st.write(
@@ -196,18 +307,45 @@ if "class_info" in st.session_state and st.session_state.class_info:
                 #     st.warning("⚠️ No students found in selected classes. Check ACA2000 data.")
                 #     st.stop()
 
-                # Fetch unread emails via Selenium (subject, content, attachments)
-                st.write("Reading Naver emails...")
-                emails = fetch_naver_email(
-                    headless=False, naver_id=user_email_id, naver_passkey=user_pw,
-                    start_date=email_start_date, end_date=email_end_date
-                )
-                senders = {e["sender"] for e in emails}
-                st.write(f"✅ Found {len(emails)} emails from {len(senders)} senders.")
-
-                # Match student names (Korean, 2-3 chars) against email text
-                st.write("Comparing students against emails...")
-                results = find_missing_students(student_list, emails)
+                # Stream unread emails via Selenium or IMAP and match student names
+                # (Korean, 2-3 chars) against each email as soon as it arrives
+                st.write(f"Reading Naver emails ({mail_backend_label})...")
+                mail_params = {
+                    "headless": False,
+                    "naver_id": user_email_id,
+                    "naver_passkey": _naver_passkey(mail_backend),
+                    "start_date": email_start_date,
+                    "end_date": email_end_date,
+                    "backend": mail_backend,
+                }
+                prefetch = st.session_state.pop("mail_prefetch", None)
+                if prefetch is not None and prefetch.matches(**mail_params):
+                    # Continue the speculative fetch started while classes were chosen
+                    directory = prefetch.params["directory"]
+                    matcher = IncrementalMatcher(student_list, directory=directory)
+                    emails = prefetch.stream(matcher)
+                else:
+                    if prefetch is not None:
+                        prefetch.close()  # waits for it to hand back the Naver browser
+                    directory = SenderDirectory()  # senders learned from past runs
+                    matcher = IncrementalMatcher(student_list, directory=directory)
+                    emails = iter_naver_email(
+                        **mail_params,
+                        outstanding=matcher.outstanding,  # stop once nobody is missing
+                        directory=directory,
+                    )
+                email_count = 0
+                senders = set()
+                for email in emails:
+                    email_count += 1
+                    senders.add(email.sender)
+                    for class_name, student, subject in matcher.feed(email):
+                        st.write(f"✅ {class_name}: {student} → _{subject}_")
+                    email.content = ""  # scanned; no need to keep the body
+                directory.close()
+                st.write(f"✅ Found {email_count} emails from {len(senders)} senders.")
+
+                results = matcher.results()
                 total_missing = sum(len(r["missing"]) for r in results.values())
                 st.write(f"✅ Found {total_missing} students who didn't send an email.")
 
@@ -218,12 +356,9 @@ if "class_info" in st.session_state and st.session_state.class_info:
         except Exception as e:
             st.error(f"❌ An error occurred during automation: {e}")
             st.exception(e)
-            # Clean up driver if still alive
+            # Return the driver to the pool if still alive
             if "aca_driver" in st.session_state and st.session_state.aca_driver:
-                try:
-                    st.session_state.aca_driver.quit()
-                except Exception:
-                    pass
+                release_driver(st.session_state.aca_driver)
                 st.session_state.pop("aca_driver", None)
             st.stop()
 
@@ -10,7 +10,7 @@ cp ../utils.py ./utils.py
 # Use --onedir (not --onefile) so the app launches fast — no temp extraction on each run.
 # With --windowed --onedir on macOS, PyInstaller creates a proper .app bundle automatically.
 echo "Building executable..."
-uv run --with pyinstaller --with selenium --with webdriver-manager --with dearpygui --with imap-tools --with python-dotenv \
+uv run --with pyinstaller --with selenium --with webdriver-manager --with dearpygui --with imap-tools --with python-dotenv --with requests \
     pyinstaller --onedir --windowed -y \
     --name "AcademyAutomation" \
     --collect-submodules=selenium \
@@ -25,6 +25,9 @@ def _load_utils():
 # Global state
 class_info = {}
 aca_driver = None
+aca_refresh = None  # background thread revalidating a cached class list
+roster_prefetch = None  # background thread reading last-selected rosters
+mail_prefetch = None  # speculative Naver fetch started while classes are chosen
 config = {}
 
 
@@ -45,6 +48,11 @@ def load_config():
         return None
 
 
+def _aca2000_account():
+    """The configured ACA2000 login, which keys the cached class list and selection"""
+    return {"cust_num": config.get("ACA2000_CUST_NUM"), "user_id": config.get("ACA2000_ID")}
+
+
 def log(msg):
     """Add message to output"""
     current = dpg.get_value("output_text")
@@ -58,26 +66,43 @@ def set_status(msg):
 
 def fetch_classes_callback():
     """Fetch classes from ACA2000"""
-    global class_info, aca_driver
+    global class_info, aca_driver, aca_refresh, roster_prefetch, mail_prefetch
 
     dpg.set_value("output_text", "")
     set_status("Connecting to ACA2000...")
     log("[Step 1] Fetching classes from ACA2000...")
 
-    # Clean up previous driver
+    # Give the previous driver back to the warm pool, once the refresh and
+    # roster prefetch still using it have finished
+    if aca_refresh is not None:
+        aca_refresh.join()
+        aca_refresh = None
+    if roster_prefetch is not None:
+        roster_prefetch.join()
+        roster_prefetch = None
     if aca_driver:
-        try:
-            aca_driver.quit()
-        except Exception:
-            pass
+        _load_utils().release_driver(aca_driver)
+    aca_driver = None
+    # The mail prefetch follows this fetch, with the dates chosen now
+    if mail_prefetch is not None:
+        mail_prefetch.close()
+        mail_prefetch = None
+
+    # Show the cached class list instantly and revalidate it in the background
+    cached = _load_utils().load_cached_class_list(**_aca2000_account())
+    if cached:
+        class_info = cached
+        log(f"Found {len(class_info)} cached classes (refreshing in background):")
+        for name in class_info:
+            log(f"  - {name}")
+        show_classes()
+        aca_refresh = threading.Thread(target=refresh_classes, daemon=True)
+        aca_refresh.start()
+        start_mail_prefetch()
+        return
 
     try:
-        result = _load_utils().get_class_list_from_aca2000(
-            headless=False,
-            cust_num=config.get("ACA2000_CUST_NUM"),
-            user_id=config.get("ACA2000_ID"),
-            user_pw=config.get("ACA2000_PW"),
-        )
+        result = _fetch_class_list()
 
         if result and result[0]:
             class_info = result[0]
@@ -87,21 +112,9 @@ def fetch_classes_callback():
             for name in class_info.keys():
                 log(f"  - {name}")
 
-            # Create checkboxes for classes
-            if dpg.does_item_exist("class_group"):
-                dpg.delete_item("class_group", children_only=True)
-
-            for name in class_info.keys():
-                dpg.add_checkbox(label=name, tag=f"class_{name}", parent="class_group")
-
-            dpg.show_item("class_frame")
-            dpg.show_item("run_btn")
-            set_status(f"Found {len(class_info)} classes. Select and click 'Find Missing Homework'.")
-
-            try:
-                aca_driver.minimize_window()
-            except Exception:
-                pass
+            show_classes()
+            prefetch_last_rosters()
+            start_mail_prefetch()
         else:
             log("No classes found or connection failed.")
             set_status("Failed to fetch classes.")
@@ -111,6 +124,110 @@ def fetch_classes_callback():
         set_status("Error fetching classes.")
 
 
+def _fetch_class_list():
+    result = _load_utils().get_class_list_from_aca2000(
+        headless=False,
+        cust_num=config.get("ACA2000_CUST_NUM"),
+        user_id=config.get("ACA2000_ID"),
+        user_pw=config.get("ACA2000_PW"),
+    )
+    if result and result[1]:
+        try:
+            result[1].minimize_window()
+        except Exception:
+            pass
+    return result
+
+
+def _naver_passkey(backend):
+    """IMAP needs the Naver app password; the Selenium login uses the account password"""
+    if backend == "imap":
+        return config.get("NAVER_APP_PW") or config.get("NAVER_PW")
+    return config.get("NAVER_PW")
+
+
+def _mail_params(start_date, end_date, backend):
+    return {
+        "headless": False,
+        "naver_id": config.get("NAVER_ID"),
+        "naver_passkey": _naver_passkey(backend),
+        "start_date": start_date,
+        "end_date": end_date,
+        "backend": backend,
+    }
+
+
+def start_mail_prefetch():
+    """Start the Naver login and listing for the dates in the UI while classes are chosen"""
+    global mail_prefetch
+
+    if mail_prefetch is not None or not config.get("NAVER_ID") or not config.get("NAVER_PW"):
+        return
+    try:
+        sd = datetime.strptime(dpg.get_value("start_date"), "%Y-%m-%d").date()
+        ed = datetime.strptime(dpg.get_value("end_date"), "%Y-%m-%d").date()
+    except ValueError:
+        return
+    backend = dpg.get_value("mail_backend").lower()
+    utils = _load_utils()
+    mail_prefetch = utils.MailPrefetch(
+        **_mail_params(sd, ed, backend), directory=utils.SenderDirectory()
+    )
+    log("Started Naver login in the background (complete 2FA if asked).")
+
+
+def prefetch_last_rosters():
+    """Read rosters of the classes selected last time in the background"""
+    global roster_prefetch
+
+    utils = _load_utils()
+    selection = utils.last_class_selection(**_aca2000_account())
+    last = {n: class_info[n] for n in selection if n in class_info}
+    if aca_driver and last:
+        roster_prefetch = utils.prefetch_rosters(aca_driver, last)
+
+
+def show_classes():
+    """Create checkboxes for classes, keeping the ones already ticked"""
+    checked = {
+        name for name in class_info
+        if dpg.does_item_exist(f"class_{name}") and dpg.get_value(f"class_{name}")
+    }
+    if dpg.does_item_exist("class_group"):
+        dpg.delete_item("class_group", children_only=True)
+
+    for name in class_info:
+        dpg.add_checkbox(
+            label=name, tag=f"class_{name}", parent="class_group", default_value=name in checked
+        )
+
+    dpg.show_item("class_frame")
+    dpg.show_item("run_btn")
+    set_status(f"Found {len(class_info)} classes. Select and click 'Find Missing Homework'.")
+
+
+def refresh_classes():
+    """Background login + class list revalidation after showing the cached list"""
+    global class_info, aca_driver
+
+    try:
+        result = _fetch_class_list()
+    except Exception as e:
+        log(f"Class list refresh failed: {e}")
+        return
+    if not (result and result[0]):
+        log("Class list refresh failed; please fetch classes again.")
+        return
+    aca_driver = result[1]
+    if result[0] != class_info:
+        log("Class list changed since last run; updated.")
+        class_info = result[0]
+        show_classes()
+    else:
+        log("Class list is up to date.")
+    prefetch_last_rosters()
+
+
 def select_all_callback(sender, app_data):
     """Toggle all checkboxes"""
     for name in class_info.keys():
@@ -119,7 +236,7 @@ def select_all_callback(sender, app_data):
 
 def run_automation_callback():
     """Run the full automation"""
-    global class_info, aca_driver
+    global class_info, aca_driver, aca_refresh, roster_prefetch, mail_prefetch
 
     # Get selected classes
     selected = [name for name in class_info.keys() if dpg.get_value(f"class_{name}")]
@@ -137,11 +254,19 @@ def run_automation_callback():
         log("=" * 50)
 
         selected_class_ids = {name: class_info[name] for name in selected}
+        _load_utils().remember_class_selection(selected, **_aca2000_account())
 
         # Fetch students
         set_status("Fetching students...")
         log(f"\nFetching students for {len(selected)} classes...")
 
+        if aca_driver is None and aca_refresh is not None:
+            set_status("Waiting for ACA2000 login...")
+            aca_refresh.join()
+            selected_class_ids = {
+                name: class_info[name] for name in selected if name in class_info
+            }
+
         driver = aca_driver
 
         if not driver:
@@ -149,7 +274,17 @@ def run_automation_callback():
             set_status("Session expired.")
             return
 
-        student_list = _load_utils().get_students_for_classes(driver, selected_class_ids)
+        prefetched = {}
+        if roster_prefetch is not None:
+            prefetched = roster_prefetch.result()
+            roster_prefetch = None
+
+        student_list = _load_utils().get_students_for_classes(
+            driver,
+            selected_class_ids,
+            workers=int(config.get("ACA2000_WORKERS", 3)),
+            prefetched=prefetched,
+        )
         total_students = sum(len(s) for s in student_list.values())
 
         if total_students == 0:
@@ -172,21 +307,37 @@ def run_automation_callback():
             sd, ed = None, None
             log("Invalid date format, using default (last 7 days)")
 
-        emails = _load_utils().fetch_naver_email(
-            headless=False,
-            naver_id=config.get("NAVER_ID"),
-            naver_passkey=config.get("NAVER_PW"),
-            start_date=sd,
-            end_date=ed
-        )
-        senders = {e["sender"] for e in emails}
-        log(f"Found {len(emails)} emails from {len(senders)} senders")
-
-        # Compare
-        set_status("Comparing students against emails...")
-        log("\nComparing students against emails...")
-
-        results = _load_utils().find_missing_students(student_list, emails)
+        backend = dpg.get_value("mail_backend").lower()
+        mail_params = _mail_params(sd, ed, backend)
+        # Match each email as it streams in and show hits right away
+        prefetch, mail_prefetch = mail_prefetch, None
+        if prefetch is not None and prefetch.matches(**mail_params):
+            # Continue the speculative fetch started while classes were chosen
+            directory = prefetch.params["directory"]
+            matcher = _load_utils().IncrementalMatcher(student_list, directory=directory)
+            emails = prefetch.stream(matcher)
+        else:
+            if prefetch is not None:
+                prefetch.close()  # waits for it to hand back the Naver browser
+            directory = _load_utils().SenderDirectory()  # senders learned from past runs
+            matcher = _load_utils().IncrementalMatcher(student_list, directory=directory)
+            emails = _load_utils().iter_naver_email(
+                **mail_params,
+                outstanding=matcher.outstanding,  # stop once nobody is missing
+                directory=directory,
+            )
+        email_count = 0
+        senders = set()
+        for email in emails:
+            email_count += 1
+            senders.add(email.sender)
+            for class_name, student, subject in matcher.feed(email):
+                log(f"  OK [{class_name}] {student} -> {subject}")
+            email.content = ""  # scanned; no need to keep the body
+        directory.close()
+        log(f"Found {email_count} emails from {len(senders)} senders")
+
+        results = matcher.results()
         total_missing = sum(len(r["missing"]) for r in results.values())
 
         # Display Results
@@ -232,6 +383,13 @@ def run_automation_callback():
         # Reset
         class_info = {}
         aca_driver = None
+        aca_refresh = None
+        if roster_prefetch is not None:
+            roster_prefetch.join()
+            roster_prefetch = None
+        if mail_prefetch is not None:
+            mail_prefetch.close()
+            mail_prefetch = None
         dpg.hide_item("class_frame")
         dpg.hide_item("run_btn")
 
@@ -292,6 +450,14 @@ def main():
             dpg.add_input_text(label="Start", tag="start_date", default_value=default_start, width=100)
             dpg.add_input_text(label="End", tag="end_date", default_value=default_end, width=100)
 
+        # Mail source: browser scraping or IMAP (needs NAVER_APP_PW in config.json)
+        with dpg.group(horizontal=True):
+            dpg.add_text("Mail source:")
+            default_backend = "IMAP" if config.get("MAIL_BACKEND", "").lower() == "imap" else "Selenium"
+            dpg.add_radio_button(
+                ["Selenium", "IMAP"], tag="mail_backend", default_value=default_backend, horizontal=True
+            )
+
         # Step 2: Run automation (initially hidden)
         dpg.add_button(label="2. Find Missing Homework", callback=run_automation_callback, tag="run_btn", show=False)
 
@@ -316,12 +482,11 @@ def main():
     dpg.start_dearpygui()
     dpg.destroy_context()
 
-    # Cleanup
+    # Cleanup: quit the warm browsers
     if aca_driver:
-        try:
-            aca_driver.quit()
-        except Exception:
-            pass
+        _load_utils().release_driver(aca_driver)
+    if _utils is not None:
+        _utils.driver_pool().close()
 
 
 if __name__ == "__main__":
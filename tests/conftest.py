@@ -0,0 +1,7 @@
+import os
+import sys
+import tempfile
+
+# utils.py lives at the repository root and reads its cache directory on import
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("AUTOMATION_CACHE_DIR", tempfile.mkdtemp(prefix="noti-auto-"))
@@ -0,0 +1,144 @@
+"""Aca2000Client against a local http.server stand-in, and the roster parser."""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import pytest
+
+import utils
+
+ROSTER_HTML = """
+<table>
+<tr>
+  <td><span class="name" onclick="showDetail('101')">김민수</span></td>
+  <td><button value="출석" class="btn on01s">출석</button>
+      <button value="결석" class="btn">결석</button></td>
+</tr>
+<tr>
+  <td><span class="name" onclick="showDetail(102)">이영희 (대기)</span></td>
+  <td><button value="출석" class="btn">출석</button>
+      <button value="결석" class="btn on02s">결석</button></td>
+</tr>
+</table>
+"""
+
+ROSTER_ROWS = [
+    {"name": "김민수", "detail_id": "101", "attended": True, "status": "출석"},
+    {"name": "이영희 (대기)", "detail_id": "102", "attended": False, "status": "결석"},
+]
+
+# class id -> (content type, body); anything else is a server error
+RESPONSES = {
+    "1": ("text/html; charset=utf-8", ROSTER_HTML),
+    "2": (
+        "application/json; charset=utf-8",
+        json.dumps({"d": {"result": "ok", "html": ROSTER_HTML}}, ensure_ascii=False),
+    ),
+}
+
+
+class _RosterHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"])).decode()
+        self.server.requests.append(
+            {"path": self.path, "headers": dict(self.headers), "body": body}
+        )
+        class_id = parse_qs(body).get("classId", [""])[0]
+        if self.path != "/Attend/ClassStudents" or class_id not in RESPONSES:
+            self.send_error(500)
+            return
+        content_type, payload = RESPONSES[class_id]
+        payload = payload.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def client():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _RosterHandler)
+    server.requests = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = utils.Aca2000Client(
+        f"http://127.0.0.1:{server.server_address[1]}",
+        endpoint={
+            "method": "POST",
+            "url": "/Attend/ClassStudents",
+            "body": "classId={class_id}",
+        },
+        cookies=[{"name": "ASP.NET_SessionId", "value": "abc"}],
+        user_agent="test-agent",
+        max_workers=2,
+    )
+    client.server = server
+    yield client
+    client.close()
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetch_roster_html(client):
+    assert client.fetch_roster(1) == ROSTER_ROWS
+    request = client.server.requests[0]
+    assert request["body"] == "classId=1"
+    assert request["headers"]["Cookie"] == "ASP.NET_SessionId=abc"
+    assert request["headers"]["User-Agent"] == "test-agent"
+    assert request["headers"]["X-Requested-With"] == "XMLHttpRequest"
+
+
+def test_fetch_roster_json_wrapped(client):
+    assert client.fetch_roster("2") == ROSTER_ROWS
+
+
+def test_fetch_rosters_maps_failures_to_exceptions(client):
+    rosters = client.fetch_rosters({"A반": 1, "B반": 2, "C반": 3})
+    assert rosters["A반"] == ROSTER_ROWS
+    assert rosters["B반"] == ROSTER_ROWS
+    assert isinstance(rosters["C반"], Exception)
+
+
+def test_parse_div_rows_and_unclosed_cells():
+    markup = (
+        '<div class="row"><span class="name" onclick="showDetail(\'7\')">박지훈</span>'
+        '<td><button value="출석" class="on01s">출석</button>'
+        "</div>"
+        '<div class="row"><span class="name" onclick="showDetail(\'8\')">최수아</span></div>'
+    )
+    assert utils.parse_aca2000_roster_html(markup) == [
+        {"name": "박지훈", "detail_id": "7", "attended": True, "status": "출석"},
+        {"name": "최수아", "detail_id": "8", "attended": False, "status": None},
+    ]
+
+
+def test_parse_ignores_spans_without_show_detail():
+    markup = (
+        '<tr><td><span class="name">선생님</span></td></tr>'
+        '<span class="name" onclick="showDetail()">정하늘</span>'
+    )
+    assert utils.parse_aca2000_roster_html(markup) == [
+        {"name": "정하늘", "detail_id": None, "attended": False, "status": None},
+    ]
+
+
+def test_parse_empty_markup():
+    assert utils.parse_aca2000_roster_html("") == []
+
+
+class _RosterPage:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def execute_script(self, script, *args):
+        return self.rows
+
+
+def test_empty_roster_is_read_without_waiting_for_rows():
+    assert utils._read_roster_rows(_RosterPage([]), settle=0.2) == []
+    assert utils._read_roster_rows(_RosterPage(ROSTER_ROWS), settle=0.2) == ROSTER_ROWS
@@ -0,0 +1,64 @@
+"""Aca2000Cache: class lists, rosters and the last class selection."""
+
+from datetime import date, datetime, timedelta
+
+import pytest
+
+import utils
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = utils.Aca2000Cache(str(tmp_path / "aca2000.sqlite3"))
+    yield cache
+    cache.close()
+
+
+def _age(cache, table, delta):
+    # Backdate every row of table, as if it had been cached delta ago
+    fetched_at = (datetime.now() - delta).isoformat(timespec="seconds")
+    with cache._conn:
+        cache._conn.execute(f"UPDATE {table} SET fetched_at = ?", (fetched_at,))
+
+
+def test_class_list_ttl(cache):
+    assert cache.put_class_info("acct", {"A반": "1"}) is True
+    assert cache.get_class_info("acct") == {"A반": "1"}
+    assert cache.get_class_info("other") is None
+    _age(cache, "class_lists", cache.CLASS_LIST_TTL + timedelta(minutes=1))
+    assert cache.get_class_info("acct") is None
+
+
+def test_roster_ttl_and_settled_dates(cache):
+    past = (date.today() - timedelta(days=1)).isoformat()
+    today = date.today().isoformat()
+    roster = [utils.RosterEntry.parse("김민수", detail_id="101", status="출석")]
+
+    cache.put_roster(1, past, roster)
+    cache.put_roster(1, today, roster)
+    assert cache.get_roster(1, past) == roster
+    assert cache.get_roster(1, today) is None  # attendance may still change
+
+    _age(cache, "rosters", cache.ROSTER_TTL + timedelta(minutes=1))
+    assert cache.get_roster(1, past) is None
+
+
+def test_changed_class_list_drops_only_changed_rosters(cache):
+    past = (date.today() - timedelta(days=1)).isoformat()
+    roster = [utils.RosterEntry.parse("김민수")]
+    cache.put_class_info("acct", {"A반": "1", "B반": "2"})
+    cache.put_roster("1", past, roster)
+    cache.put_roster("2", past, roster)
+
+    assert cache.put_class_info("acct", {"A반": "1", "B반": "2"}) is False
+    assert cache.put_class_info("acct", {"A반": "1", "B반(새)": "3"}) is True
+    assert cache.get_roster("1", past) == roster
+    assert cache.get_roster("2", past) is None
+
+
+def test_selection_is_per_account(cache):
+    assert cache.get_selection("1:a") == []
+    cache.put_selection("1:a", ["A반", "B반"])
+    cache.put_selection("1:b", ["C반"])
+    assert cache.get_selection("1:a") == ["A반", "B반"]
+    assert cache.get_selection("1:b") == ["C반"]
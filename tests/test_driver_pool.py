@@ -0,0 +1,115 @@
+"""DriverPool with stand-in drivers, and per-account profile names."""
+
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+
+from selenium.common.exceptions import WebDriverException
+
+import utils
+
+
+class FakeDriver:
+    def __init__(self, tabs=1):
+        self.alive = True
+        self.quit_called = False
+        self._handles = [f"tab{i}" for i in range(tabs)]
+        self.current = self._handles[0]
+        self.switch_to = SimpleNamespace(window=self._switch)
+
+    @property
+    def window_handles(self):
+        return list(self._handles)
+
+    def _switch(self, handle):
+        self.current = handle
+
+    def execute_script(self, script):
+        if not self.alive:
+            raise WebDriverException("chrome not reachable")
+        return "complete"
+
+    def close(self):
+        self._handles.remove(self.current)
+
+    def quit(self):
+        self.quit_called = True
+
+
+class Factory:
+    def __init__(self, **driver_kwargs):
+        self.driver_kwargs = driver_kwargs
+        self.made = []
+
+    def __call__(self):
+        self.made.append(FakeDriver(**self.driver_kwargs))
+        return self.made[-1]
+
+
+def test_checkin_makes_driver_reusable_for_same_key_only():
+    pool, factory = utils.DriverPool(), Factory()
+    driver = pool.checkout(("naver", "a"), factory)
+    pool.checkin(driver)
+    assert pool.checkout(("naver", "b"), factory) is not driver
+    assert pool.checkout(("naver", "a"), factory) is driver
+    assert len(factory.made) == 2
+
+
+def test_unhealthy_idle_driver_is_quit_and_replaced():
+    pool, factory = utils.DriverPool(), Factory()
+    driver = pool.checkout("key", factory)
+    pool.checkin(driver)
+    driver.alive = False
+    replacement = pool.checkout("key", factory)
+    assert replacement is not driver
+    assert driver.quit_called
+
+
+def test_checkin_quits_drivers_the_pool_did_not_start():
+    pool, stranger = utils.DriverPool(), FakeDriver()
+    pool.checkin(stranger)
+    assert stranger.quit_called
+    pool.checkin(None)  # tolerated
+
+
+def test_checkin_closes_extra_tabs():
+    pool, factory = utils.DriverPool(), Factory(tabs=3)
+    driver = pool.checkout("key", factory)
+    pool.checkin(driver)
+    assert driver.window_handles == ["tab0"]
+    assert driver.current == "tab0"
+    assert pool.checkout("key", factory) is driver
+
+
+def test_idle_and_old_drivers_are_evicted():
+    pool, factory = utils.DriverPool(max_idle=timedelta(milliseconds=10)), Factory()
+    driver = pool.checkout("key", factory)
+    pool.checkin(driver)
+    time.sleep(0.05)
+    pool.evict()
+    assert driver.quit_called
+    assert pool.checkout("key", factory) is not driver
+
+    pool = utils.DriverPool(max_age=timedelta(milliseconds=10))
+    driver = pool.checkout("key", factory)
+    time.sleep(0.05)
+    pool.checkin(driver)
+    assert driver.quit_called
+
+
+def test_close_quits_idle_drivers():
+    pool, factory = utils.DriverPool(), Factory()
+    idle, borrowed = pool.checkout("a", factory), pool.checkout("b", factory)
+    pool.checkin(idle)
+    pool.close()
+    assert idle.quit_called
+    assert not borrowed.quit_called
+
+
+def test_session_profile_name_is_per_account():
+    name = utils._session_profile_name("naver", "teacher1")
+    assert name == utils._session_profile_name("naver", "teacher1")
+    assert name.startswith("naver-")
+    assert "teacher1" not in name
+    assert name != utils._session_profile_name("naver", "teacher2")
+    assert name != utils._session_profile_name("aca2000", "teacher1")
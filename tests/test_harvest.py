@@ -0,0 +1,70 @@
+"""harvest_attendance() with the ACA2000 browser steps replaced by stand-ins."""
+
+from datetime import date
+
+import pytest
+
+import utils
+
+DAY1, DAY2, DAY3 = date(2026, 10, 3), date(2026, 10, 10), date(2026, 10, 17)
+CLASS_LISTS = {
+    DAY1: {"A반": "1", "B반": "2"},
+    DAY2: {"A반": "11"},
+    DAY3: {"A반": "21", "B반": "22"},
+}
+
+
+@pytest.fixture
+def aca2000(monkeypatch):
+    driver = object()
+    calls = {"login": [], "switch": [], "read": [], "released": []}
+
+    def login(target_date=None, **kwargs):
+        calls["login"].append(target_date)
+        return CLASS_LISTS[target_date], driver
+
+    def read(d, class_ids, use_http, workers, use_cache):
+        calls["read"].append(dict(class_ids))
+        if class_ids.get("A반") == "fail":
+            raise RuntimeError("page broke")
+        return {name: [utils.RosterEntry.parse(f"{name} 학생")] for name in class_ids}
+
+    monkeypatch.setattr(utils, "get_class_list_from_aca2000", login)
+    monkeypatch.setattr(
+        utils, "_select_aca2000_date", lambda d, w, day: calls["switch"].append(day)
+    )
+    monkeypatch.setattr(
+        utils, "_read_aca2000_class_list", lambda d, w, day: CLASS_LISTS[day]
+    )
+    monkeypatch.setattr(utils, "_read_students_for_classes", read)
+    monkeypatch.setattr(utils, "release_driver", calls["released"].append)
+    monkeypatch.setattr(utils, "WebDriverWait", lambda d, timeout: None)
+    calls["driver"] = driver
+    return calls
+
+
+def test_one_login_and_one_date_switch_per_later_date(aca2000):
+    harvest = utils.harvest_attendance([DAY3, DAY1, DAY2, DAY1], ["A반", "B반"])
+    assert aca2000["login"] == [DAY1]
+    assert aca2000["switch"] == [DAY2, DAY3]
+    # Each date reads its own class ids; B반 has no class on DAY2
+    assert aca2000["read"] == [
+        {"A반": "1", "B반": "2"},
+        {"A반": "11"},
+        {"A반": "21", "B반": "22"},
+    ]
+    assert list(harvest) == [DAY1, DAY2, DAY3]
+    assert set(harvest[DAY2]) == {"A반"}
+    assert aca2000["released"] == [aca2000["driver"]]
+
+
+def test_driver_is_released_when_a_date_fails(aca2000, monkeypatch):
+    monkeypatch.setitem(CLASS_LISTS, DAY2, {"A반": "fail"})
+    with pytest.raises(RuntimeError):
+        utils.harvest_attendance([DAY1, DAY2], ["A반"])
+    assert aca2000["released"] == [aca2000["driver"]]
+
+
+def test_no_dates_means_no_login(aca2000):
+    assert utils.harvest_attendance([], ["A반"]) == {}
+    assert aca2000["login"] == []
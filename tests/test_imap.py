@@ -0,0 +1,191 @@
+"""iter_naver_email_imap() against a local IMAP stand-in."""
+
+import base64
+import re
+import socketserver
+import threading
+from datetime import date
+
+import pytest
+
+import utils
+
+TEXT = "숙제 제출합니다. 김민수 학생 엄마입니다."
+
+# Per folder: uid -> message. "sections" holds the raw (still encoded) body
+# of each part, "structure" the BODYSTRUCTURE the server reports for it.
+MAILBOX = {
+    "INBOX": {
+        7: {
+            "seen": False,
+            "header": (
+                b"From: =?UTF-8?B?6rmA66+87IiYIOyWtOuouOuLiA==?= <mom@example.com>\r\n"
+                b"Subject: =?UTF-8?B?7IiZ7KCcIOygnOy2nA==?=\r\n"
+                b"Date: Sat, 17 Oct 2026 10:00:00 +0900\r\n\r\n"
+            ),
+            "structure": (
+                b'(("TEXT" "PLAIN" ("CHARSET" "UTF-8") NIL NIL "BASE64" 80 2 NIL NIL NIL)'
+                b'("APPLICATION" "PDF" ("NAME" "hw.pdf") NIL NIL "BASE64" 200000 NIL'
+                b" (\"ATTACHMENT\" (\"FILENAME*\" \"UTF-8''%EC%88%99%EC%A0%9C.pdf\")) NIL)"
+                b' "MIXED")'
+            ),
+            "sections": {
+                "1": base64.encodebytes(TEXT.encode()),
+                "2": b"QUFB" * 50000,
+            },
+        },
+        8: {
+            "seen": True,
+            "header": b"From: old@example.com\r\nSubject: read already\r\n\r\n",
+            "structure": b'("TEXT" "PLAIN" ("CHARSET" "UTF-8") NIL NIL "7BIT" 4 1 NIL NIL NIL)',
+            "sections": {"1": b"read"},
+        },
+    },
+    # Filed here by a Naver mail filter
+    "Homework": {
+        3: {
+            "seen": False,
+            "header": (
+                b"From: Parent <parent@example.com>\r\nSubject: homework\r\n"
+                b"Date: Fri, 16 Oct 2026 09:00:00 +0900\r\n\r\n"
+            ),
+            "structure": (
+                b'("TEXT" "HTML" ("CHARSET" "EUC-KR") NIL NIL "QUOTED-PRINTABLE" 40 1'
+                b" NIL NIL NIL)"
+            ),
+            "sections": {"1": "<p>이지은 =\r\n숙제</p>".encode("euc-kr")},
+        },
+    },
+    "Sent Messages": {
+        1: {
+            "seen": False,
+            "header": b"From: teacher@example.com\r\nSubject: sent by me\r\n\r\n",
+            "structure": b'("TEXT" "PLAIN" ("CHARSET" "UTF-8") NIL NIL "7BIT" 4 1 NIL NIL NIL)',
+            "sections": {"1": b"sent"},
+        },
+    },
+}
+
+
+class _FakeImapHandler(socketserver.StreamRequestHandler):
+    """Just enough IMAP4rev1 for imap_tools and the FETCH items utils sends."""
+
+    def send(self, data):
+        self.wfile.write(data if isinstance(data, bytes) else data.encode())
+
+    def handle(self):
+        selected = None
+        self.send("* OK fake IMAP ready\r\n")
+        for raw in self.rfile:
+            line = raw.decode().rstrip("\r\n")
+            self.server.commands.append(line)
+            tag, _, rest = line.partition(" ")
+            command, _, args = rest.partition(" ")
+            command = command.upper()
+            if command == "CAPABILITY":
+                self.send("* CAPABILITY IMAP4rev1\r\n")
+            elif command == "LIST":
+                for name in MAILBOX:
+                    flags = "\\HasNoChildren \\Sent" if name == "Sent Messages" else "\\HasNoChildren"
+                    self.send(f'* LIST ({flags}) "/" "{name}"\r\n')
+            elif command == "SELECT":
+                selected = args.strip('"')
+                self.send(f"* {len(MAILBOX[selected])} EXISTS\r\n* OK [UIDVALIDITY 1]\r\n")
+            elif command == "STATUS":
+                name = re.match(r'"?([^"]+)"? ', args).group(1)
+                self.send(f'* STATUS "{name}" (UIDVALIDITY 1)\r\n')
+            elif command == "UID" and args.upper().startswith("SEARCH"):
+                uids = list(MAILBOX[selected])
+                above = re.search(r"UID (\d+):\*", args)
+                if above:
+                    # "N:*" always includes the highest UID
+                    uids = [uid for uid in uids if uid >= int(above.group(1))] or [max(uids)]
+                uids = [uid for uid in uids if not MAILBOX[selected][uid]["seen"]]
+                self.send("* SEARCH " + " ".join(map(str, sorted(uids))) + "\r\n")
+            elif command == "UID" and args.upper().startswith("FETCH"):
+                _, uid_set, items = args.split(" ", 2)
+                for seq, uid in enumerate(int(u) for u in uid_set.split(",")):
+                    msg = MAILBOX[selected][uid]
+                    if "BODYSTRUCTURE" in items:
+                        self.send(
+                            f"* {seq + 1} FETCH (UID {uid} BODYSTRUCTURE ".encode()
+                            + msg["structure"]
+                            + f" BODY[HEADER] {{{len(msg['header'])}}}\r\n".encode()
+                            + msg["header"]
+                            + b")\r\n"
+                        )
+                    else:
+                        section, limit = re.search(r"BODY\.PEEK\[([\d.]+)\]<0\.(\d+)>", items).groups()
+                        body = msg["sections"][section][: int(limit)]
+                        self.send(
+                            f"* {seq + 1} FETCH (UID {uid} BODY[{section}]<0> {{{len(body)}}}\r\n".encode()
+                            + body
+                            + b")\r\n"
+                        )
+            elif command == "LOGOUT":
+                self.send("* BYE\r\n" + f"{tag} OK LOGOUT\r\n")
+                return
+            self.send(f"{tag} OK {command}\r\n")
+
+
+@pytest.fixture
+def imap_server():
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _FakeImapHandler)
+    server.daemon_threads = True
+    server.commands = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _fetch(server, end_date=date(2026, 10, 18), **kwargs):
+    return list(
+        utils.iter_naver_email_imap(
+            naver_id="teacher",
+            naver_passkey="app-password",
+            start_date=date(2026, 10, 12),
+            end_date=end_date,
+            imap_server="127.0.0.1",
+            imap_port=server.server_address[1],
+            imap_ssl=False,
+            **kwargs,
+        )
+    )
+
+
+def test_reads_unread_mail_from_every_received_folder(imap_server):
+    records = _fetch(imap_server, use_cache=False)
+
+    by_subject = {record.subject: record for record in records}
+    assert set(by_subject) == {"숙제 제출", "homework"}
+    inbox = by_subject["숙제 제출"]
+    assert inbox.sender == "mom@example.com"
+    assert inbox.sender_name == "김민수 어머니"
+    assert inbox.content == TEXT
+    assert inbox.attachments == ["숙제.pdf"]
+    assert inbox.mail_date == date(2026, 10, 17)
+    assert inbox.mail_id == "uid:7@INBOX"
+    assert by_subject["homework"].content == "이지은 숙제"
+
+
+def test_never_downloads_attachments_or_sets_seen(imap_server):
+    _fetch(imap_server, use_cache=False)
+
+    fetches = [c for c in imap_server.commands if " UID FETCH " in c.upper()]
+    assert fetches
+    assert all("BODY.PEEK[" in c and "RFC822" not in c for c in fetches)
+    assert not any("BODY.PEEK[2]" in c for c in fetches)  # the PDF part
+    assert not any(" STORE " in c.upper() for c in imap_server.commands)
+    assert not any('SELECT "Sent Messages"' in c for c in imap_server.commands)
+
+
+def test_incremental_run_serves_known_mail_from_store(imap_server, tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, "CACHE_DIR", str(tmp_path))
+    first = _fetch(imap_server, end_date=date.today())
+    imap_server.commands.clear()
+
+    second = _fetch(imap_server, end_date=date.today())
+
+    assert {r.mail_id for r in second} == {r.mail_id for r in first}
+    assert not any(" UID FETCH " in c.upper() for c in imap_server.commands)
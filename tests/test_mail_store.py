@@ -0,0 +1,95 @@
+"""MailStore: cached mails and the per-account sync watermark."""
+
+import sqlite3
+from datetime import date
+
+import pytest
+
+import utils
+from utils import EmailRecord
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = utils.MailStore(str(tmp_path / "mail.sqlite3"))
+    yield store
+    store.close()
+
+
+def _record(mail_id, day, subject="숙제", sender="mom@example.com"):
+    return EmailRecord(
+        sender=sender,
+        subject=subject,
+        content="김민수 숙제입니다",
+        attachments=["숙제.pdf"],
+        mail_id=mail_id,
+        mail_date=date(2026, 10, day),
+    )
+
+
+def test_put_and_get_round_trip(store):
+    record = _record("uid:7@INBOX", 17)
+    store.put("acct", record)
+    assert store.get("acct", "uid:7@INBOX") == record
+    assert store.get("other", "uid:7@INBOX") is None
+    assert store.get("acct", "uid:8@INBOX") is None
+
+
+def test_put_replaces_existing_mail(store):
+    store.put("acct", _record("mail-1", 17))
+    store.put("acct", _record("mail-1", 17, subject="숙제 (수정)"))
+    assert store.get("acct", "mail-1").subject == "숙제 (수정)"
+
+
+def test_in_range_is_per_account_and_newest_first(store):
+    store.put("acct", _record("mail-1", 10))
+    store.put("acct", _record("mail-2", 17))
+    store.put("acct", _record("mail-3", 24))
+    store.put("other", _record("mail-4", 17))
+    found = store.in_range("acct", date(2026, 10, 10), date(2026, 10, 17))
+    assert [r.mail_id for r in found] == ["mail-2", "mail-1"]
+
+
+def test_sync_state_round_trip(store):
+    assert store.get_sync_state("acct") is None
+    store.set_sync_state("acct", "1234", 42, date(2026, 10, 1))
+    store.set_sync_state("acct", "1234", 57, date(2026, 10, 1))
+    assert store.get_sync_state("acct") == {
+        "uidvalidity": "1234",
+        "last_uid": 57,
+        "covered_from": date(2026, 10, 1),
+    }
+
+
+def test_sender_name_round_trips(store):
+    record = _record("mail-1", 17)
+    record.sender_name = "김민수 어머니"
+    store.put("acct", record)
+    assert store.get("acct", "mail-1").sender_name == "김민수 어머니"
+    assert store.in_range("acct", date(2026, 10, 1), date(2026, 10, 31))[0] == record
+
+
+def test_store_without_sender_name_column_is_migrated(tmp_path):
+    path = str(tmp_path / "old.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE mails (account TEXT NOT NULL, mail_key TEXT NOT NULL, "
+        "mail_date TEXT, sender TEXT, subject TEXT, content TEXT, attachments TEXT, "
+        "fetched_at TEXT, PRIMARY KEY (account, mail_key))"
+    )
+    conn.execute(
+        "INSERT INTO mails VALUES ('acct', 'mail-1', '2026-10-17', 'mom@example.com', "
+        "'숙제', '', '[]', '2026-10-17T10:00:00')"
+    )
+    conn.commit()
+    conn.close()
+
+    store = utils.MailStore(path)
+    try:
+        assert store.get("acct", "mail-1").sender_name == ""
+        record = _record("mail-2", 17)
+        record.sender_name = "이영희 엄마"
+        store.put("acct", record)
+        assert store.get("acct", "mail-2") == record
+    finally:
+        store.close()
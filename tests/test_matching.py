@@ -0,0 +1,61 @@
+"""IncrementalMatcher and find_missing_students()."""
+
+import utils
+from utils import EmailRecord, IncrementalMatcher, RosterEntry
+
+ROSTERS = {
+    "A반": ["김민수", "이영희 (대기)"],
+    "B반": [RosterEntry.parse("김민수"), RosterEntry.parse("박지훈 신규")],
+}
+
+
+def _mail(subject="", content="", attachments=(), sender="mom@example.com", name=""):
+    return EmailRecord(
+        sender=sender,
+        subject=subject,
+        content=content,
+        attachments=list(attachments),
+        sender_name=name,
+    )
+
+
+def test_feed_reports_each_class_of_a_matched_student():
+    matcher = IncrementalMatcher(ROSTERS)
+    matched = matcher.feed(_mail(subject="숙제", content="김민수 숙제입니다"))
+    assert sorted((c, str(e)) for c, e, _ in matched) == [("A반", "김민수"), ("B반", "김민수")]
+    assert matcher.outstanding == {"이영희", "박지훈"}
+    assert matcher.feed(_mail(content="김민수 또 냅니다")) == []
+
+
+def test_names_are_found_in_every_field():
+    matcher = IncrementalMatcher(ROSTERS)
+    matcher.feed(_mail(name="이영희 어머니"))
+    matcher.feed(_mail(attachments=["박지훈_숙제.pdf"]))
+    assert matcher.outstanding == {"김민수"}
+    assert not matcher.done
+
+
+def test_results_split_matched_and_missing_per_class():
+    matcher = IncrementalMatcher(ROSTERS)
+    matcher.feed(_mail(subject="이영희 숙제"))
+    results = matcher.results()
+    assert results["A반"]["matched"] == [("이영희 (대기)", "이영희 숙제")]
+    assert results["A반"]["missing"] == ["김민수"]
+    assert [str(e) for e in results["B반"]["missing"]] == ["김민수", "박지훈 신규"]
+
+
+def test_find_missing_students_stops_reading_once_everyone_is_found():
+    read = []
+
+    def emails():
+        for mail in [
+            _mail(subject="김민수"),
+            _mail(subject="이영희 박지훈"),
+            _mail(subject="공지"),
+        ]:
+            read.append(mail.subject)
+            yield mail
+
+    results = utils.find_missing_students(ROSTERS, emails())
+    assert all(not r["missing"] for r in results.values())
+    assert read == ["김민수", "이영희 박지훈"]
@@ -0,0 +1,281 @@
+"""iter_naver_email() on the web path, with the browser and pager replaced by stand-ins."""
+
+from datetime import date, timedelta
+from functools import partial
+from types import SimpleNamespace
+
+import pytest
+from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.support.ui import WebDriverWait
+
+import utils
+from utils import EmailRecord
+
+TODAY = date.today()
+
+
+def _row(num, subject, day=TODAY, read=False, sender="mom@example.com"):
+    return {
+        "mail_id": f"mail-{num}",
+        "sender": sender,
+        "sender_name": "",
+        "subject": subject,
+        "date": "오전 09:00" if day == TODAY else f"{day:%m.%d} 09:00",
+        "read": read,
+        "index": 0,
+    }
+
+
+class FakeNaverDriver:
+    """Serves list pages to _NAVER_LIST_SCRIPT; opening a mail is not supported."""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.page = 0
+
+    def get(self, url):
+        pass
+
+    def quit(self):
+        pass
+
+    def find_element(self, by, selector):
+        if "전체메일" in selector:
+            raise NoSuchElementException(selector)
+        return object()
+
+    def execute_script(self, script, *args):
+        if script == utils._NAVER_LIST_SCRIPT:
+            return [dict(row) for row in self.pages[self.page]]
+        return 0
+
+
+class FakePager:
+    """Moves FakeNaverDriver between pages; at_end is what advance() returns after the last."""
+
+    at_end = False
+
+    def __init__(self, driver, wait):
+        self.driver = driver
+
+    def prefetch(self, page_num):
+        pass
+
+    def advance(self, page_num):
+        if self.driver.page + 1 >= len(self.driver.pages):
+            return self.at_end
+        self.driver.page += 1
+        return True
+
+    def seek(self, page_num, end_date):
+        return None
+
+
+@pytest.fixture
+def naver(monkeypatch, tmp_path):
+    """
+    Returns run(pages, outstanding=None, at_end=False) -> (records, MailStore).
+    utils.MailStore() opens the same per-test store while the fixture is active.
+    """
+    store_path = str(tmp_path / "mail.sqlite3")
+    monkeypatch.setattr(utils, "MailStore", partial(utils.MailStore, store_path))
+    monkeypatch.setattr(utils, "_pace", lambda site: None)
+    monkeypatch.setattr(utils, "_maximize_naver_page_size", lambda driver, wait: None)
+
+    def run(pages, outstanding=None, at_end=False):
+        driver = FakeNaverDriver(pages)
+        monkeypatch.setattr(
+            utils, "login_naver_selenium", lambda **kwargs: driver
+        )
+        monkeypatch.setattr(FakePager, "at_end", at_end)
+        monkeypatch.setattr(utils, "_NaverPager", FakePager)
+        records = []
+        for record in utils.iter_naver_email(
+            naver_id="teacher",
+            start_date=TODAY - timedelta(days=7),
+            end_date=TODAY,
+            outstanding=outstanding,
+        ):
+            records.append(record)
+            if outstanding is not None and "김민수" in record.content:
+                outstanding.discard("김민수")
+        return records, utils.MailStore()
+
+    return run
+
+
+def _cache(store, num, content):
+    store.put(
+        "web:teacher",
+        EmailRecord(
+            sender="mom@example.com",
+            subject=f"숙제 {num}",
+            content=content,
+            mail_id=f"mail-{num}",
+            mail_date=TODAY,
+        ),
+    )
+
+
+def test_no_watermark_when_last_row_finds_everyone(naver):
+    _cache(utils.MailStore(), 10, "김민수 숙제입니다")
+    pages = [
+        [_row(11, "공지", read=True), _row(10, "숙제 10")],
+        [_row(5, "숙제 5")],
+    ]
+    records, store = naver(pages, outstanding={"김민수"})
+    assert [r.mail_id for r in records] == ["mail-10"]
+    # Page 2 was never scanned: a watermark at mail-10 would hide mail-5 for good
+    assert store.get_sync_state("web:teacher") is None
+
+
+def _cached_pages(*pages):
+    store = utils.MailStore()
+    for page in pages:
+        for num in page:
+            _cache(store, num, "숙제입니다")
+    return [[_row(num, f"숙제 {num}") for num in page] for page in pages]
+
+
+def test_watermark_saved_after_the_last_page(naver):
+    pages = _cached_pages([12, 11], [8])
+    records, store = naver(pages, at_end=False)
+    assert [r.mail_id for r in records] == ["mail-12", "mail-11", "mail-8"]
+    state = store.get_sync_state("web:teacher")
+    assert state["last_uid"] == 12
+    assert state["covered_from"] == TODAY - timedelta(days=7)
+
+
+def test_no_watermark_when_the_next_page_fails(naver):
+    pages = _cached_pages([12, 11], [8])
+    records, store = naver(pages, at_end=None)
+    assert len(records) == 3
+    assert store.get_sync_state("web:teacher") is None
+
+
+def test_no_watermark_when_a_page_shows_no_rows(naver):
+    pages = _cached_pages([12, 11]) + [[]]
+    records, store = naver(pages)
+    assert len(records) == 2
+    assert store.get_sync_state("web:teacher") is None
+
+
+def test_incremental_run_stops_at_the_watermark(naver):
+    pages = _cached_pages([12, 10])
+    pages[0].append(_row(9, "숙제 9"))
+    utils.MailStore().set_sync_state(
+        "web:teacher", None, 10, TODAY - timedelta(days=7)
+    )
+    records, store = naver(pages)
+    # mail-10 comes from the store after the list reached the watermark
+    assert [r.mail_id for r in records] == ["mail-12", "mail-10"]
+    assert store.get_sync_state("web:teacher")["last_uid"] == 12
+
+
+class TabDriver:
+    """Two tabs: the current list page and a prefetched one still rendering."""
+
+    def __init__(self, last_page=False, renders_after=3):
+        self.handles = ["list", "next"]
+        self.current_window_handle = "list"
+        self.switch_to = SimpleNamespace(window=self._switch)
+        self.last_page = last_page
+        self.renders_after = renders_after
+        self.calls = []
+
+    @property
+    def window_handles(self):
+        return list(self.handles)
+
+    def _switch(self, handle):
+        self.current_window_handle = handle
+
+    def close(self):
+        self.handles.remove(self.current_window_handle)
+
+    def find_element(self, by, selector):
+        return SimpleNamespace(
+            get_attribute=lambda name: "" if self.last_page else None
+        )
+
+    def execute_script(self, script, *args):
+        self.calls.append(script)
+        if script == utils._NAVER_PAGE_DATES_SCRIPT:
+            polls = self.calls.count(script)
+            return ["오전 09:00", "오전 08:00"] if polls >= self.renders_after else None
+        if script == utils._NETWORK_STATE_SCRIPT:
+            return {"ready": True, "pending": 0}
+        return 0
+
+
+def _prefetched_pager(driver):
+    pager = utils._NaverPager(driver, WebDriverWait(driver, 2, poll_frequency=0.01))
+    pager._prefetched = (2, "next")
+    return pager
+
+
+def test_advance_waits_for_the_prefetched_tab_to_render():
+    driver = TabDriver()
+    assert _prefetched_pager(driver).advance(1) is True
+    assert driver.window_handles == ["next"]
+    assert driver.current_window_handle == "next"
+    tracker = driver.calls.index(utils._NETWORK_TRACKER_SCRIPT)
+    assert tracker < driver.calls.index(utils._NAVER_PAGE_DATES_SCRIPT)
+    assert driver.calls.count(utils._NAVER_PAGE_DATES_SCRIPT) == 3
+
+
+def test_advance_stops_on_the_last_page_and_drops_the_prefetched_tab():
+    driver = TabDriver(last_page=True)
+    assert _prefetched_pager(driver).advance(1) is False
+    assert driver.window_handles == ["list"]
+    assert driver.current_window_handle == "list"
+
+
+def test_advance_reports_a_tab_that_never_renders():
+    driver = TabDriver(renders_after=10**6)
+    assert _prefetched_pager(driver).advance(1) is None
+
+
+class PagedDriver:
+    """List pages by URL; page p holds mails from 2(p-1) and 2(p-1)+1 days ago."""
+
+    URL = "https://mail.naver.com/v2/folders/0?page="
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.current_url = self.URL + "1"
+        self.loads = []
+
+    def get(self, url):
+        self.current_url = url
+        self.loads.append(int(url[len(self.URL) :]))
+
+    def execute_script(self, script, *args):
+        if script != utils._NAVER_PAGE_DATES_SCRIPT:
+            return 0
+        page = int(self.current_url[len(self.URL) :])
+        if page > self.pages:
+            return None
+        newest = TODAY - timedelta(days=2 * (page - 1))
+        return [f"{newest:%m.%d} 09:00", f"{newest - timedelta(days=1):%m.%d} 09:00"]
+
+
+def _seek(driver, page_num, end_date, monkeypatch):
+    monkeypatch.setattr(utils, "_pace", lambda site: None)
+    pager = utils._NaverPager(driver, None)
+    pager._url_parts = (PagedDriver.URL, "")
+    return pager.seek(page_num, end_date)
+
+
+def test_seek_finds_the_first_page_reaching_end_date(monkeypatch):
+    driver = PagedDriver(pages=40)
+    assert _seek(driver, 1, TODAY - timedelta(days=20), monkeypatch) == 11
+    assert driver.current_url == PagedDriver.URL + "11"
+    # Exponential probe to 17, then bisection: O(log pages) loads
+    assert len(driver.loads) <= 7
+
+
+def test_seek_stops_at_the_next_page_when_it_already_reaches_end_date(monkeypatch):
+    driver = PagedDriver(pages=40)
+    assert _seek(driver, 3, TODAY - timedelta(days=7), monkeypatch) == 4
+    assert driver.loads == [4]
@@ -0,0 +1,70 @@
+"""_reduce_body(): the part of a mail body that is scanned for names."""
+
+import unicodedata
+
+import pytest
+
+import utils
+
+
+def test_drops_signatures_and_reply_history():
+    body = (
+        "김민수 숙제입니다\n\nSent from my iPhone\n\n"
+        "On Sat, Oct 17, 2026 at 10:00 AM 선생님 <t@example.com> wrote:\n> 지난주 숙제 안내"
+    )
+    assert utils._reduce_body(body) == "김민수 숙제입니다"
+
+
+@pytest.mark.parametrize(
+    "signature",
+    ["iPhone에서 보냄", "Galaxy S23에서 보냄", "네이버 메일 앱에서 보냄",
+     "Samsung Galaxy smartphone에서 보냈습니다.", "Sent from my Galaxy"],
+)
+def test_drops_known_app_and_device_signatures(signature):
+    assert utils._reduce_body(f"김민수 숙제입니다\n{signature}") == "김민수 숙제입니다"
+
+
+def test_keeps_lines_that_only_look_like_signatures():
+    body = "숙제 제출합니다\n김민수 엄마에서 보냄"
+    assert utils._reduce_body(body) == body
+
+
+def test_cuts_at_a_quoted_header_block():
+    english = (
+        "네 확인했습니다\n\nFrom: 선생님 <t@example.com>\nSent: Saturday, October 17, 2026\n"
+        "To: mom@example.com\nSubject: 숙제\n\n김민수 어머님께"
+    )
+    korean = (
+        "네 확인했습니다\n보낸 사람: 선생님 <t@example.com>\n받는 사람: mom@example.com\n"
+        "날짜: 2026-10-17\n제목: 숙제\n\n김민수 어머님께"
+    )
+    assert utils._reduce_body(english) == "네 확인했습니다"
+    assert utils._reduce_body(korean) == "네 확인했습니다"
+
+
+def test_keeps_a_from_line_without_header_block():
+    body = "과제 제출합니다\nFrom: 이영희 (학생)"
+    assert utils._reduce_body(body) == body
+
+
+def test_cuts_a_korean_reply_line_only_with_an_address():
+    reply = "확인 부탁드립니다\n2026. 10. 17. 오전 10:00, 선생님 <t@example.com> 작성:\n> 공지"
+    essay = "독후감 제출합니다\n김민수 작성:\n책을 읽고"
+    assert utils._reduce_body(reply) == "확인 부탁드립니다"
+    assert utils._reduce_body(essay) == "독후감 제출합니다\n김민수 작성:\n책을 읽고"
+
+
+def test_keeps_a_bare_forward():
+    body = "---------- Forwarded message ---------\nFrom: 엄마 <a@b.c>\n\n이영희 숙제"
+    assert utils._reduce_body(body).splitlines()[-1] == "이영희 숙제"
+
+
+def test_drops_quoted_lines_only_after_own_text():
+    assert utils._reduce_body("네 확인했습니다\n> 원문 내용") == "네 확인했습니다"
+    assert utils._reduce_body("> 원문 내용") == "> 원문 내용"
+
+
+def test_normalizes_and_caps():
+    assert utils._reduce_body(unicodedata.normalize("NFD", "김민수")) == "김민수"
+    assert utils._reduce_body("가" * 10, limit=4) == "가" * 4
+    assert utils._reduce_body(None) == ""
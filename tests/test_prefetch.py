@@ -0,0 +1,86 @@
+"""MailPrefetch: the speculative mail fetch handed over to a matcher."""
+
+import threading
+
+import utils
+from utils import EmailRecord, IncrementalMatcher
+
+MAILS = [
+    EmailRecord(sender="a@example.com", subject="김민수 숙제"),
+    EmailRecord(sender="b@example.com", subject="공지"),
+    EmailRecord(sender="c@example.com", subject="이영희 숙제"),
+    EmailRecord(sender="d@example.com", subject="박지훈 숙제"),
+]
+
+
+class FakeFetch:
+    """Stands in for iter_naver_email(); stops like it once outstanding is empty."""
+
+    def __init__(self, mails, gate=None):
+        self.mails = mails
+        self.gate = gate  # holds the fetch before its first mail, like a login
+        self.yielded = []
+        self.finished = threading.Event()
+
+    def __call__(self, outstanding=None, **kwargs):
+        try:
+            if self.gate is not None:
+                self.gate.wait()
+            for mail in self.mails:
+                if not outstanding:
+                    return
+                self.yielded.append(mail)
+                yield mail
+        finally:
+            self.finished.set()
+
+
+class Directory:
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_stream_hands_buffered_mails_to_the_matcher(monkeypatch):
+    fetch = FakeFetch(MAILS)
+    monkeypatch.setattr(utils, "iter_naver_email", fetch)
+    prefetch = utils.MailPrefetch(naver_id="teacher", start_date=None)
+    matcher = IncrementalMatcher({"A반": ["김민수", "이영희"]})
+
+    streamed = []
+    for mail in prefetch.stream(matcher):
+        streamed.append(mail)
+        matcher.feed(mail)
+
+    assert matcher.done
+    assert streamed == MAILS[:3]
+    # stream() returns only after the background fetch has let go of its browser
+    assert fetch.finished.is_set()
+
+
+def test_matches_compares_fetch_arguments(monkeypatch):
+    monkeypatch.setattr(utils, "iter_naver_email", FakeFetch([]))
+    prefetch = utils.MailPrefetch(naver_id="teacher", backend="selenium")
+    assert prefetch.matches(naver_id="teacher")
+    assert not prefetch.matches(naver_id="teacher", backend="imap")
+    prefetch.cancel()
+
+
+def test_close_waits_for_the_fetch_and_closes_its_directory(monkeypatch):
+    gate = threading.Event()
+    fetch = FakeFetch(MAILS, gate=gate)
+    monkeypatch.setattr(utils, "iter_naver_email", fetch)
+    directory = Directory()
+    prefetch = utils.MailPrefetch(naver_id="teacher", directory=directory)
+
+    closer = threading.Thread(target=prefetch.close)
+    closer.start()
+    closer.join(0.2)
+    assert closer.is_alive()  # still "logging in"
+    gate.set()
+    closer.join(5)
+    assert not closer.is_alive()
+    assert fetch.finished.is_set()
+    assert fetch.yielded == []
+    assert directory.closed
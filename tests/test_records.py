@@ -0,0 +1,36 @@
+"""RosterEntry parsing and the EmailIndex de-duplication."""
+
+from datetime import date
+
+import utils
+from utils import EmailRecord, RosterEntry
+
+
+def _record(mail_id, subject="숙제", sender="mom@example.com"):
+    return EmailRecord(
+        sender=sender, subject=subject, mail_id=mail_id, mail_date=date(2026, 10, 17)
+    )
+
+
+def test_roster_entry_finds_the_name_and_status_tags():
+    entry = RosterEntry.parse("월금 김민수 (대기) 신규", detail_id="101", status="출석")
+    assert entry.name == "김민수"
+    assert entry.tags == {"대기", "신규"}
+    assert (entry.detail_id, entry.status) == ("101", "출석")
+    assert str(entry) == "월금 김민수 (대기) 신규"
+
+
+def test_roster_entry_without_a_name():
+    assert RosterEntry.parse("M7 대기").name is None
+
+
+def test_email_index_rejects_duplicates():
+    index = utils.EmailIndex()
+    assert index.add(_record("mail-1"))
+    assert not index.add(_record("mail-1", subject="다른 제목"))  # same id
+    assert not index.add(_record(None))  # same sender and subject
+    assert index.add(_record(None, subject="다른 제목"))
+    assert len(index) == 2
+    assert index.get("mail-1").subject == "숙제"
+    assert index.seen("mom@example.com", "다른 제목")
+    assert [r.subject for r in index] == ["숙제", "다른 제목"]
@@ -0,0 +1,60 @@
+"""SelectorRegistry and the fallback locator lookups built on it."""
+
+import pytest
+from selenium.webdriver.common.by import By
+
+import utils
+
+CANDIDATES = [(By.ID, "a"), (By.ID, "b"), (By.CSS_SELECTOR, ".c")]
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return utils.SelectorRegistry(str(tmp_path / "selectors.json"))
+
+
+def test_unknown_field_keeps_the_given_order(registry):
+    assert registry.ordered("site", "field", CANDIDATES) == CANDIDATES
+
+
+def test_last_winner_goes_first_then_proven_ones(registry):
+    registry.record("site", "field", CANDIDATES[1], misses=CANDIDATES[:1])
+    registry.record("site", "field", CANDIDATES[2], misses=CANDIDATES[:2])
+    assert registry.ordered("site", "field", CANDIDATES) == [
+        CANDIDATES[2],
+        CANDIDATES[1],
+        CANDIDATES[0],
+    ]
+    assert registry.ordered("site", "other", CANDIDATES) == CANDIDATES
+
+
+def test_counts_survive_a_reload(registry):
+    registry.record("site", "field", CANDIDATES[1])
+    registry.save()
+    reloaded = utils.SelectorRegistry(registry.path)
+    assert reloaded.ordered("site", "field", CANDIDATES)[0] == CANDIDATES[1]
+
+
+class Page:
+    """find_elements() answers only for the locators that are present."""
+
+    def __init__(self, present):
+        self.present = present
+
+    def find_elements(self, by, value):
+        return [f"element {value}"] if (by, value) in self.present else []
+
+
+def test_find_first_keeps_the_given_order():
+    page = Page(present=CANDIDATES[1:])
+    assert utils._find_first(page, CANDIDATES, timeout=0.1) == (1, "element b")
+    assert utils._find_first(Page(present=[]), CANDIDATES, timeout=0.1) is None
+
+
+def test_find_learned_records_the_winner(monkeypatch, registry):
+    monkeypatch.setattr(utils, "_selectors", lambda: registry)
+    page = Page(present=[CANDIDATES[2]])
+    assert utils._find_learned(page, "site", "field", CANDIDATES, timeout=0.1) == (
+        "element .c"
+    )
+    assert registry.ordered("site", "field", CANDIDATES)[0] == CANDIDATES[2]
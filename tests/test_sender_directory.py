@@ -0,0 +1,56 @@
+"""SenderDirectory, alone and driving IncrementalMatcher."""
+
+import pytest
+
+import utils
+from utils import EmailRecord, IncrementalMatcher
+
+
+@pytest.fixture
+def directory(tmp_path):
+    directory = utils.SenderDirectory(str(tmp_path / "senders.sqlite3"))
+    yield directory
+    directory.close()
+
+
+def test_sender_is_known_after_enough_confirmations(directory):
+    directory.learn("Mom@Example.com ", {"김민수"})
+    assert directory.student_for("mom@example.com") is None
+    directory.learn("mom@example.com", {"김민수"})
+    assert directory.student_for("MOM@example.com") == "김민수"
+
+
+def test_sender_of_several_students_is_not_matched_directly(directory):
+    for _ in range(2):
+        directory.learn("mom@example.com", {"김민수", "김민지"})
+    assert directory.student_for("mom@example.com") is None
+
+
+def test_mails_naming_nobody_never_hide_a_sender(directory):
+    for _ in range(5):
+        directory.learn("dad@example.com", set())
+    directory.learn("dad@example.com", {"이영희"})
+    directory.learn("dad@example.com", {"이영희"})
+    assert directory.student_for("dad@example.com") == "이영희"
+
+
+def test_unknown_or_empty_senders_are_not_learned(directory):
+    for _ in range(2):
+        directory.learn("Unknown", {"김민수"})
+        directory.learn("", {"김민수"})
+    assert directory.student_for("unknown") is None
+
+
+def test_matcher_teaches_the_directory(directory):
+    for _ in range(2):
+        matcher = IncrementalMatcher({"A반": ["김민수"]}, directory=directory)
+        matcher.feed(EmailRecord(sender="mom@example.com", subject="김민수 숙제"))
+    assert directory.student_for("mom@example.com") == "김민수"
+
+
+def test_matcher_matches_a_known_sender_without_a_name(directory):
+    for _ in range(2):
+        directory.learn("dad@example.com", {"이영희"})
+    matcher = IncrementalMatcher({"A반": ["이영희"]}, directory=directory)
+    matched = matcher.feed(EmailRecord(sender="dad@example.com", subject="숙제"))
+    assert [entry for _, entry, _ in matched] == ["이영희"]
@@ -1,12 +1,39 @@
+import atexit
+import base64
+import email.policy
+import email.utils
+import hashlib
+import html
+import json
 import os
+import queue
+import quopri
 import random
 import re
 import shutil
+import sqlite3
+import threading
 import time
-from datetime import datetime, timedelta
-
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from email.header import decode_header, make_header
+from email.parser import BytesHeaderParser
+from html.parser import HTMLParser
+from urllib.parse import unquote, urljoin, urlsplit
+
+import requests
+import urllib3
 from dotenv import load_dotenv
+from imap_tools import AND, MailBox, MailBoxUnencrypted, U
+from requests.adapters import HTTPAdapter
 from selenium import webdriver
+from selenium.common.exceptions import (
+    NoSuchElementException,
+    TimeoutException,
+    WebDriverException,
+)
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
@@ -113,629 +140,2957 @@ def _notify_user(message, message_type="error"):
         print(message)
 
 
-def get_class_list_from_aca2000(
-    aca2000_url=None, cust_num=None, user_id=None, user_pw=None, headless=False
-):
+class Pacer:
+    """
+    Per-site politeness budget: a minimum interval (plus random jitter)
+    between consecutive actions. pace() only sleeps for the part of the
+    interval that was not already spent on page loads or parsing since the
+    previous action, so the delay overlaps with useful work.
     """
-    Fetches available class list (names and IDs) from ACA2000.
-    Returns the driver alive for reuse with get_students_for_classes().
 
-    Steps:
-    1. Login to ACA2000
-    2. Navigate to 출석부 (Attendance)
-    3. Select latest Saturday date
-    4. Extract class names and IDs
+    def __init__(self, min_interval, jitter=0.0):
+        self.min_interval = min_interval
+        self.jitter = jitter
+        self._last_action = 0.0
+        self._lock = threading.Lock()
+
+    def pace(self):
+        with self._lock:
+            due = (
+                self._last_action
+                + self.min_interval
+                + random.uniform(0, self.jitter)
+            )
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self._last_action = time.monotonic()
+
+
+# Naver is sensitive to bot-like click rates; ACA2000 is an internal tool
+SITE_PACERS = {
+    "naver": Pacer(min_interval=1.0, jitter=0.8),
+    "aca2000": Pacer(min_interval=0.0),
+}
+
+
+def _pace(site):
+    """Wait (if needed) until the site's politeness budget allows another action."""
+    SITE_PACERS[site].pace()
+
+
+# Counts in-flight XHR/fetch requests so waits can finish on network idle.
+# Safe to run repeatedly; returns the number of requests started so far.
+_NETWORK_TRACKER_SCRIPT = """
+if (!window.__automationNet) {
+    // log keeps the last requests (method, url, body) for endpoint discovery
+    var net = window.__automationNet = {pending: 0, started: 0, log: []};
+    function record(method, url, body) {
+        net.log.push({
+            method: (method || 'GET').toUpperCase(),
+            url: String(url),
+            body: typeof body === 'string' ? body : null,
+        });
+        if (net.log.length > 50) { net.log.shift(); }
+    }
+    var open = XMLHttpRequest.prototype.open;
+    XMLHttpRequest.prototype.open = function (method, url) {
+        this.__automationRequest = [method, url];
+        return open.apply(this, arguments);
+    };
+    var send = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function (body) {
+        net.pending += 1;
+        net.started += 1;
+        var request = this.__automationRequest || [];
+        record(request[0], request[1], body);
+        this.addEventListener('loadend', function () { net.pending -= 1; });
+        return send.apply(this, arguments);
+    };
+    if (window.fetch) {
+        var fetch = window.fetch;
+        window.fetch = function (input, init) {
+            net.pending += 1;
+            net.started += 1;
+            record(init && init.method, input && input.url ? input.url : input,
+                   init && init.body);
+            return fetch.apply(this, arguments).finally(function () {
+                net.pending -= 1;
+            });
+        };
+    }
+}
+return window.__automationNet.started;
+"""
 
-    Returns:
-        tuple: (class_info_dict, driver)
-            - class_info: {"M7 월금": "2246", ...}
-            - driver: live WebDriver for reuse (caller must quit when done)
-            On error: ({}, None)
-    """
-    import re
+_NETWORK_STATE_SCRIPT = """
+var net = window.__automationNet || {pending: 0, started: 0};
+var jqueryActive = window.jQuery ? window.jQuery.active : 0;
+return {
+    ready: document.readyState === 'complete',
+    pending: net.pending + jqueryActive,
+    started: net.started,
+};
+"""
 
-    if not aca2000_url:
-        aca2000_url = "https://t.aca2000.co.kr/"
 
-    if not cust_num:
-        cust_num = _get_secret("ACA2000_CUST_NUM", os.getenv("ACA2000_CUST_NUM", ""))
-    if not user_id:
-        user_id = _get_secret("ACA2000_USER_ID", os.getenv("ACA2000_USER_ID", ""))
-    if not user_pw:
-        user_pw = _get_secret("ACA2000_USER_PW", os.getenv("ACA2000_USER_PW", ""))
+def _wait_for_page_ready(driver, timeout=20):
+    """Wait until the document has loaded and no tracked requests are in flight."""
 
-    if not all([cust_num, user_id, user_pw]):
-        _notify_user(
-            "❌ ACA2000 credentials (CUST_NUM, USER_ID, USER_PW) must be set", "error"
-        )
-        return {}, None
+    def _idle(d):
+        state = d.execute_script(_NETWORK_STATE_SCRIPT)
+        return state["ready"] and state["pending"] == 0
 
-    # Create driver manually (not via context manager, so it stays alive)
-    options = webdriver.ChromeOptions()
-    if headless:
-        options.add_argument("--headless=new")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--disable-software-rasterizer")
-    options.add_argument("--disable-extensions")
-    options.add_argument("--disable-background-timer-throttling")
-    options.add_argument("--disable-backgrounding-occluded-windows")
-    options.add_argument("--disable-renderer-backgrounding")
-    options.add_argument("--disable-features=TranslateUI")
-    options.add_argument("--disable-ipc-flooding-protection")
-    # Use system chromedriver if available (Streamlit Cloud), otherwise use webdriver-manager
-    import shutil
+    WebDriverWait(driver, timeout, poll_frequency=0.1).until(_idle)
 
-    system_chromedriver = shutil.which("chromedriver")
-    if system_chromedriver:
-        driver = webdriver.Chrome(service=Service(system_chromedriver), options=options)
-    else:
-        driver = webdriver.Chrome(
-            service=Service(ChromeDriverManager().install()), options=options
-        )
 
-    # _make_driver_read_only(driver)
+def _run_and_wait_idle(driver, script, *args, timeout=20, grace=0.3):
+    """
+    Run an in-page action (e.g. selectClass) and return its result once the
+    requests it triggered have finished. If no request starts within `grace`
+    seconds the action is treated as synchronous and the wait ends immediately.
+    """
+    started_before = driver.execute_script(_NETWORK_TRACKER_SCRIPT)
+    result = driver.execute_script(script, *args)
+    deadline = time.monotonic() + grace
 
-    wait = WebDriverWait(driver, 20)
+    def _settled(d):
+        state = d.execute_script(_NETWORK_STATE_SCRIPT)
+        if state["pending"]:
+            return False
+        return state["started"] > started_before or time.monotonic() >= deadline
 
-    try:
-        # Step 1: Login
-        _notify_user("[ACA2000] Step 1: Logging in...", "info")
-        driver.get(aca2000_url)
+    WebDriverWait(driver, timeout, poll_frequency=0.1).until(_settled)
+    return result
 
-        cust_num_input = wait.until(EC.presence_of_element_located((By.ID, "custNum")))
-        driver.execute_script(
-            "arguments[0].value = arguments[1];", cust_num_input, cust_num
-        )
-        user_id_input = wait.until(EC.presence_of_element_located((By.ID, "userID")))
-        driver.execute_script(
-            "arguments[0].value = arguments[1];", user_id_input, user_id
-        )
-        user_pw_input = wait.until(EC.presence_of_element_located((By.ID, "userPW")))
-        driver.execute_script(
-            "arguments[0].value = arguments[1];", user_pw_input, user_pw
-        )
 
-        try:
-            login_btn = wait.until(
-                EC.element_to_be_clickable(
-                    (
-                        By.XPATH,
-                        "//button[contains(text(), '로그인')] | //input[@value='로그인'] | //button[@type='submit'] | //input[@type='submit']",
-                    )
-                )
-            )
-            login_btn.click()
-            _notify_user("[ACA2000] Login button clicked", "info")
-        except Exception:
-            try:
-                user_pw_input.submit()
-            except Exception:
-                from selenium.webdriver.common.keys import Keys
+def _wait_for_change(driver, read, before, timeout=10):
+    """Wait until read(driver) returns something other than `before`."""
+    WebDriverWait(driver, timeout, poll_frequency=0.1).until(
+        lambda d: read(d) != before
+    )
 
-                user_pw_input.send_keys(Keys.RETURN)
 
-        # Check for login errors
-        current_url = driver.current_url
-        _notify_user(
-            f"[ACA2000] Current URL after login attempt: {current_url}", "info"
-        )
-        if "/Account/Login" in current_url or "ReturnUrl" in current_url:
-            _notify_user(
-                "[ACA2000] ⚠️ Still on login page - checking for errors...", "warning"
-            )
-            try:
-                error_elements = driver.find_elements(
-                    By.CSS_SELECTOR,
-                    ".error, .alert, .warning, [class*='error'], [class*='alert']",
-                )
-                if error_elements:
-                    error_text = " ".join(
-                        [elem.text for elem in error_elements if elem.text]
-                    )
-                    _notify_user(
-                        f"[ACA2000] ⚠️ Login error detected: {error_text}", "error"
-                    )
-            except Exception:
-                pass
+# Local cache directory for persistent state (mail store, sessions, ...)
+CACHE_DIR = os.getenv("AUTOMATION_CACHE_DIR") or os.path.join(
+    os.path.expanduser("~"), ".academy_automation"
+)
 
-        # Wait for redirect to /Attend
-        try:
-            wait_redirect = WebDriverWait(driver, 10)
-            wait_redirect.until(
-                lambda d: "/Attend" in d.current_url
-                and "/Account/Login" not in d.current_url
-            )
-            _notify_user("[ACA2000] ✅ Login successful", "success")
-        except Exception:
-            current_url = driver.current_url
-            if "/Account/Login" in current_url or "ReturnUrl" in current_url:
-                _notify_user("[ACA2000] ❌ Login failed", "error")
-                driver.quit()
-                return {}, None
-            else:
-                try:
-                    driver.get(f"{aca2000_url.rstrip('/')}/Attend")
-                    wait.until(
-                        lambda d: "/Attend" in d.current_url
-                        and "/Account/Login" not in d.current_url
-                    )
-                except Exception:
-                    _notify_user("[ACA2000] ❌ Could not navigate to /Attend", "error")
-                    driver.quit()
-                    return {}, None
 
-        # Step 2: Navigate to 출석부
-        _notify_user("[ACA2000] Step 2: Navigating to 출석부...", "info")
-        try:
-            attend_link = wait.until(
-                EC.element_to_be_clickable(
-                    (
-                        By.CSS_SELECTOR,
-                        "a[href*='/Attend'], a[data-langnum='m3'], li[name='Attend'] a, .am3",
-                    )
-                )
-            )
-            attend_link.click()
-        except Exception:
-            if "/Attend" not in driver.current_url:
-                driver.get(f"{aca2000_url.rstrip('/')}/Attend")
+def _cache_path(filename):
+    """Return a path inside CACHE_DIR, creating the directory if needed."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    return os.path.join(CACHE_DIR, filename)
 
-        wait.until(
-            EC.presence_of_element_located(
-                (By.CSS_SELECTOR, ".attendL, .class-list, #반목록, .반목록")
-            )
-        )
-        _notify_user("[ACA2000] ✅ Navigated to 출석부", "success")
-        time.sleep(5)
-
-        # Step 3: Select latest Saturday date
-        _notify_user("[ACA2000] Step 3: Selecting latest Saturday date...", "info")
-        today = datetime.now()
-        days_since_saturday = (today.weekday() - 5) % 7
-        if days_since_saturday == 0 and today.weekday() != 5:
-            days_since_saturday = 7
-        latest_saturday = today - timedelta(days=days_since_saturday)
-        target_date = latest_saturday.strftime("%Y-%m-%d")
-        target_year = latest_saturday.year
-        target_month = latest_saturday.month
-        target_day = latest_saturday.day
-        _notify_user(
-            f"[ACA2000] Target date (the latest Saturday): {target_date}", "info"
-        )
 
+class SelectorRegistry:
+    """
+    Remembers which alternative of a fallback selector list last worked for
+    each (site, field), with hit/miss counts, persisted as JSON in CACHE_DIR.
+    ordered() tries the last winner first, then proven alternatives, then the
+    rest in their original order, so a stable layout pays for no misses.
+    Alternatives are CSS strings or (By, value) locator tuples.
+
+    Only for mutually exclusive alternatives (e.g. the ACA2000 출석부 link):
+    lists ordered from specific to broad, where a broad entry matches almost
+    anything, must keep their own order (see _find_first()).
+    """
+
+    def __init__(self, path=None):
+        self.path = path or _cache_path("selectors.json")
+        self._lock = threading.Lock()
+        self._dirty = False
         try:
-            # Try calendar popup
-            try:
-                date_input = driver.find_element(By.ID, "iDate")
-                date_input.click()
-                time.sleep(1)
-            except Exception:
-                pass
-            try:
-                calendar_btn = driver.find_element(
-                    By.CSS_SELECTOR, "img[src*='btn_calendar'], img[src*='calendar']"
-                )
-                driver.execute_script("arguments[0].click();", calendar_btn)
-                time.sleep(1)
-            except Exception:
-                pass
+            with open(self.path, encoding="utf-8") as f:
+                self._data = json.load(f)
+        except (OSError, ValueError):
+            self._data = {}
+
+    @staticmethod
+    def _key(candidate):
+        if isinstance(candidate, (tuple, list)):
+            return f"{candidate[0]}={candidate[1]}"
+        return candidate
+
+    def _entry(self, site, field_name):
+        return self._data.setdefault(site, {}).setdefault(
+            field_name, {"last": None, "stats": {}}
+        )
 
-            calendar_opened = False
+    def ordered(self, site, field_name, candidates):
+        """Return candidates reordered by past success."""
+        with self._lock:
+            entry = self._entry(site, field_name)
+            last, stats = entry["last"], entry["stats"]
+
+            def rank(item):
+                index, candidate = item
+                key = self._key(candidate)
+                hits = stats.get(key, [0, 0])[0]
+                return (key != last, -hits, index)
+
+            return [c for _, c in sorted(enumerate(candidates), key=rank)]
+
+    def record(self, site, field_name, winner, misses=()):
+        """Count a hit for winner and a miss for each alternative tried before it."""
+        with self._lock:
+            entry = self._entry(site, field_name)
+            stats = entry["stats"]
+            for candidate in misses:
+                stats.setdefault(self._key(candidate), [0, 0])[1] += 1
+            if winner is not None:
+                key = self._key(winner)
+                stats.setdefault(key, [0, 0])[0] += 1
+                entry["last"] = key
+            self._dirty = True
+
+    def save(self):
+        """Write the counts to disk if anything changed."""
+        with self._lock:
+            if not self._dirty:
+                return
+            tmp_path = f"{self.path}.tmp"
             try:
-                wait.until(
-                    EC.visibility_of_element_located(
-                        (
-                            By.CSS_SELECTOR,
-                            ".datepicker-dropdown, div.datepicker[style*='display: block']",
-                        )
-                    )
-                )
-                calendar_opened = True
-            except Exception:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(self._data, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_path, self.path)
+                self._dirty = False
+            except OSError:
                 pass
 
-            if calendar_opened:
-                # Navigate calendar to correct month
-                for _ in range(12):
-                    try:
-                        header = driver.find_element(
-                            By.CSS_SELECTOR, "th.datepicker-switch"
-                        ).text.strip()
-                        match = re.search(r"(\d{4})년\s*(\d{1,2})월", header)
-                        if match:
-                            cy, cm = int(match.group(1)), int(match.group(2))
-                            if cy == target_year and cm == target_month:
-                                break
-                            elif (cy < target_year) or (
-                                cy == target_year and cm < target_month
-                            ):
-                                driver.find_element(By.CSS_SELECTOR, "th.next").click()
-                            else:
-                                driver.find_element(By.CSS_SELECTOR, "th.prev").click()
-                            time.sleep(0.5)
-                        else:
-                            break
-                    except Exception:
-                        break
-                # Click target day (exclude old/new month days)
-                try:
-                    date_cell = wait.until(
-                        EC.element_to_be_clickable(
-                            (
-                                By.XPATH,
-                                f"//td[contains(@class, 'day') and not(contains(@class, 'disabled')) and not(contains(@class, 'old')) and not(contains(@class, 'new'))]//div[text()='{target_day}']",
-                            )
-                        )
-                    )
-                    date_cell.click()
-                    time.sleep(2)
-                    _notify_user(
-                        f"[ACA2000] ✅ Selected date: {target_date}", "success"
-                    )
-                except Exception as e:
-                    _notify_user(
-                        f"[ACA2000] ⚠️ Could not select date: {type(e).__name__}",
-                        "warning",
-                    )
-            else:
-                # Arrow button navigation
-                for _ in range(30):
-                    try:
-                        current_date_str = (
-                            driver.find_element(By.ID, "iDate").get_attribute("value")
-                            or ""
-                        ).strip()
-                        if current_date_str == target_date:
-                            _notify_user(
-                                f"[ACA2000] ✅ Reached target date: {target_date}",
-                                "success",
-                            )
-                            break
-                        current = datetime.strptime(current_date_str, "%Y-%m-%d")
-                        target = datetime.strptime(target_date, "%Y-%m-%d")
-                        if current < target:
-                            driver.find_element(
-                                By.XPATH,
-                                "//a[contains(@onclick, 'nextDay')] | //a[contains(., '▶')]",
-                            ).click()
-                        else:
-                            driver.find_element(
-                                By.XPATH,
-                                "//a[contains(@onclick, 'prevDay')] | //a[contains(., '◀')]",
-                            ).click()
-                        time.sleep(0.5)
-                    except Exception:
-                        break
-        except Exception as e:
-            _notify_user(f"[ACA2000] ⚠️ Could not select date: {e}", "warning")
 
-        # Step 4: Get class list
-        _notify_user("[ACA2000] Step 4: Fetching class list...", "info")
-        class_info = {}
-        try:
-            wait.until(
-                EC.presence_of_element_located(
-                    (
-                        By.CSS_SELECTOR,
-                        ".반목록, #반목록, .class-list, .depth1, li.depth1",
-                    )
-                )
-            )
-            class_elements = driver.find_elements(
-                By.CSS_SELECTOR, "a[onclick*='selectClass']"
-            )
-            for elem in class_elements:
-                try:
-                    class_name = elem.text.strip()
-                    onclick_attr = elem.get_attribute("onclick")
-                    if onclick_attr and "selectClass" in onclick_attr:
-                        match = re.search(r"selectClass\((\d+)\)", onclick_attr)
-                        if match:
-                            class_id = match.group(1)
-                            if class_name and class_name not in class_info:
-                                class_info[class_name] = class_id
-                except Exception:
+_selector_registry = None
+
+
+def _selectors():
+    """The process-wide SelectorRegistry, loaded on first use."""
+    global _selector_registry
+    if _selector_registry is None:
+        _selector_registry = SelectorRegistry()
+    return _selector_registry
+
+
+def _find_first(driver, locators, timeout=10, clickable=False):
+    """
+    Wait for the first of several alternative (By, value) locators to match,
+    trying them in the given order. Returns (index, element), or None if
+    none matched within timeout.
+    """
+
+    def _match(d):
+        for index, locator in enumerate(locators):
+            for element in d.find_elements(*locator):
+                if clickable and not (element.is_displayed() and element.is_enabled()):
                     continue
-            _notify_user(
-                f"[ACA2000] ✅ Found {len(class_info)} classes from date {target_date}",
-                "success",
-            )
-        except Exception as e:
-            _notify_user(f"[ACA2000] ⚠️ Could not find class list: {e}", "warning")
+                return index, element
+        return False
 
-        if not class_info:
-            driver.quit()
-            return {}, None
+    try:
+        return WebDriverWait(driver, timeout, poll_frequency=0.2).until(_match)
+    except TimeoutException:
+        return None
 
-        # Return class list and keep driver alive
-        return class_info, driver
 
-    except Exception as e:
-        _notify_user(f"[ACA2000] ❌ Error: {e}", "error")
-        driver.quit()
-        return {}, None
+def _find_learned(driver, site, field_name, locators, timeout=10, clickable=False):
+    """
+    Like _find_first(), trying the locators in learned order and recording
+    which one won. Returns the element, or None if none matched within timeout.
+    """
+    registry = _selectors()
+    ordered = registry.ordered(site, field_name, locators)
+    found = _find_first(driver, ordered, timeout=timeout, clickable=clickable)
+    if found is None:
+        registry.record(site, field_name, None, ordered)
+        return None
+    index, element = found
+    registry.record(site, field_name, ordered[index], ordered[:index])
+    return element
 
 
-def get_students_for_classes(driver, class_ids):
+@dataclass(slots=True)
+class EmailRecord:
+    """
+    One fetched mail. mail_id is the web "mail-NNNNN" class id or "uid:NNN"
+    for IMAP; it is None when the list row had no id. sender_name is the
+    display name shown next to the address, when the source has one.
     """
-    Fetches student lists for selected classes using an existing driver.
-    Quits the driver when done.
 
-    Args:
-        driver: Live WebDriver from get_class_list_from_aca2000()
-        class_ids: {class_name: class_id} for selected classes only
+    sender: str
+    subject: str
+    content: str = ""
+    attachments: list = field(default_factory=list)
+    mail_id: str | None = None
+    mail_date: date | None = None
+    sender_name: str = ""
 
-    Returns:
-        dict: {class_name: [student_names]}
+
+class EmailIndex:
+    """
+    Insertion-ordered EmailRecords keyed by mail id, with a set-based
+    (sender, subject) index so duplicate checks are O(1) instead of a scan.
     """
-    all_students = {}
-    wait = WebDriverWait(driver, 20)
 
-    try:
-        for class_name, class_id in class_ids.items():
-            try:
-                _notify_user(
-                    f"[ACA2000] Processing class: {class_name} (ID: {class_id})...",
-                    "info",
-                )
-                driver.execute_script(f"selectClass({class_id});")
-                time.sleep(2)
+    def __init__(self):
+        self._by_id = {}
+        self._keys = set()
+        self._records = []
+
+    def add(self, record):
+        """Add record unless its mail id or (sender, subject) is known. Returns True if added."""
+        key = (record.sender, record.subject)
+        if key in self._keys or (record.mail_id and record.mail_id in self._by_id):
+            return False
+        self._keys.add(key)
+        if record.mail_id:
+            self._by_id[record.mail_id] = record
+        self._records.append(record)
+        return True
+
+    def get(self, mail_id):
+        return self._by_id.get(mail_id)
+
+    def seen(self, sender, subject):
+        """True if a record with this (sender, subject) was already added."""
+        return (sender, subject) in self._keys
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def __len__(self):
+        return len(self._records)
+
+
+# Roster tokens that are class/status labels rather than student names
+ROSTER_STOP_WORDS = {
+    "대기",
+    "휴강",
+    "신규",
+    "월",
+    "화",
+    "수",
+    "목",
+    "금",
+    "토",
+    "일",
+    "월금",
+    "화목",
+}
+ROSTER_STATUS_TAGS = {"대기", "휴강", "신규"}
+
+
+@dataclass(slots=True, frozen=True)
+class RosterEntry:
+    """
+    A roster line from ACA2000, parsed once: the raw text, the Korean name
+    (2-3 syllables, None if not found) and status tags such as 대기/신규.
+    detail_id is the student's showDetail() id and status the attendance
+    button that is switched on (e.g. 출석), when read from the attendance page.
+    str() gives the raw text so UIs can print entries unchanged.
+    """
 
-                try:
-                    wait.until(
-                        EC.presence_of_element_located(
-                            (By.CSS_SELECTOR, "span.name[onclick*='showDetail']")
-                        )
-                    )
-                    student_name_elements = driver.find_elements(
-                        By.CSS_SELECTOR, "span.name[onclick*='showDetail']"
-                    )
+    raw: str
+    name: str | None
+    tags: frozenset = frozenset()
+    detail_id: str | None = None
+    status: str | None = None
+
+    @classmethod
+    def parse(cls, raw, detail_id=None, status=None):
+        tokens = re.findall(r"[가-힣]+", raw)
+        names = [t for t in tokens if 2 <= len(t) <= 3 and t not in ROSTER_STOP_WORDS]
+        return cls(
+            raw=raw,
+            name=names[0] if names else None,
+            tags=frozenset(t for t in tokens if t in ROSTER_STATUS_TAGS),
+            detail_id=detail_id,
+            status=status,
+        )
 
-                    students = []
-                    for student_elem in student_name_elements:
-                        student_name = student_elem.text.strip()
-                        if not student_name:
-                            continue
-                        try:
-                            parent_row = student_elem.find_element(
-                                By.XPATH,
-                                "./ancestor::tr | ./ancestor::div[contains(@class, 'row')]",
-                            )
-                            attended_buttons = parent_row.find_elements(
-                                By.CSS_SELECTOR,
-                                "button.att_btn.on01s[value='출석'], button.on01s[value='출석']",
-                            )
-                            if attended_buttons:
-                                if student_name not in students:
-                                    students.append(student_name)
-                                    _notify_user(
-                                        f"[ACA2000]   ✓ {student_name} - 출석", "info"
-                                    )
-                            else:
-                                _notify_user(
-                                    f"[ACA2000]   ✗ {student_name} - not attended",
-                                    "info",
-                                )
-                        except Exception:
-                            continue
+    def __str__(self):
+        return self.raw
 
-                    all_students[class_name] = students
-                    _notify_user(
-                        f"[ACA2000] ✅ Found {len(students)} attended students in {class_name}",
-                        "success",
-                    )
 
-                except Exception as e:
-                    _notify_user(
-                        f"[ACA2000] ⚠️ Error extracting students for {class_name}: {e}",
-                        "warning",
-                    )
-                    all_students[class_name] = []
+def _hangul_name_candidates(text):
+    """
+    Every 2-3 syllable substring of each Hangul run in text. A Korean name
+    occurs in text exactly when it is in this set, so matching becomes a set
+    lookup and costs O(len(text)) instead of O(names x len(text)).
+    """
+    candidates = set()
+    text = unicodedata.normalize("NFC", text)
+    for run in re.findall(r"[가-힣]+", text):
+        for size in (2, 3):
+            for i in range(len(run) - size + 1):
+                candidates.add(run[i : i + size])
+    return candidates
+
+
+# Longest mail body (in characters) kept for matching and caching
+MAX_SCANNED_BODY_CHARS = 4000
+
+# Start of quoted or forwarded history inside a body. A "From:" line only
+# counts when more header lines follow it, and a "... 작성:" reply line only
+# when it carries an address, so a signed line such as "From: 이영희" is kept
+_QUOTE_MARKER_RE = re.compile(
+    r"^[ \t]*(?:-{2,}[ \t]*(?:Original Message|Forwarded message|원본 메일|전달된 메일)"
+    r"|(?:From|보낸[ \t]*사람)[ \t]*:[^\n]*"
+    r"(?:\n[ \t]*(?:Sent|Date|To|Cc|Subject|보낸[ \t]*날짜|받는[ \t]*사람|참조|날짜|제목)"
+    r"[ \t]*:[^\n]*){2}"
+    r"|On .{0,200}wrote:[ \t]*$"
+    r"|.{0,100}@.{0,100}작성:[ \t]*$)",
+    re.IGNORECASE | re.MULTILINE,
+)
+# Whole-line boilerplate: signatures of known mail apps and devices only
+_SIGNATURE_SOURCE = (
+    r"(?:iPhone|iPad|Galaxy|갤럭시|Samsung|삼성|Android|안드로이드|Outlook"
+    r"|네이버[ \t]*메일|Naver[ \t]*Mail)"
+)
+_BOILERPLATE_RE = re.compile(
+    r"^[ \t]*(?:Sent from (?:my )?" + _SIGNATURE_SOURCE + r"[^\n가-힣]{0,40}"
+    r"|" + _SIGNATURE_SOURCE + r"[^\n가-힣]{0,20}(?:앱|스마트폰|폰)?에서[ \t]*"
+    r"보(?:냄|낸[ \t]*메일|냈습니다)[.!]?)[ \t]*$",
+    re.IGNORECASE | re.MULTILINE,
+)
+_SUBSTANTIVE_RE = re.compile(r"\w{2,}")
+
+
+def _reduce_body(text, limit=MAX_SCANNED_BODY_CHARS):
+    """
+    Reduce a mail body to the part worth scanning: NFC-normalized, without
+    device signatures, quoted ("> ...") lines or forwarded/replied history,
+    capped at limit characters. Quoted history is only cut when the sender
+    wrote something before it, so a bare forward keeps the forwarded text.
+    """
+    text = unicodedata.normalize("NFC", text or "")
+    text = _BOILERPLATE_RE.sub("", text)
+    marker = _QUOTE_MARKER_RE.search(text)
+    if marker and _SUBSTANTIVE_RE.search(text[: marker.start()]):
+        text = text[: marker.start()]
+    lines = [line.strip() for line in text.splitlines()]
+    lines = [line for line in lines if line]
+    unquoted = [line for line in lines if not line.startswith(">")]
+    if any(_SUBSTANTIVE_RE.search(line) for line in unquoted):
+        lines = unquoted
+    return "\n".join(lines)[:limit]
+
+
+def normalize_email(record):
+    """
+    Normalization stage between fetching and matching: NFC for all text
+    (macOS sends NFD Hangul filenames) and a reduced body. Returns record.
+    """
+    record.sender_name = unicodedata.normalize("NFC", record.sender_name or "")
+    record.subject = unicodedata.normalize("NFC", record.subject or "")
+    record.attachments = [unicodedata.normalize("NFC", a) for a in record.attachments]
+    record.content = _reduce_body(record.content)
+    return record
 
-            except Exception as e:
-                _notify_user(
-                    f"[ACA2000] ⚠️ Error processing class {class_name}: {e}", "warning"
-                )
-                all_students[class_name] = []
 
-        _notify_user(
-            f"[ACA2000] ✅ Completed! Processed {len(all_students)} classes", "success"
+def _mentions_outstanding(outstanding, *texts):
+    """True if any of texts contains a name from the outstanding set."""
+    if not outstanding:
+        return False
+    return bool(_hangul_name_candidates(" ".join(t for t in texts if t)) & outstanding)
+
+
+class MailStore:
+    """
+    SQLite cache of already-ingested mails plus a per-account sync watermark.
+
+    Mails are keyed by (account, mail_key) where mail_key is the Naver web
+    "mail-NNNNN" class id or "uid:NNN" for IMAP. The watermark (last_uid,
+    covered_from) records that every unread mail from covered_from up to
+    last_uid has been ingested, so later runs only need newer mails.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or _cache_path("mail_store.sqlite3")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS mails (
+                account TEXT NOT NULL,
+                mail_key TEXT NOT NULL,
+                mail_date TEXT,
+                sender TEXT,
+                subject TEXT,
+                content TEXT,
+                attachments TEXT,
+                fetched_at TEXT,
+                sender_name TEXT,
+                PRIMARY KEY (account, mail_key)
+            );
+            CREATE INDEX IF NOT EXISTS mails_by_date ON mails (account, mail_date);
+            CREATE TABLE IF NOT EXISTS sync_state (
+                account TEXT PRIMARY KEY,
+                uidvalidity TEXT,
+                last_uid INTEGER,
+                covered_from TEXT
+            );
+            """
+        )
+        # Stores created before sender_name was kept lack the column
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(mails)")}
+        if "sender_name" not in columns:
+            with self._conn:
+                self._conn.execute("ALTER TABLE mails ADD COLUMN sender_name TEXT")
+
+    _COLUMNS = "mail_key, mail_date, sender, subject, content, attachments, sender_name"
+
+    @staticmethod
+    def _row_to_record(row):
+        return EmailRecord(
+            mail_id=row[0],
+            mail_date=date.fromisoformat(row[1]) if row[1] else None,
+            sender=row[2],
+            subject=row[3],
+            content=row[4],
+            attachments=json.loads(row[5] or "[]"),
+            sender_name=row[6] or "",
         )
 
-    finally:
-        try:
-            driver.quit()
-        except Exception:
-            pass
+    def get(self, account, mail_key):
+        """Return the cached EmailRecord for mail_key, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {self._COLUMNS} FROM mails "
+                "WHERE account = ? AND mail_key = ?",
+                (account, mail_key),
+            ).fetchone()
+        return self._row_to_record(row) if row else None
+
+    def put(self, account, record):
+        """Insert or replace one parsed EmailRecord (keyed by record.mail_id)."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO mails (account, mail_key, mail_date, sender, "
+                "subject, content, attachments, fetched_at, sender_name) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    account,
+                    record.mail_id,
+                    record.mail_date.isoformat() if record.mail_date else None,
+                    record.sender,
+                    record.subject,
+                    record.content,
+                    json.dumps(record.attachments, ensure_ascii=False),
+                    datetime.now().isoformat(timespec="seconds"),
+                    record.sender_name,
+                ),
+            )
 
-    return all_students
+    def in_range(self, account, start_date, end_date):
+        """Return cached EmailRecords dated within [start_date, end_date], newest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {self._COLUMNS} FROM mails "
+                "WHERE account = ? AND mail_date BETWEEN ? AND ? "
+                "ORDER BY mail_date DESC, mail_key DESC",
+                (account, start_date.isoformat(), end_date.isoformat()),
+            ).fetchall()
+        return [self._row_to_record(row) for row in rows]
+
+    def get_sync_state(self, account):
+        """Return {"uidvalidity", "last_uid", "covered_from"} or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT uidvalidity, last_uid, covered_from FROM sync_state "
+                "WHERE account = ?",
+                (account,),
+            ).fetchone()
+        if not row:
+            return None
+        return {
+            "uidvalidity": row[0],
+            "last_uid": row[1],
+            "covered_from": datetime.strptime(row[2], "%Y-%m-%d").date(),
+        }
+
+    def set_sync_state(self, account, uidvalidity, last_uid, covered_from):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?, ?)",
+                (account, uidvalidity, last_uid, covered_from.isoformat()),
+            )
 
+    def close(self):
+        with self._lock:
+            self._conn.close()
 
-def find_missing_students(student_dict, emails):
+
+class Aca2000Cache:
     """
-    Compare ACA2000 student names against fetched email data.
+    SQLite cache of ACA2000 class lists (per account, for the default date
+    only: the list depends on the date) and attended-student rosters (per
+    class id and attendance date), each with a TTL.
 
-    Args:
-        student_dict: {class_name: [student_entry, ...]} from get_students_from_aca2000()
-        emails: list of dicts with keys: sender, subject, content, attachments
+    A class list is revalidated by its fingerprint (the set of class link
+    names and ids); when it changes, cached rosters of classes that were
+    renamed or removed are dropped so only those are scraped again.
 
-    Returns:
-        dict: {class_name: {'matched': [(student_entry, email_subject), ...],
-                            'missing': [student_entry, ...]}}
+    Rosters dated today or later are never cached: attendance is still
+    being taken, so a student marked present after the first read would be
+    missing from a cached copy.
     """
-    import re
-
-    STOP_WORDS = {
-        "대기",
-        "휴강",
-        "신규",
-        "월",
-        "화",
-        "수",
-        "목",
-        "금",
-        "토",
-        "일",
-        "월금",
-        "화목",
-    }
 
-    def extract_korean_name(entry):
-        matches = re.findall(r"[가-힣]+", entry)
-        names = [m for m in matches if 2 <= len(m) <= 3 and m not in STOP_WORDS]
-        return names[0] if names else None
-
-    # Build searchable text per email
-    email_texts = []
-    for e in emails:
-        combined = f"{e['subject']} {e['content']} {' '.join(e['attachments'])}"
-        email_texts.append((combined, e["subject"]))
-
-    results = {}
-    for class_name, students in student_dict.items():
-        matched = []
-        missing = []
-        for student_entry in students:
-            name = extract_korean_name(student_entry)
-            if not name:
-                missing.append(student_entry)
-                continue
-            found_subject = None
-            for text, subject in email_texts:
-                if name in text:
-                    found_subject = subject
-                    break
-            if found_subject:
-                matched.append((student_entry, found_subject))
-            else:
-                missing.append(student_entry)
-        results[class_name] = {"matched": matched, "missing": missing}
+    CLASS_LIST_TTL = timedelta(days=7)
+    ROSTER_TTL = timedelta(hours=12)
+
+    def __init__(self, path=None):
+        self.path = path or _cache_path("aca2000_cache.sqlite3")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS class_lists (
+                account TEXT PRIMARY KEY,
+                class_info TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                fetched_at TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS rosters (
+                class_id TEXT NOT NULL,
+                roster_date TEXT NOT NULL,
+                students TEXT NOT NULL,
+                fetched_at TEXT NOT NULL,
+                PRIMARY KEY (class_id, roster_date)
+            );
+            CREATE TABLE IF NOT EXISTS selections (
+                account TEXT PRIMARY KEY,
+                class_names TEXT NOT NULL
+            );
+            """
+        )
+
+    @staticmethod
+    def fingerprint(class_info):
+        """Stable digest of a {class_name: class_id} dict."""
+        payload = json.dumps(sorted(class_info.items()), ensure_ascii=False)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _fresh(fetched_at, ttl):
+        return datetime.now() - datetime.fromisoformat(fetched_at) <= ttl
+
+    @staticmethod
+    def _settled(roster_date):
+        """True if attendance for roster_date ("YYYY-MM-DD") can no longer change."""
+        return roster_date < datetime.now().date().isoformat()
+
+    def get_class_info(self, account, max_age=None):
+        """Return the cached {class_name: class_id} if younger than max_age, else None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT class_info, fetched_at FROM class_lists WHERE account = ?",
+                (account,),
+            ).fetchone()
+        if not row or not self._fresh(row[1], max_age or self.CLASS_LIST_TTL):
+            return None
+        return json.loads(row[0])
+
+    def put_class_info(self, account, class_info):
+        """
+        Store a freshly scraped class list. Returns True if it differs from
+        the cached one, in which case rosters of changed classes are dropped.
+        """
+        fingerprint = self.fingerprint(class_info)
+        now = datetime.now().isoformat(timespec="seconds")
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT class_info, fingerprint FROM class_lists WHERE account = ?",
+                (account,),
+            ).fetchone()
+            changed = not row or row[1] != fingerprint
+            if row and changed:
+                old = json.loads(row[0])
+                kept = set(class_info.items())
+                for name, class_id in old.items():
+                    if (name, class_id) not in kept:
+                        self._conn.execute(
+                            "DELETE FROM rosters WHERE class_id = ?", (class_id,)
+                        )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO class_lists VALUES (?, ?, ?, ?)",
+                (account, json.dumps(class_info, ensure_ascii=False), fingerprint, now),
+            )
+        return changed
+
+    def get_roster(self, class_id, roster_date):
+        """Return the cached [RosterEntry] for (class_id, roster_date) within the TTL, or None."""
+        if not self._settled(roster_date):
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT students, fetched_at FROM rosters "
+                "WHERE class_id = ? AND roster_date = ?",
+                (str(class_id), roster_date),
+            ).fetchone()
+        if not row or not self._fresh(row[1], self.ROSTER_TTL):
+            return None
+        return [
+            RosterEntry.parse(s["raw"], detail_id=s["detail_id"], status=s["status"])
+            for s in json.loads(row[0])
+        ]
+
+    def put_roster(self, class_id, roster_date, students):
+        """Cache a roster read for a past date (rosters for today or later are not kept)."""
+        if not self._settled(roster_date):
+            return
+        students = [
+            {"raw": e.raw, "detail_id": e.detail_id, "status": e.status}
+            for e in students
+        ]
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO rosters VALUES (?, ?, ?, ?)",
+                (
+                    str(class_id),
+                    roster_date,
+                    json.dumps(students, ensure_ascii=False),
+                    datetime.now().isoformat(timespec="seconds"),
+                ),
+            )
+
+    def get_selection(self, account):
+        """Class names the user selected last time, or []."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT class_names FROM selections WHERE account = ?", (account,)
+            ).fetchone()
+        return json.loads(row[0]) if row else []
+
+    def put_selection(self, account, class_names):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO selections VALUES (?, ?)",
+                (account, json.dumps(list(class_names), ensure_ascii=False)),
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _aca2000_account(cust_num=None, user_id=None):
+    """Cache key of an ACA2000 login, resolving credentials like the scrapers do."""
+    cust_num = cust_num or _get_secret(
+        "ACA2000_CUST_NUM", os.getenv("ACA2000_CUST_NUM", "")
+    )
+    user_id = user_id or _get_secret("ACA2000_USER_ID", os.getenv("ACA2000_USER_ID", ""))
+    return f"{cust_num}:{user_id}"
+
+
+def load_cached_class_list(cust_num=None, user_id=None):
+    """
+    Class list from the last successful get_class_list_from_aca2000() for this
+    login, if still within its TTL, so a UI can show the picker instantly while
+    the live fetch revalidates it. Returns {class_name: class_id} or None.
+    """
+    cache = Aca2000Cache()
+    try:
+        return cache.get_class_info(_aca2000_account(cust_num, user_id))
+    finally:
+        cache.close()
+
+
+def remember_class_selection(class_names, cust_num=None, user_id=None):
+    """Store the classes the user just selected (see last_class_selection())."""
+    cache = Aca2000Cache()
+    try:
+        cache.put_selection(_aca2000_account(cust_num, user_id), class_names)
+    finally:
+        cache.close()
+
+
+def last_class_selection(cust_num=None, user_id=None):
+    """Class names selected on the previous run, for speculative roster prefetch."""
+    cache = Aca2000Cache()
+    try:
+        return cache.get_selection(_aca2000_account(cust_num, user_id))
+    finally:
+        cache.close()
+
+
+class SenderDirectory:
+    """
+    Persistent sender address -> student directory learned from past matches.
+
+    Every mail whose text names roster students adds a confirmation for each
+    of them; a sender confirmed at least SENDER_MIN_CONFIRMATIONS times for
+    exactly one student is matched to that student from the sender alone.
+    Mails naming nobody are only counted (senders.unmatched): they are
+    matched against the selected classes' rosters, not every student, so
+    they never mark a sender as unrelated.
+    """
+
+    SENDER_MIN_CONFIRMATIONS = 2
+
+    def __init__(self, path=None):
+        self.path = path or _cache_path("sender_directory.sqlite3")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS senders (
+                sender TEXT PRIMARY KEY,
+                matched INTEGER NOT NULL DEFAULT 0,
+                unmatched INTEGER NOT NULL DEFAULT 0,
+                updated_at TEXT
+            );
+            CREATE TABLE IF NOT EXISTS sender_students (
+                sender TEXT NOT NULL,
+                student TEXT NOT NULL,
+                confirmations INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (sender, student)
+            );
+            """
+        )
+
+    @staticmethod
+    def _normalize(sender):
+        return (sender or "").strip().lower()
+
+    def student_for(self, sender):
+        """Return the one student name this sender is known for, or None."""
+        sender = self._normalize(sender)
+        if not sender:
+            return None
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT student, confirmations FROM sender_students WHERE sender = ?",
+                (sender,),
+            ).fetchall()
+        if len(rows) != 1 or rows[0][1] < self.SENDER_MIN_CONFIRMATIONS:
+            return None
+        return rows[0][0]
+
+    def learn(self, sender, student_names):
+        """Record one scanned mail from sender naming student_names (may be empty)."""
+        sender = self._normalize(sender)
+        if not sender or sender == "unknown":
+            return
+        column = "matched" if student_names else "unmatched"
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO senders (sender) VALUES (?)", (sender,)
+            )
+            self._conn.execute(
+                f"UPDATE senders SET {column} = {column} + 1, updated_at = ? "
+                "WHERE sender = ?",
+                (datetime.now().isoformat(timespec="seconds"), sender),
+            )
+            for name in student_names:
+                self._conn.execute(
+                    "INSERT INTO sender_students VALUES (?, ?, 1) "
+                    "ON CONFLICT (sender, student) "
+                    "DO UPDATE SET confirmations = confirmations + 1",
+                    (sender, name),
+                )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _session_profile_name(site, account):
+    """Profile directory name for one login: another account never sees its cookies."""
+    digest = hashlib.sha256((account or "").encode()).hexdigest()[:16]
+    return f"{site}-{digest}"
+
+
+def _add_session_profile(options, site, account):
+    """
+    Point Chrome at a persistent per-site, per-account profile under
+    CACHE_DIR so login cookies survive between runs. Keying by account means
+    a changed NAVER_ID / ACA2000 login (or another teacher on the same
+    machine) starts logged out instead of reusing someone else's session.
+    Chrome encrypts cookie values on disk with the OS keystore (Keychain /
+    DPAPI), and restore_on_startup=1 keeps session-only cookies across
+    restarts as well.
+    """
+    profile_dir = _cache_path(
+        os.path.join("chrome_profiles", _session_profile_name(site, account))
+    )
+    options.add_argument(f"--user-data-dir={profile_dir}")
+    options.add_experimental_option("prefs", {"session.restore_on_startup": 1})
+
+
+# What a call on a crashed browser raises: chromedriver's own errors, or
+# connection errors once the chromedriver process itself is gone
+DRIVER_ERRORS = (WebDriverException, urllib3.exceptions.HTTPError, OSError)
+
+
+class DriverPool:
+    """
+    Keeps warm Chrome WebDrivers between runs so each run does not pay a
+    cold browser start (and a fresh login) per site.
+
+    Drivers are pooled by key, e.g. ("naver", account, headless,
+    reuse_session); a key must describe everything the driver was created
+    with, including the account whose session it holds, since drivers
+    with a persistent profile (see _add_session_profile) cannot run twice at
+    once. checkout() hands out an idle driver that passes a health check or
+    starts a new one; checkin() returns it, and drivers older than MAX_AGE or
+    idle for longer than MAX_IDLE are quit. Drivers not started by the pool
+    are simply quit on checkin().
+    """
+
+    MAX_AGE = timedelta(hours=2)
+    MAX_IDLE = timedelta(minutes=15)
+
+    def __init__(self, max_age=None, max_idle=None):
+        self.max_age = max_age or self.MAX_AGE
+        self.max_idle = max_idle or self.MAX_IDLE
+        self._lock = threading.Lock()
+        self._idle = {}  # key -> [(driver, returned_at)]
+        self._born = {}  # driver -> (key, created_at), for every pooled driver
+        self._reaper = None
+
+    def checkout(self, key, factory):
+        """
+        Borrow a driver for key, warm if possible.
+
+        Args:
+            key: hashable description of how factory configures the driver
+            factory: callable creating a new driver when none is idle
+        Returns:
+            WebDriver: to be given back with checkin()
+        """
+        self.evict()
+        while True:
+            with self._lock:
+                idle = self._idle.get(key)
+                if not idle:
+                    break
+                driver, _ = idle.pop()
+            if self._healthy(driver):
+                return driver
+            self._quit(driver)
+        driver = factory()
+        with self._lock:
+            self._born[driver] = (key, datetime.now())
+        self._start_reaper()
+        return driver
+
+    def checkin(self, driver):
+        """Give a borrowed driver back; quit it if unhealthy, too old or unknown."""
+        if driver is None:
+            return
+        with self._lock:
+            born = self._born.get(driver)
+        if born is None or datetime.now() - born[1] > self.max_age:
+            self._quit(driver)
+            return
+        if not self._reset(driver):
+            self._quit(driver)
+            return
+        with self._lock:
+            self._idle.setdefault(born[0], []).append((driver, datetime.now()))
+
+    def discard(self, driver):
+        """Quit a borrowed driver instead of returning it (e.g. after a crash)."""
+        if driver is not None:
+            self._quit(driver)
+
+    def evict(self):
+        """Quit idle drivers past MAX_IDLE or MAX_AGE."""
+        now = datetime.now()
+        expired = []
+        with self._lock:
+            for key, idle in self._idle.items():
+                keep = []
+                for driver, returned_at in idle:
+                    born = self._born.get(driver, (key, returned_at))[1]
+                    if now - returned_at > self.max_idle or now - born > self.max_age:
+                        expired.append(driver)
+                    else:
+                        keep.append((driver, returned_at))
+                idle[:] = keep
+        for driver in expired:
+            self._quit(driver)
+
+    def close(self):
+        """Quit every idle driver (borrowed ones are quit on checkin)."""
+        with self._lock:
+            drivers = [driver for idle in self._idle.values() for driver, _ in idle]
+            self._idle.clear()
+        for driver in drivers:
+            self._quit(driver)
+
+    def _start_reaper(self):
+        # Idle drivers are evicted even when nothing is borrowed any more
+        with self._lock:
+            if self._reaper is not None:
+                return
+            self._reaper = threading.Thread(target=self._reap, daemon=True)
+        self._reaper.start()
+
+    def _reap(self):
+        interval = max(self.max_idle.total_seconds() / 4, 1)
+        while True:
+            time.sleep(interval)
+            self.evict()
+
+    @staticmethod
+    def _healthy(driver):
+        try:
+            driver.execute_script("return document.readyState")
+            return True
+        except DRIVER_ERRORS:
+            return False
+
+    @staticmethod
+    def _reset(driver):
+        # Close tabs opened during the run (e.g. Naver page prefetch)
+        try:
+            handles = driver.window_handles
+            for handle in handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(handles[0])
+            driver.execute_script("return document.readyState")
+            return True
+        except DRIVER_ERRORS:
+            return False
+
+    def _quit(self, driver):
+        with self._lock:
+            self._born.pop(driver, None)
+        try:
+            driver.quit()
+        except DRIVER_ERRORS:
+            pass
+
+
+_driver_pool = None
+
+
+def driver_pool():
+    """The process-wide DriverPool, created on first use and closed at exit."""
+    global _driver_pool
+    if _driver_pool is None:
+        _driver_pool = DriverPool()
+        atexit.register(_driver_pool.close)
+    return _driver_pool
+
+
+def release_driver(driver):
+    """Return a driver from this module to the pool (quits drivers it does not own)."""
+    driver_pool().checkin(driver)
+
+
+def _aca2000_session_valid(driver, aca2000_url):
+    """
+    Cheap validity probe for a saved ACA2000 session: load /Attend and check
+    that we are not redirected to the login page.
+    """
+    try:
+        driver.get(f"{aca2000_url.rstrip('/')}/Attend")
+        WebDriverWait(driver, 10).until(
+            lambda d: d.execute_script("return document.readyState") == "complete"
+        )
+        url = driver.current_url
+        return "/Attend" in url and "/Account/Login" not in url and "ReturnUrl" not in url
+    except DRIVER_ERRORS:
+        return False
+
+
+# Tried in this order: the submit-button fallbacks would also match other
+# buttons, so they must never be learned ahead of the 로그인 ones
+ACA2000_LOGIN_BUTTON_LOCATORS = [
+    (By.XPATH, "//button[contains(text(), '로그인')]"),
+    (By.XPATH, "//input[@value='로그인']"),
+    (By.XPATH, "//button[@type='submit']"),
+    (By.XPATH, "//input[@type='submit']"),
+]
+# Alternatives tried in learned order (see SelectorRegistry)
+ACA2000_ATTEND_LINK_LOCATORS = [
+    (By.CSS_SELECTOR, "a[href*='/Attend']"),
+    (By.CSS_SELECTOR, "a[data-langnum='m3']"),
+    (By.CSS_SELECTOR, "li[name='Attend'] a"),
+    (By.CSS_SELECTOR, ".am3"),
+]
+
+
+def _login_aca2000(driver, wait, aca2000_url, cust_num, user_id, user_pw):
+    """
+    Runs the interactive ACA2000 credential login and waits for /Attend.
+    Returns True on success, False otherwise (the caller quits the driver).
+    """
+    driver.get(aca2000_url)
+
+    cust_num_input = wait.until(EC.presence_of_element_located((By.ID, "custNum")))
+    driver.execute_script(
+        "arguments[0].value = arguments[1];", cust_num_input, cust_num
+    )
+    user_id_input = wait.until(EC.presence_of_element_located((By.ID, "userID")))
+    driver.execute_script(
+        "arguments[0].value = arguments[1];", user_id_input, user_id
+    )
+    user_pw_input = wait.until(EC.presence_of_element_located((By.ID, "userPW")))
+    driver.execute_script(
+        "arguments[0].value = arguments[1];", user_pw_input, user_pw
+    )
+
+    try:
+        _, login_btn = _find_first(
+            driver, ACA2000_LOGIN_BUTTON_LOCATORS, clickable=True
+        )
+        login_btn.click()
+        _notify_user("[ACA2000] Login button clicked", "info")
+    except Exception:
+        try:
+            user_pw_input.submit()
+        except Exception:
+            from selenium.webdriver.common.keys import Keys
+
+            user_pw_input.send_keys(Keys.RETURN)
+
+    # Check for login errors
+    current_url = driver.current_url
+    _notify_user(
+        f"[ACA2000] Current URL after login attempt: {current_url}", "info"
+    )
+    if "/Account/Login" in current_url or "ReturnUrl" in current_url:
+        _notify_user(
+            "[ACA2000] ⚠️ Still on login page - checking for errors...", "warning"
+        )
+        try:
+            error_elements = driver.find_elements(
+                By.CSS_SELECTOR,
+                ".error, .alert, .warning, [class*='error'], [class*='alert']",
+            )
+            if error_elements:
+                error_text = " ".join(
+                    [elem.text for elem in error_elements if elem.text]
+                )
+                _notify_user(
+                    f"[ACA2000] ⚠️ Login error detected: {error_text}", "error"
+                )
+        except Exception:
+            pass
+
+    # Wait for redirect to /Attend
+    try:
+        wait_redirect = WebDriverWait(driver, 10)
+        wait_redirect.until(
+            lambda d: "/Attend" in d.current_url
+            and "/Account/Login" not in d.current_url
+        )
+        _notify_user("[ACA2000] ✅ Login successful", "success")
+    except Exception:
+        current_url = driver.current_url
+        if "/Account/Login" in current_url or "ReturnUrl" in current_url:
+            _notify_user("[ACA2000] ❌ Login failed", "error")
+            return False
+        else:
+            try:
+                driver.get(f"{aca2000_url.rstrip('/')}/Attend")
+                wait.until(
+                    lambda d: "/Attend" in d.current_url
+                    and "/Account/Login" not in d.current_url
+                )
+            except Exception:
+                _notify_user("[ACA2000] ❌ Could not navigate to /Attend", "error")
+                return False
+
+    return True
+
+
+def latest_saturday(today=None):
+    """The most recent Saturday on or before today (a datetime.date)."""
+    today = today or datetime.now().date()
+    return today - timedelta(days=(today.weekday() - 5) % 7)
+
+
+def _new_aca2000_driver(headless=False, reuse_session=True, account=None):
+    """Start a Chrome WebDriver set up for ACA2000 (account keys the saved session)."""
+    options = webdriver.ChromeOptions()
+    if headless:
+        options.add_argument("--headless=new")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-software-rasterizer")
+    options.add_argument("--disable-extensions")
+    options.add_argument("--disable-background-timer-throttling")
+    options.add_argument("--disable-backgrounding-occluded-windows")
+    options.add_argument("--disable-renderer-backgrounding")
+    options.add_argument("--disable-features=TranslateUI")
+    options.add_argument("--disable-ipc-flooding-protection")
+    if reuse_session:
+        _add_session_profile(options, "aca2000", account)
+    # Use system chromedriver if available (Streamlit Cloud), otherwise use webdriver-manager
+    system_chromedriver = shutil.which("chromedriver")
+    if system_chromedriver:
+        return webdriver.Chrome(service=Service(system_chromedriver), options=options)
+    return webdriver.Chrome(
+        service=Service(ChromeDriverManager().install()), options=options
+    )
+
+
+# Put a date into #iDate through the page's own datepicker and change handlers
+_ACA2000_SET_DATE_SCRIPT = """
+var value = arguments[0];
+var input = document.getElementById('iDate');
+if (!input) { return null; }
+var net = window.__automationNet;
+var state = {
+    previous: input.value,
+    started: net ? net.started : 0,
+    classes: Array.prototype.map.call(
+        document.querySelectorAll("a[onclick*='selectClass']"),
+        function (a) { return a.getAttribute('onclick') + a.textContent; }
+    ).join('|'),
+};
+if (state.previous === value) { return state; }
+// Gone after a full page load, so a reload shows the switch happened
+window.__automationDateSwitch = value;
+var $ = window.jQuery;
+if ($ && $.fn && $.fn.datepicker) {
+    try { $(input).datepicker('setDate', value); } catch (e) {}
+}
+if (input.value !== value) { input.value = value; }
+if ($) {
+    $(input).trigger('change');
+} else {
+    input.dispatchEvent(new Event('change', {bubbles: true}));
+}
+return state;
+"""
+
+# What the page did after _ACA2000_SET_DATE_SCRIPT, to tell whether it
+# actually switched the date rather than just showing the forced value
+_ACA2000_DATE_STATE_SCRIPT = """
+var input = document.getElementById('iDate');
+var net = window.__automationNet;
+return {
+    value: input ? input.value : null,
+    reloaded: window.__automationDateSwitch === undefined,
+    started: net ? net.started : 0,
+    classes: Array.prototype.map.call(
+        document.querySelectorAll("a[onclick*='selectClass']"),
+        function (a) { return a.getAttribute('onclick') + a.textContent; }
+    ).join('|'),
+};
+"""
+
+
+def _select_aca2000_date(driver, wait, target):
+    """
+    Switch the 출석부 page to the given datetime.date in one step by setting
+    #iDate and firing the page's own date-change handlers. The switch only
+    counts if the page reacted: it reloaded, sent a request, or redrew the
+    class list. Otherwise the datepicker popup / arrow navigation is used.
+    """
+    target_date = target.strftime("%Y-%m-%d")
+    try:
+        before = _run_and_wait_idle(driver, _ACA2000_SET_DATE_SCRIPT, target_date)
+        if before and before["previous"] == target_date:
+            return
+        if before:
+            _wait_for_page_ready(driver)
+            after = driver.execute_script(_ACA2000_DATE_STATE_SCRIPT)
+            if after["value"] == target_date and (
+                after["reloaded"]
+                or after["started"] > before["started"]
+                or after["classes"] != before["classes"]
+            ):
+                if after["reloaded"]:
+                    driver.execute_script(_NETWORK_TRACKER_SCRIPT)
+                _notify_user(f"[ACA2000] ✅ Selected date: {target_date}", "success")
+                return
+    except (WebDriverException, KeyError, TypeError):
+        pass
+    _notify_user(
+        "[ACA2000] ⚠️ Direct date change not accepted, using the calendar", "warning"
+    )
+    _navigate_aca2000_date(driver, wait, target)
+
+
+def _navigate_aca2000_date(driver, wait, target):
+    """
+    Switch the 출석부 page to the given datetime.date through the datepicker
+    popup, or with the prev/next-day arrows if the popup does not open.
+    """
+    target_date = target.strftime("%Y-%m-%d")
+    target_year = target.year
+    target_month = target.month
+    target_day = target.day
+
+    try:
+        # Try calendar popup
+        try:
+            date_input = driver.find_element(By.ID, "iDate")
+            date_input.click()
+        except Exception:
+            pass
+        try:
+            calendar_btn = driver.find_element(
+                By.CSS_SELECTOR, "img[src*='btn_calendar'], img[src*='calendar']"
+            )
+            driver.execute_script("arguments[0].click();", calendar_btn)
+        except Exception:
+            pass
+
+        calendar_opened = False
+        try:
+            WebDriverWait(driver, 5).until(
+                EC.visibility_of_element_located(
+                    (
+                        By.CSS_SELECTOR,
+                        ".datepicker-dropdown, div.datepicker[style*='display: block']",
+                    )
+                )
+            )
+            calendar_opened = True
+        except Exception:
+            pass
+
+        if calendar_opened:
+            # Navigate calendar to correct month
+            for _ in range(12):
+                try:
+                    header = driver.find_element(
+                        By.CSS_SELECTOR, "th.datepicker-switch"
+                    ).text.strip()
+                    match = re.search(r"(\d{4})년\s*(\d{1,2})월", header)
+                    if match:
+                        cy, cm = int(match.group(1)), int(match.group(2))
+                        if cy == target_year and cm == target_month:
+                            break
+                        elif (cy < target_year) or (
+                            cy == target_year and cm < target_month
+                        ):
+                            driver.find_element(By.CSS_SELECTOR, "th.next").click()
+                        else:
+                            driver.find_element(By.CSS_SELECTOR, "th.prev").click()
+                        _wait_for_change(
+                            driver,
+                            lambda d: d.find_element(
+                                By.CSS_SELECTOR, "th.datepicker-switch"
+                            ).text.strip(),
+                            header,
+                        )
+                    else:
+                        break
+                except Exception:
+                    break
+            # Click target day (exclude old/new month days)
+            try:
+                date_cell = wait.until(
+                    EC.element_to_be_clickable(
+                        (
+                            By.XPATH,
+                            f"//td[contains(@class, 'day') and not(contains(@class, 'disabled')) and not(contains(@class, 'old')) and not(contains(@class, 'new'))]//div[text()='{target_day}']",
+                        )
+                    )
+                )
+                _run_and_wait_idle(driver, "arguments[0].click();", date_cell)
+                _notify_user(
+                    f"[ACA2000] ✅ Selected date: {target_date}", "success"
+                )
+            except Exception as e:
+                _notify_user(
+                    f"[ACA2000] ⚠️ Could not select date: {type(e).__name__}",
+                    "warning",
+                )
+        else:
+            # Arrow button navigation
+            for _ in range(30):
+                try:
+                    current_date_str = (
+                        driver.find_element(By.ID, "iDate").get_attribute("value")
+                        or ""
+                    ).strip()
+                    if current_date_str == target_date:
+                        _notify_user(
+                            f"[ACA2000] ✅ Reached target date: {target_date}",
+                            "success",
+                        )
+                        break
+                    current = datetime.strptime(current_date_str, "%Y-%m-%d").date()
+                    if current < target:
+                        arrow = driver.find_element(
+                            By.XPATH,
+                            "//a[contains(@onclick, 'nextDay')] | //a[contains(., '▶')]",
+                        )
+                    else:
+                        arrow = driver.find_element(
+                            By.XPATH,
+                            "//a[contains(@onclick, 'prevDay')] | //a[contains(., '◀')]",
+                        )
+                    _run_and_wait_idle(driver, "arguments[0].click();", arrow)
+                except Exception:
+                    break
+    except Exception as e:
+        _notify_user(f"[ACA2000] ⚠️ Could not select date: {e}", "warning")
+
+
+def _read_aca2000_class_list(driver, wait, target_date):
+    """Return {class_name: class_id} from the 출석부 page's class links."""
+    class_info = {}
+    try:
+        wait.until(
+            EC.presence_of_element_located(
+                (
+                    By.CSS_SELECTOR,
+                    ".반목록, #반목록, .class-list, .depth1, li.depth1",
+                )
+            )
+        )
+        class_elements = driver.find_elements(
+            By.CSS_SELECTOR, "a[onclick*='selectClass']"
+        )
+        for elem in class_elements:
+            try:
+                class_name = elem.text.strip()
+                onclick_attr = elem.get_attribute("onclick")
+                if onclick_attr and "selectClass" in onclick_attr:
+                    match = re.search(r"selectClass\((\d+)\)", onclick_attr)
+                    if match:
+                        class_id = match.group(1)
+                        if class_name and class_name not in class_info:
+                            class_info[class_name] = class_id
+            except Exception:
+                continue
+        _notify_user(
+            f"[ACA2000] ✅ Found {len(class_info)} classes from date {target_date}",
+            "success",
+        )
+    except Exception as e:
+        _notify_user(f"[ACA2000] ⚠️ Could not find class list: {e}", "warning")
+    return class_info
+
+
+def get_class_list_from_aca2000(
+    aca2000_url=None,
+    cust_num=None,
+    user_id=None,
+    user_pw=None,
+    headless=False,
+    reuse_session=True,
+    use_cache=True,
+    target_date=None,
+):
+    """
+    Fetches available class list (names and IDs) from ACA2000.
+    Returns the driver alive for reuse with get_students_for_classes().
+
+    Steps:
+    1. Login to ACA2000 (skipped if the saved session is still valid,
+       see reuse_session)
+    2. Navigate to 출석부 (Attendance)
+    3. Select the attendance date (target_date, a datetime.date; defaults
+       to the latest Saturday)
+    4. Extract class names and IDs
+
+    With use_cache the result for the default date is stored in the
+    Aca2000Cache (see load_cached_class_list()); if the class set changed
+    since the cached copy, cached rosters of the changed classes are dropped.
+    Lists for other dates (e.g. from harvest_attendance()) are not cached,
+    since they would replace the picker's list with another day's classes.
+
+    Returns:
+        tuple: (class_info_dict, driver)
+            - class_info: {"M7 월금": "2246", ...}
+            - driver: live WebDriver for reuse (caller gives it back with
+              release_driver() when done)
+            On error: ({}, None)
+    """
+    if not aca2000_url:
+        aca2000_url = "https://t.aca2000.co.kr/"
+
+    if not cust_num:
+        cust_num = _get_secret("ACA2000_CUST_NUM", os.getenv("ACA2000_CUST_NUM", ""))
+    if not user_id:
+        user_id = _get_secret("ACA2000_USER_ID", os.getenv("ACA2000_USER_ID", ""))
+    if not user_pw:
+        user_pw = _get_secret("ACA2000_USER_PW", os.getenv("ACA2000_USER_PW", ""))
+
+    if not all([cust_num, user_id, user_pw]):
+        _notify_user(
+            "❌ ACA2000 credentials (CUST_NUM, USER_ID, USER_PW) must be set", "error"
+        )
+        return {}, None
+
+    # Borrow a warm driver (not via context manager, so it stays alive)
+    account = _aca2000_account(cust_num, user_id)
+    driver = driver_pool().checkout(
+        ("aca2000", account, headless, reuse_session),
+        lambda: _new_aca2000_driver(
+            headless=headless, reuse_session=reuse_session, account=account
+        ),
+    )
+
+    # _make_driver_read_only(driver)
+
+    wait = WebDriverWait(driver, 20)
+
+    try:
+        # Step 1: Login (skipped when the saved session is still valid)
+        if reuse_session and _aca2000_session_valid(driver, aca2000_url):
+            _notify_user("[ACA2000] ✅ Reusing saved session, login skipped", "success")
+        else:
+            _notify_user("[ACA2000] Step 1: Logging in...", "info")
+            if not _login_aca2000(
+                driver, wait, aca2000_url, cust_num, user_id, user_pw
+            ):
+                release_driver(driver)
+                return {}, None
+
+        # Step 2: Navigate to 출석부
+        _notify_user("[ACA2000] Step 2: Navigating to 출석부...", "info")
+        try:
+            attend_link = _find_learned(
+                driver, "aca2000", "attend_link", ACA2000_ATTEND_LINK_LOCATORS,
+                clickable=True,
+            )
+            attend_link.click()
+        except Exception:
+            if "/Attend" not in driver.current_url:
+                driver.get(f"{aca2000_url.rstrip('/')}/Attend")
+
+        wait.until(
+            EC.presence_of_element_located(
+                (By.CSS_SELECTOR, ".attendL, .class-list, #반목록, .반목록")
+            )
+        )
+        _notify_user("[ACA2000] ✅ Navigated to 출석부", "success")
+        _selectors().save()
+        driver.execute_script(_NETWORK_TRACKER_SCRIPT)
+        _wait_for_page_ready(driver)
+
+        # Step 3: Select the attendance date
+        default_date = latest_saturday()
+        if target_date is None:
+            target_date = default_date
+        _notify_user(f"[ACA2000] Step 3: Selecting date {target_date}...", "info")
+        _select_aca2000_date(driver, wait, target_date)
+
+        # Step 4: Get class list
+        _notify_user("[ACA2000] Step 4: Fetching class list...", "info")
+        class_info = _read_aca2000_class_list(driver, wait, target_date)
+
+        if not class_info:
+            release_driver(driver)
+            return {}, None
+
+        if use_cache and target_date == default_date:
+            cache = Aca2000Cache()
+            try:
+                if cache.put_class_info(account, class_info):
+                    _notify_user("[ACA2000] Class list changed since last run", "info")
+            finally:
+                cache.close()
+
+        # Return class list and keep driver alive
+        return class_info, driver
+
+    except Exception as e:
+        _notify_user(f"[ACA2000] ❌ Error: {e}", "error")
+        driver_pool().discard(driver)
+        return {}, None
+
+
+# Every student of the selected class in one call: name, showDetail id, and
+# attendance. "attended" is the 출석 button in its on01s (switched on) state;
+# "status" is the value of whichever attendance button is switched on.
+_ACA2000_ROSTER_SCRIPT = """
+var students = [];
+document.querySelectorAll("span.name[onclick*='showDetail']").forEach(function (el) {
+    var name = (el.innerText || el.textContent || '').trim();
+    if (!name) { return; }
+    var idMatch = (el.getAttribute('onclick') || '').match(/showDetail\\(\\s*['"]?([^'",)\\s]+)/);
+    var row = el.closest('tr') || el.closest("div[class*='row']");
+    var attended = false, status = null;
+    if (row) {
+        attended = !!row.querySelector(
+            "button.att_btn.on01s[value='출석'], button.on01s[value='출석']"
+        );
+        row.querySelectorAll('button[value]').forEach(function (button) {
+            if (!status && /(^|\\s)on\\d+s(\\s|$)/.test(button.className)) {
+                status = button.value;
+            }
+        });
+    }
+    students.push({
+        name: name,
+        detail_id: idMatch ? idMatch[1] : null,
+        attended: attended,
+        status: status,
+    });
+});
+return students;
+"""
+
+
+class _RosterHTMLParser(HTMLParser):
+    """
+    Reads the roster HTML that selectClass() loads into the same rows as
+    _ACA2000_ROSTER_SCRIPT: {name, detail_id, attended, status}. A row is the
+    innermost <tr>, or <div class="...row..."> outside of tables.
+    """
+
+    _VOID_TAGS = frozenset({
+        "area", "base", "br", "col", "embed", "hr", "img", "input", "link",
+        "meta", "source", "track", "wbr",
+    })
+    _DETAIL_RE = re.compile(r"showDetail\(\s*['\"]?([^'\",)\s]+)")
+    _ACTIVE_RE = re.compile(r"(?:^|\s)on\d+s(?:\s|$)")
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.students = []
+        self._stack = []  # (tag, row dict or None)
+        self._name = None  # student being read from an open span.name
+
+    def _row(self):
+        for _, row in reversed(self._stack):
+            if row is not None:
+                return row
+        return None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        classes = attrs.get("class") or ""
+        if tag == "button":
+            row = self._row()
+            value = attrs.get("value")
+            if row is not None and value is not None:
+                class_set = classes.split()
+                if value == "출석" and "on01s" in class_set:
+                    row["attended"] = True
+                if row["status"] is None and self._ACTIVE_RE.search(classes):
+                    row["status"] = value
+        if tag == "span" and "name" in classes.split():
+            match = self._DETAIL_RE.search(attrs.get("onclick") or "")
+            if match or "showDetail" in (attrs.get("onclick") or ""):
+                self._name = {
+                    "text": [],
+                    "detail_id": match.group(1) if match else None,
+                }
+        if tag in self._VOID_TAGS:
+            return
+        is_row = tag == "tr" or (tag == "div" and "row" in classes)
+        self._stack.append(
+            (tag, {"students": [], "attended": False, "status": None} if is_row else None)
+        )
+
+    def handle_data(self, data):
+        if self._name is not None:
+            self._name["text"].append(data)
+
+    def handle_endtag(self, tag):
+        if tag == "span" and self._name is not None:
+            name = " ".join("".join(self._name["text"]).split())
+            if name:
+                row = self._row()
+                student = {"name": name, "detail_id": self._name["detail_id"]}
+                if row is None:
+                    self.students.append({**student, "attended": False, "status": None})
+                else:
+                    row["students"].append(student)
+            self._name = None
+        # Close up to the matching open tag (tolerates unclosed children)
+        for depth in range(len(self._stack) - 1, -1, -1):
+            if self._stack[depth][0] == tag:
+                for _, row in reversed(self._stack[depth:]):
+                    if row is not None:
+                        self._flush(row)
+                del self._stack[depth:]
+                break
+
+    def _flush(self, row):
+        # Students bubble up to an enclosing row (e.g. a tr inside a div.row)
+        for student in row["students"]:
+            self.students.append(
+                {**student, "attended": row["attended"], "status": row["status"]}
+            )
+
+    def close(self):
+        super().close()
+        for _, row in reversed(self._stack):
+            if row is not None:
+                self._flush(row)
+        self._stack = []
+        return self.students
+
+
+def parse_aca2000_roster_html(markup):
+    """Parse roster HTML into [{name, detail_id, attended, status}]."""
+    parser = _RosterHTMLParser()
+    parser.feed(markup)
+    return parser.close()
+
+
+class Aca2000Client:
+    """
+    Fetches ACA2000 rosters over HTTP with the browser's logged-in session,
+    skipping page rendering. The roster endpoint is whatever request
+    selectClass() makes; from_driver() records it once in the browser and
+    keeps it as a template with "{class_id}" in the URL and/or body.
+
+    For tests, construct it directly against a fake server:
+        Aca2000Client("http://127.0.0.1:8000", endpoint={"method": "POST",
+            "url": "/Attend/ClassStudents", "body": "classId={class_id}"})
+    """
+
+    def __init__(
+        self, base_url, endpoint, cookies=(), user_agent=None, max_workers=6, timeout=15
+    ):
+        self.base_url = base_url.rstrip("/") + "/"
+        self.endpoint = endpoint
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["X-Requested-With"] = "XMLHttpRequest"
+        if user_agent:
+            self.session.headers["User-Agent"] = user_agent
+        for cookie in cookies:
+            # No domain: the session only ever talks to base_url
+            self.session.cookies.set(cookie["name"], cookie["value"])
+
+    @classmethod
+    def from_driver(cls, driver, sample_class_id, base_url=None, **kwargs):
+        """
+        Build a client from a logged-in driver on the 출석부 page. Runs
+        selectClass(sample_class_id) once in the browser to learn the roster
+        request. Returns None if no request could be identified.
+        """
+        endpoint = _discover_roster_endpoint(driver, sample_class_id)
+        if not endpoint:
+            return None
+        if base_url is None:
+            parts = urlsplit(driver.current_url)
+            base_url = f"{parts.scheme}://{parts.netloc}"
+        return cls(
+            base_url,
+            endpoint,
+            cookies=driver.get_cookies(),
+            user_agent=driver.execute_script("return navigator.userAgent;"),
+            **kwargs,
+        )
+
+    def fetch_roster(self, class_id):
+        """Return the roster rows [{name, detail_id, attended, status}] of one class."""
+        class_id = str(class_id)
+        path = self.endpoint["url"].replace("{class_id}", class_id)
+        url = urljoin(self.base_url, path)
+        body = self.endpoint.get("body")
+        if body is not None:
+            body = body.replace("{class_id}", class_id)
+        response = self.session.request(
+            self.endpoint.get("method", "GET"),
+            url,
+            data=body.encode("utf-8") if body is not None else None,
+            headers={"Content-Type": "application/x-www-form-urlencoded; charset=UTF-8"}
+            if body is not None
+            else None,
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return parse_aca2000_roster_html(_roster_markup(response))
+
+    def fetch_rosters(self, class_ids):
+        """
+        Fetch {class_name: class_id} concurrently over the pooled keep-alive
+        session. Returns {class_name: rows}; a failed class maps to the exception.
+        """
+        def _fetch(item):
+            class_name, class_id = item
+            try:
+                return class_name, self.fetch_roster(class_id)
+            except (requests.RequestException, ValueError) as e:
+                return class_name, e
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return dict(executor.map(_fetch, class_ids.items()))
+
+    def close(self):
+        self.session.close()
 
-    return results
+
+def _roster_markup(response):
+    """Roster HTML from a response that is either HTML or JSON wrapping HTML."""
+    if "json" not in response.headers.get("Content-Type", ""):
+        return response.text
+    fragments = []
+
+    def _collect(value):
+        if isinstance(value, str) and "showDetail" in value:
+            fragments.append(value)
+        elif isinstance(value, dict):
+            for item in value.values():
+                _collect(item)
+        elif isinstance(value, list):
+            for item in value:
+                _collect(item)
+
+    _collect(response.json())
+    return "\n".join(fragments)
+
+
+def _discover_roster_endpoint(driver, class_id):
+    """
+    Run selectClass(class_id) in the browser and return the request it made
+    as {"method", "url", "body"} with the class id replaced by "{class_id}",
+    or None. The class is left selected in the page.
+    """
+    started_before = driver.execute_script(_NETWORK_TRACKER_SCRIPT)
+    _run_and_wait_idle(driver, f"selectClass({class_id});")
+    net = driver.execute_script("return window.__automationNet;") or {}
+    new_count = net.get("started", 0) - started_before
+    requests_made = (net.get("log") or [])[-new_count:] if new_count > 0 else []
+    id_re = re.compile(rf"(?<!\d){re.escape(str(class_id))}(?!\d)")
+    for request in requests_made:
+        url, body = request.get("url") or "", request.get("body")
+        if id_re.search(url) or (body and id_re.search(body)):
+            return {
+                "method": request.get("method") or "GET",
+                "url": id_re.sub("{class_id}", url),
+                "body": id_re.sub("{class_id}", body) if body else body,
+            }
+    return None
+
+
+def _attended_students(class_name, rows):
+    """Turn roster rows into RosterEntries of attended students and report them."""
+    students = []
+    seen_names = set()
+    absent = []
+    for row in rows:
+        if not row["attended"]:
+            absent.append(row["name"])
+            continue
+        if row["name"] in seen_names:
+            continue
+        seen_names.add(row["name"])
+        students.append(
+            RosterEntry.parse(
+                row["name"], detail_id=row["detail_id"], status=row["status"]
+            )
+        )
+
+    if students:
+        _notify_user(
+            f"[ACA2000]   ✓ 출석: {', '.join(e.raw for e in students)}", "info"
+        )
+    if absent:
+        _notify_user(f"[ACA2000]   ✗ not attended: {', '.join(absent)}", "info")
+    _notify_user(
+        f"[ACA2000] ✅ Found {len(students)} attended students in {class_name}",
+        "success",
+    )
+    return students
+
+
+def _fetch_students_over_http(driver, class_ids):
+    """
+    Read the first class in the browser while learning its roster request,
+    then fetch the other classes concurrently over HTTP. The HTTP result for
+    the first class must equal what the page shows, otherwise nothing else
+    is fetched this way. Returns {class_name: [RosterEntry]} for the classes
+    it handled; the caller reads the rest in the browser.
+    """
+    (first_name, first_id), *rest = class_ids.items()
+    _notify_user(
+        f"[ACA2000] Processing class: {first_name} (ID: {first_id})...", "info"
+    )
+    client = None
+    try:
+        client = Aca2000Client.from_driver(driver, first_id)
+        page_rows = _read_roster_rows(driver)
+        done = {first_name: _attended_students(first_name, page_rows)}
+        if not client:
+            _notify_user(
+                "[ACA2000] ⚠️ Roster request not identified, reading classes in browser",
+                "warning",
+            )
+            return done
+
+        try:
+            http_rows = client.fetch_roster(first_id)
+        except (requests.RequestException, ValueError) as e:
+            http_rows = None
+            _notify_user(
+                f"[ACA2000] ⚠️ Direct roster request failed: {type(e).__name__}",
+                "warning",
+            )
+
+        def _key(rows):
+            return [(" ".join(r["name"].split()), r["attended"]) for r in rows]
+
+        if http_rows is None or _key(http_rows) != _key(page_rows):
+            _notify_user(
+                "[ACA2000] ⚠️ Direct roster differs from page, reading classes in browser",
+                "warning",
+            )
+            return done
+
+        _notify_user(
+            f"[ACA2000] Fetching {len(rest)} more classes directly...", "info"
+        )
+        for class_name, rows in client.fetch_rosters(dict(rest)).items():
+            if isinstance(rows, Exception):
+                _notify_user(
+                    f"[ACA2000] ⚠️ Direct fetch failed for {class_name}: "
+                    f"{type(rows).__name__}",
+                    "warning",
+                )
+                continue
+            done[class_name] = _attended_students(class_name, rows)
+        return done
+    finally:
+        if client:
+            client.close()
+
+
+def _read_roster_rows(driver, settle=2):
+    """
+    Roster rows of the class whose roster request has just finished. Rows
+    are polled for up to settle seconds in case rendering lags behind the
+    response; a class nobody attends is a valid, empty roster.
+    """
+    try:
+        return WebDriverWait(driver, settle, poll_frequency=0.1).until(
+            lambda d: d.execute_script(_ACA2000_ROSTER_SCRIPT)
+        )
+    except TimeoutException:
+        return []
+
+
+def _read_class_in_browser(driver, class_id):
+    """Select one class on the 출석부 page and return its roster rows."""
+    # Returns once the roster request triggered by selectClass is done
+    _run_and_wait_idle(driver, f"selectClass({class_id});")
+    # The whole roster in one round trip
+    return _read_roster_rows(driver)
+
+
+def _open_aca2000_worker(base_url, cookies, date_value):
+    """
+    Start a headless driver sharing the main driver's login (its cookies),
+    on the 출석부 page at the same date. Returns the driver, or None.
+    """
+    driver = None
+    try:
+        driver = driver_pool().checkout(
+            ("aca2000", None, True, False),
+            lambda: _new_aca2000_driver(headless=True, reuse_session=False),
+        )
+        wait = WebDriverWait(driver, 20)
+        # Cookies can only be set for the domain currently loaded; a pooled
+        # worker may still hold another login's cookies
+        driver.get(base_url)
+        driver.delete_all_cookies()
+        for cookie in cookies:
+            cookie = {k: v for k, v in cookie.items() if k != "sameSite"}
+            try:
+                driver.add_cookie(cookie)
+            except WebDriverException:
+                continue
+        driver.get(f"{base_url}/Attend")
+        wait.until(
+            EC.presence_of_element_located(
+                (By.CSS_SELECTOR, ".attendL, .class-list, #반목록, .반목록")
+            )
+        )
+        driver.execute_script(_NETWORK_TRACKER_SCRIPT)
+        if date_value:
+            _select_aca2000_date(
+                driver, wait, datetime.strptime(date_value, "%Y-%m-%d").date()
+            )
+        return driver
+    except (*DRIVER_ERRORS, ValueError):
+        driver_pool().discard(driver)
+        return None
+
+
+def _read_classes_in_parallel(driver, class_ids, workers):
+    """
+    Read {class_name: class_id} with the main driver plus up to workers-1
+    headless drivers logged in with its cookies. Each driver takes the next
+    class from a shared queue; results are reported here, on the calling
+    thread, as they arrive. A failed class maps to its exception.
+    """
+    parts = urlsplit(driver.current_url)
+    base_url = f"{parts.scheme}://{parts.netloc}"
+    cookies = driver.get_cookies()
+    try:
+        date_value = driver.find_element(By.ID, "iDate").get_attribute("value")
+    except WebDriverException:
+        date_value = None
+
+    todo = queue.Queue()
+    for item in class_ids.items():
+        todo.put(item)
+    results = queue.Queue()
+
+    def _work(own_driver, is_main):
+        if own_driver is None:
+            own_driver = _open_aca2000_worker(base_url, cookies, date_value)
+            if own_driver is None:
+                return
+        try:
+            while True:
+                try:
+                    class_name, class_id = todo.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    rows = _read_class_in_browser(own_driver, class_id)
+                except DRIVER_ERRORS as e:
+                    rows = e
+                results.put((class_name, rows))
+        finally:
+            if not is_main:
+                release_driver(own_driver)
+
+    extra = min(workers, len(class_ids)) - 1
+    _notify_user(
+        f"[ACA2000] Reading {len(class_ids)} classes with {extra + 1} browsers...",
+        "info",
+    )
+    threads = [threading.Thread(target=_work, args=(driver, True), daemon=True)]
+    threads += [
+        threading.Thread(target=_work, args=(None, False), daemon=True)
+        for _ in range(extra)
+    ]
+    for thread in threads:
+        thread.start()
+
+    read = {}
+    while len(read) < len(class_ids):
+        try:
+            class_name, rows = results.get(timeout=1)
+        except queue.Empty:
+            if not any(thread.is_alive() for thread in threads):
+                break
+            continue
+        read[class_name] = rows
+    for thread in threads:
+        thread.join()
+    return read
+
+
+def _read_students_for_classes(
+    driver, class_ids, use_http, workers, use_cache, prefetched=None
+):
+    """
+    Roster reading behind get_students_for_classes() for the date currently
+    shown on the 출석부 page. Leaves the driver open.
+    """
+    all_students = {
+        name: prefetched[name] for name in class_ids if name in (prefetched or {})
+    }
+    if all_students:
+        _notify_user(
+            f"[ACA2000] ✅ {len(all_students)} class rosters read ahead of time",
+            "info",
+        )
+    failed = set()
+    cache = Aca2000Cache() if use_cache else None
+
+    try:
+        roster_date = None
+        if cache:
+            try:
+                roster_date = driver.find_element(By.ID, "iDate").get_attribute("value")
+            except WebDriverException:
+                roster_date = None
+        if roster_date:
+            served = 0
+            for class_name, class_id in class_ids.items():
+                if class_name in all_students:
+                    continue
+                cached = cache.get_roster(class_id, roster_date)
+                if cached is not None:
+                    all_students[class_name] = cached
+                    served += 1
+            if served:
+                _notify_user(
+                    f"[ACA2000] ✅ {served} class rosters for {roster_date} "
+                    "served from cache",
+                    "info",
+                )
+        cached_names = set(all_students)
+
+        remaining = {
+            name: class_id
+            for name, class_id in class_ids.items()
+            if name not in all_students
+        }
+        if use_http and len(remaining) > 1:
+            try:
+                all_students.update(_fetch_students_over_http(driver, remaining))
+            except (*DRIVER_ERRORS, requests.RequestException) as e:
+                _notify_user(
+                    f"[ACA2000] ⚠️ Direct roster fetch unavailable: {e}", "warning"
+                )
+
+        remaining = {
+            name: class_id
+            for name, class_id in remaining.items()
+            if name not in all_students
+        }
+        if workers > 1 and len(remaining) > 1:
+            for class_name, rows in _read_classes_in_parallel(
+                driver, remaining, workers
+            ).items():
+                _notify_user(f"[ACA2000] Processed class: {class_name}", "info")
+                if isinstance(rows, Exception):
+                    _notify_user(
+                        f"[ACA2000] ⚠️ Error extracting students for {class_name}: {rows}",
+                        "warning",
+                    )
+                    failed.add(class_name)
+                    rows = []
+                all_students[class_name] = _attended_students(class_name, rows)
+            remaining = {
+                name: class_id
+                for name, class_id in remaining.items()
+                if name not in all_students
+            }
+
+        for class_name, class_id in remaining.items():
+            _notify_user(
+                f"[ACA2000] Processing class: {class_name} (ID: {class_id})...",
+                "info",
+            )
+            try:
+                rows = _read_class_in_browser(driver, class_id)
+                all_students[class_name] = _attended_students(class_name, rows)
+            except Exception as e:
+                _notify_user(
+                    f"[ACA2000] ⚠️ Error processing class {class_name}: {e}", "warning"
+                )
+                failed.add(class_name)
+                all_students[class_name] = []
+
+        if roster_date:
+            for class_name, students in all_students.items():
+                if class_name not in cached_names and class_name not in failed:
+                    cache.put_roster(class_ids[class_name], roster_date, students)
+
+        # Keep the caller's class order
+        all_students = {name: all_students[name] for name in class_ids}
+        _notify_user(
+            f"[ACA2000] ✅ Completed! Processed {len(all_students)} classes", "success"
+        )
+
+    finally:
+        if cache:
+            cache.close()
+
+    return all_students
+
+
+def get_students_for_classes(
+    driver, class_ids, use_http=True, workers=1, use_cache=True, prefetched=None
+):
+    """
+    Fetches student lists for selected classes using an existing driver.
+    Returns the driver to the pool (see DriverPool) when done.
+
+    Args:
+        driver: Live WebDriver from get_class_list_from_aca2000()
+        class_ids: {class_name: class_id} for selected classes only
+        use_http: With several classes, learn the roster request from the
+            first one and fetch the others directly over HTTP with the
+            browser's cookies (see Aca2000Client); the browser is the fallback.
+        workers: Number of browsers reading classes in parallel when the
+            browser is used; extra ones are headless and share the login.
+        use_cache: Reuse rosters cached for the page's date within
+            Aca2000Cache.ROSTER_TTL and cache the ones read now (past dates
+            only, see Aca2000Cache).
+        prefetched: {class_name: [RosterEntry]} already read for this date,
+            e.g. RosterPrefetch.result(); those classes are not read again.
+
+    Returns:
+        dict: {class_name: [RosterEntry]} (attended students only)
+    """
+    try:
+        return _read_students_for_classes(
+            driver, class_ids, use_http, workers, use_cache, prefetched
+        )
+    finally:
+        release_driver(driver)
+
+
+def harvest_attendance(
+    dates,
+    classes,
+    aca2000_url=None,
+    cust_num=None,
+    user_id=None,
+    user_pw=None,
+    headless=True,
+    reuse_session=True,
+    use_http=True,
+    workers=1,
+    use_cache=True,
+):
+    """
+    Attended students for several dates from a single ACA2000 login.
+
+    Dates are visited once each, in order, and every requested class is read
+    for a date before moving on, so the page switches date only len(dates)
+    times. The driver stays alive for the whole batch and is returned to the
+    pool at the end.
+
+    Args:
+        dates: iterable of datetime.date (duplicates are ignored)
+        classes: {class_name: class_id} from get_class_list_from_aca2000(), or
+            an iterable of class names; ids are taken from each date's class
+            list, and a class not offered on a date is skipped for it
+        Other arguments as for get_class_list_from_aca2000() and
+        get_students_for_classes().
+
+    Returns:
+        dict: {date: {class_name: [RosterEntry]}} (attended students only)
+    """
+    dates = sorted(set(dates))
+    if not dates:
+        return {}
+    class_names = list(classes)
+
+    class_info, driver = get_class_list_from_aca2000(
+        aca2000_url=aca2000_url,
+        cust_num=cust_num,
+        user_id=user_id,
+        user_pw=user_pw,
+        headless=headless,
+        reuse_session=reuse_session,
+        use_cache=use_cache,
+        target_date=dates[0],
+    )
+    if not driver:
+        return {}
+
+    wait = WebDriverWait(driver, 20)
+    harvest = {}
+    try:
+        for index, day in enumerate(dates):
+            if index:
+                _notify_user(f"[ACA2000] Switching to {day}...", "info")
+                _select_aca2000_date(driver, wait, day)
+                class_info = _read_aca2000_class_list(driver, wait, day)
+            wanted = {
+                name: class_info[name] for name in class_names if name in class_info
+            }
+            skipped = [name for name in class_names if name not in class_info]
+            if skipped:
+                _notify_user(
+                    f"[ACA2000] No class on {day}: {', '.join(skipped)}", "info"
+                )
+            harvest[day] = (
+                _read_students_for_classes(
+                    driver, wanted, use_http, workers, use_cache
+                )
+                if wanted
+                else {}
+            )
+        _notify_user(
+            f"[ACA2000] ✅ Harvested attendance for {len(harvest)} dates", "success"
+        )
+    finally:
+        release_driver(driver)
+
+    return harvest
+
+
+class RosterPrefetch:
+    """
+    Reads rosters for class_ids (e.g. last_class_selection()) on the
+    driver's current date in a background thread. The result is handed over
+    in memory through get_students_for_classes(prefetched=...), because
+    rosters for today are not kept in the Aca2000Cache. join() before using
+    the driver again.
+    """
+
+    def __init__(self, driver, class_ids, use_http=True, workers=1):
+        self.rosters = {}
+        self._thread = threading.Thread(
+            target=self._run, args=(driver, class_ids, use_http, workers), daemon=True
+        )
+        self._thread.start()
+
+    def _run(self, driver, class_ids, use_http, workers):
+        try:
+            rosters = _read_students_for_classes(
+                driver, class_ids, use_http, workers, True
+            )
+        except (*DRIVER_ERRORS, requests.RequestException, sqlite3.Error) as e:
+            _notify_user(f"[ACA2000] ⚠️ Roster prefetch failed: {e}", "warning")
+            return
+        # An empty roster may be a failed read: leave it to the real run
+        self.rosters = {name: students for name, students in rosters.items() if students}
+
+    def join(self, timeout=None):
+        self._thread.join(timeout)
+
+    def result(self):
+        """Wait for the prefetch; returns {class_name: [RosterEntry]} it read."""
+        self.join()
+        return self.rosters
+
+
+def prefetch_rosters(driver, class_ids, use_http=True, workers=1):
+    """Start a RosterPrefetch for class_ids and return it."""
+    return RosterPrefetch(driver, class_ids, use_http=use_http, workers=workers)
+
+
+class IncrementalMatcher:
+    """
+    Matches roster names against emails one at a time, keeping per-class
+    matched/missing state so results can be shown while mail is still
+    streaming in. `outstanding` is the live set of names not found yet.
+    With a SenderDirectory, a mail from a sender known for one student is
+    matched without scanning its text, and text matches teach the directory.
+    """
+
+    def __init__(self, student_dict, directory=None):
+        self.directory = directory
+        self._classes = {}
+        self._by_name = {}
+        for class_name, students in student_dict.items():
+            parsed = []
+            for entry in students:
+                roster = entry if isinstance(entry, RosterEntry) else RosterEntry.parse(entry)
+                parsed.append((entry, roster))
+                if roster.name:
+                    self._by_name.setdefault(roster.name, []).append((class_name, entry))
+            self._classes[class_name] = parsed
+        self.found = {}  # name -> subject of the first email mentioning it
+        self.outstanding = set(self._by_name)
+
+    @property
+    def done(self):
+        return not self.outstanding
+
+    def feed(self, email):
+        """
+        Scan one EmailRecord. Returns [(class_name, student_entry, subject)]
+        for students matched by this email. The body is not kept, so callers
+        may drop it afterwards.
+        """
+        if not self.outstanding:
+            return []
+        known = self.directory.student_for(email.sender) if self.directory else None
+        if known in self.outstanding:
+            names = {known}
+        else:
+            combined = (
+                f"{email.sender_name} {email.subject} {email.content} "
+                f"{' '.join(email.attachments)}"
+            )
+            mentioned = _hangul_name_candidates(combined) & self._by_name.keys()
+            if self.directory and (mentioned or email.content):
+                self.directory.learn(email.sender, mentioned)
+            names = mentioned & self.outstanding
+        newly_matched = []
+        for name in names:
+            self.found[name] = email.subject
+            self.outstanding.discard(name)
+            for class_name, entry in self._by_name[name]:
+                newly_matched.append((class_name, entry, email.subject))
+        return newly_matched
+
+    def results(self):
+        """Current state in the find_missing_students() result shape."""
+        results = {}
+        for class_name, students in self._classes.items():
+            matched = []
+            missing = []
+            for entry, roster in students:
+                subject = self.found.get(roster.name) if roster.name else None
+                if subject:
+                    matched.append((entry, subject))
+                else:
+                    missing.append(entry)
+            results[class_name] = {"matched": matched, "missing": missing}
+        return results
+
+
+def find_missing_students(student_dict, emails, directory=None):
+    """
+    Compare ACA2000 student names against fetched email data.
+
+    Each email's text is reduced once to its set of possible Korean names,
+    so matching is linear in the total email text plus the roster size.
+
+    Args:
+        student_dict: {class_name: [student_entry, ...]} from get_students_for_classes()
+            (RosterEntry or raw roster strings)
+        emails: iterable of EmailRecords (sender, subject, content, attachments),
+            e.g. a list from fetch_naver_email() or the iter_naver_email() stream
+            (closed once every student is found; the stream still restores
+            the mails it opened to unread)
+        directory: optional SenderDirectory to match known senders directly
+
+    Returns:
+        dict: {class_name: {'matched': [(student_entry, email_subject), ...],
+                            'missing': [student_entry, ...]}}
+    """
+    matcher = IncrementalMatcher(student_dict, directory=directory)
+    if not matcher.done:
+        for record in emails:
+            matcher.feed(record)
+            # Checked before pulling another mail, which the stream might open
+            if matcher.done:
+                break
+    return matcher.results()
+
+
+# Fallback selectors for list-level fields, tried in order inside each row
+NAVER_SENDER_SELECTORS = [
+    "div.mail_sender",
+    "button.toggle_conversation_mail",
+    "span.mail_sender",
+    "[class*='sender']",
+]
+NAVER_SUBJECT_SELECTORS = [
+    "div.mail_title span.text",  # Actual subject text element
+    "a.mail_title_link span.text",  # Alternative path to subject
+    "div.mail_title",
+    "span.mail_title",
+    "strong.mail_title",
+    "div.mail_inner",
+    "a.mail_subject",
+    "span.subject",
+    "[class*='subject']",
+    "[class*='title']",
+]
+
+# Extracts every li.mail_item on the current list page in one round trip.
+# arguments[0]: sender fallback selectors, arguments[1]: subject selectors.
+_NAVER_LIST_SCRIPT = """
+var senderSelectors = arguments[0], subjectSelectors = arguments[1];
+function lines(text) {
+    return (text || '').split('\\n').map(function (l) { return l.trim(); })
+        .filter(function (l) { return l; });
+}
+function isDateLike(line) {
+    return /^[\\d.\\-]+$/.test(line) && /\\d/.test(line);
+}
+var rows = [];
+document.querySelectorAll('li.mail_item').forEach(function (item, index) {
+    var mailId = null;
+    item.classList.forEach(function (cls) {
+        if (!mailId && cls.indexOf('mail-') === 0) { mailId = cls; }
+    });
+
+    var dateEl = item.querySelector('div.mail_date_wrap span.mail_date');
+    var dateText = dateEl ? (dateEl.innerText || dateEl.textContent || '').trim() : '';
+
+    // Sender: title of button.button_sender (contains the address),
+    // otherwise the first non-date line of a fallback element
+    var sender = null, senderName = null;
+    var senderButton = item.querySelector('button.button_sender');
+    if (senderButton) {
+        sender = (senderButton.getAttribute('title') || '').trim()
+            .replace(/^[<>]+|[<>]+$/g, '') || null;
+        senderName = lines(senderButton.innerText)[0] || null;
+    } else {
+        for (var i = 0; i < senderSelectors.length; i++) {
+            var senderEl = item.querySelector(senderSelectors[i]);
+            var senderLines = senderEl ? lines(senderEl.innerText) : [];
+            if (senderLines.length) {
+                sender = senderLines[0];
+                for (var j = 0; j < senderLines.length; j++) {
+                    if (!isDateLike(senderLines[j])) { sender = senderLines[j]; break; }
+                }
+                break;
+            }
+        }
+    }
+
+    var subject = null;
+    for (var k = 0; k < subjectSelectors.length; k++) {
+        var subjectEl = item.querySelector(subjectSelectors[k]);
+        var subjectLines = subjectEl ? lines(subjectEl.innerText) : [];
+        if (subjectLines.length) { subject = subjectLines[0]; break; }
+    }
+
+    rows.push({
+        index: index,
+        mail_id: mailId,
+        date: dateText,
+        sender: sender,
+        sender_name: senderName,
+        subject: subject,
+        read: item.classList.contains('read'),
+        has_attachment: !!item.querySelector("[class*='attach']"),
+    });
+});
+return rows;
+"""
+
+
+# Reads the opened mail in one round trip: body textContent of a detached
+# clone with quoted replies removed (no layout pass, unlike innerText or
+# WebElement.text) and the de-duplicated, sorted attachment names.
+_NAVER_VIEW_SCRIPT = """
+var contentSelectors = ['div.mail_view_contents_inner', 'div.mail_view_contents'];
+var containerSelectors = [
+    'div.mail_view_attachment_area', 'div.mail_view_attachment', 'div.attachment',
+    'div.file_area', 'div.file_attachments', 'div.file_attachments_inner',
+    'ul.mail_view_attachment_list', 'ul.attach_list', 'ul.file_list', 'li.file_item'
+];
+var nameSelectors = [
+    'span.file_name', 'em.file_name', 'strong.file_name', 'span.filename',
+    'a.file_download', 'a.button_download', 'a.link_download', 'a[download]'
+];
+var nameAttributes = [
+    'title', 'download', 'aria-label', 'data-file-name', 'data-filename', 'data-name'
+];
+
+var content = '';
+function cloneText(el) {
+    // textContent keeps no line breaks: add them for <br> and block ends
+    el.querySelectorAll('br').forEach(function (br) { br.replaceWith('\\n'); });
+    el.querySelectorAll('p, div, li, tr, h1, h2, h3, h4, h5, h6').forEach(function (block) {
+        block.append('\\n');
+    });
+    return (el.textContent || '').trim();
+}
+for (var i = 0; i < contentSelectors.length; i++) {
+    var contentEl = document.querySelector(contentSelectors[i]);
+    if (!contentEl) { continue; }
+    // Work on detached clones, so reading text never forces a layout pass
+    var full = cloneText(contentEl.cloneNode(true));
+    if (!full) { continue; }
+    // Drop quoted replies; keep them only if nothing else is left
+    var clone = contentEl.cloneNode(true);
+    clone.querySelectorAll('blockquote, div.gmail_quote').forEach(function (q) { q.remove(); });
+    var reduced = cloneText(clone);
+    content = /\\S{2,}/.test(reduced) ? reduced : full;
+    break;
+}
+
+var names = {};
+function addName(value) {
+    var first = (value || '').trim().split('\\n')[0].trim();
+    if (first) { names[first] = true; }
+}
+function text(root, selector) {
+    var el = root.querySelector(selector);
+    return el ? (el.textContent || '').trim() : '';
+}
+function addFromSelectors(root) {
+    root.querySelectorAll(nameSelectors.join(',')).forEach(function (el) {
+        addName(el.textContent);
+        nameAttributes.forEach(function (attr) { addName(el.getAttribute(attr)); });
+    });
+}
+
+var containers = document.querySelectorAll(containerSelectors.join(','));
+if (containers.length) {
+    containers.forEach(function (container) {
+        container.querySelectorAll('li.file_item').forEach(function (item) {
+            // File title is split into base name and extension spans
+            var base = text(item, 'strong.file_title span.text');
+            var ext = text(item, 'strong.file_title span.file_extension');
+            if (base) { addName(base + ext); }
+        });
+        addFromSelectors(container);
+    });
+} else {
+    addFromSelectors(document);
+}
+
+return {content: content, attachments: Object.keys(names).sort()};
+"""
+
+
+# Ticks the list checkbox of every given mail id in one round trip and
+# returns how many rows are now selected.
+_NAVER_SELECT_ROWS_SCRIPT = """
+var selected = 0;
+arguments[0].forEach(function (mailId) {
+    var item = document.querySelector('li.' + mailId);
+    var checkbox = item && item.querySelector("label[role='checkbox']");
+    if (!checkbox) { return; }
+    if (checkbox.getAttribute('aria-checked') !== 'true') { checkbox.click(); }
+    selected += 1;
+});
+return selected;
+"""
+
+
+def _restore_unread(driver, wait, mail_ids):
+    """
+    Put opened mails back to unread with one bulk "안읽음" action.
+
+    The web UI marks a mail read as soon as it is opened and has no
+    read-preserving preview, so the rows are selected together by one
+    script call and the 안읽음 (mark unread) task button is pressed once.
+    (The IMAP backend never sets \\Seen and needs no restore at all.)
+    Returns the number of mails restored.
+    """
+    _notify_user(f"[Naver] Marking {len(mail_ids)} emails as unread...", "info")
+    try:
+        selected = driver.execute_script(_NAVER_SELECT_ROWS_SCRIPT, list(mail_ids))
+    except WebDriverException as e:
+        _notify_user(
+            f"[Naver] ⚠️ Could not select emails: {type(e).__name__}", "warning"
+        )
+        return 0
+    if selected < len(mail_ids):
+        _notify_user(
+            f"[Naver] ⚠️ Only {selected} of {len(mail_ids)} emails found on the page",
+            "warning",
+        )
+    if not selected:
+        return 0
+
+    try:
+        unread_button = wait.until(
+            EC.element_to_be_clickable(
+                (
+                    By.XPATH,
+                    "//button[contains(@class, 'button_task') and normalize-space(.)='안읽음']",
+                )
+            )
+        )
+        _pace("naver")
+        unread_button.click()
+        _notify_user("[Naver] ✅ Marked emails as unread", "success")
+        return selected
+    except WebDriverException as e:
+        _notify_user(
+            f"[Naver] ⚠️ Could not mark as unread: {type(e).__name__}", "warning"
+        )
+        return 0
+
+
+def _naver_on_last_page(driver):
+    """True if the list's next-page button is disabled."""
+    try:
+        next_btn = driver.find_element(By.CSS_SELECTOR, "button.button_next#next-page")
+    except NoSuchElementException:
+        return False
+    return next_btn.get_attribute("disabled") is not None
+
+
+def _goto_next_naver_page(driver, wait, page_num):
+    """
+    Click the list's next-page button. Returns True once the next page is
+    shown, False on the last page, or None if the move failed.
+    """
+    try:
+        next_btn = driver.find_element(By.CSS_SELECTOR, "button.button_next#next-page")
+        if next_btn.get_attribute("disabled") is not None:
+            _notify_user(f"[Naver] Reached last page (page {page_num})", "info")
+            return False
+        _pace("naver")
+        _run_and_wait_idle(driver, "arguments[0].click();", next_btn)
+        wait.until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, "ol.mail_list, li.mail_item"))
+        )
+        return True
+    except WebDriverException:
+        return None
+
+
+# Candidate list-size controls; the option texts must all be counts ("50", "50개")
+NAVER_PAGE_SIZE_SELECTORS = [
+    "select.select_list_count",
+    "select[name*='count' i]",
+    "select[class*='count' i]",
+    "select[class*='size' i]",
+]
+
+_NAVER_PAGE_SIZE_SCRIPT = """
+var selectors = arguments[0];
+for (var i = 0; i < selectors.length; i++) {
+    var select = document.querySelector(selectors[i]);
+    if (!select || !select.options.length) { continue; }
+    var sizes = Array.prototype.map.call(select.options, function (option) {
+        var match = (option.textContent || '').trim().match(/^(\\d+)\\s*개?$/);
+        return match ? Number(match[1]) : null;
+    });
+    if (sizes.indexOf(null) !== -1) { continue; }
+    var best = sizes.indexOf(Math.max.apply(null, sizes));
+    if (select.selectedIndex === best) { return {size: sizes[best], changed: false}; }
+    select.selectedIndex = best;
+    select.dispatchEvent(new Event('change', {bubbles: true}));
+    return {size: sizes[best], changed: true};
+}
+return null;
+"""
+
+
+def _maximize_naver_page_size(driver, wait):
+    """
+    Switch the mail list to the largest page size the UI offers so fewer
+    pages have to be loaded. Returns the page size, or None if unavailable.
+    """
+    try:
+        chosen = _run_and_wait_idle(
+            driver, _NAVER_PAGE_SIZE_SCRIPT, NAVER_PAGE_SIZE_SELECTORS
+        )
+    except WebDriverException:
+        chosen = None
+    if not chosen:
+        _notify_user("[Naver] ⚠️ List size option not found, using default", "warning")
+        return None
+    if chosen["changed"]:
+        wait.until(
+            EC.presence_of_element_located(
+                (By.CSS_SELECTOR, "ol.mail_list, #mail_list_wrap, li.mail_item")
+            )
+        )
+    _notify_user(f"[Naver] Listing {chosen['size']} mails per page", "info")
+    return chosen["size"]
+
+
+# Dates of the first (newest) and last (oldest) row on the current list page
+_NAVER_PAGE_DATES_SCRIPT = """
+var dates = document.querySelectorAll('li.mail_item div.mail_date_wrap span.mail_date');
+if (!dates.length) { return null; }
+function text(el) { return (el.innerText || el.textContent || '').trim(); }
+return [text(dates[0]), text(dates[dates.length - 1])];
+"""
+
+
+class _NaverPager:
+    """
+    Moves through the mail list pages. The first move clicks the next-page
+    button and learns how the page number appears in the URL; after that the
+    following page is loaded in a second tab while the current one is being
+    processed, moving on is just a tab switch, and seek() can jump straight
+    to an older date window.
+    """
+
+    _PAGE_IN_URL = re.compile(r"([?&#/]page[=/])(\d+)")
+
+    def __init__(self, driver, wait):
+        self.driver = driver
+        self.wait = wait
+        self._url_parts = None
+        self._prefetched = None  # (page_num, window handle)
+
+    def _page_url(self, page_num):
+        prefix, suffix = self._url_parts
+        return f"{prefix}{page_num}{suffix}"
+
+    def _learn(self, url, page_num):
+        for match in self._PAGE_IN_URL.finditer(url):
+            if int(match.group(2)) == page_num:
+                self._url_parts = (url[: match.start(2)], url[match.end(2) :])
+                return
+
+    def prefetch(self, page_num):
+        """Start loading page_num in a background tab, if its URL is known."""
+        if not self._url_parts or self._prefetched:
+            return
+        before = set(self.driver.window_handles)
+        try:
+            _pace("naver")
+            self.driver.execute_script(
+                "window.open(arguments[0], '_blank');", self._page_url(page_num)
+            )
+            opened = set(self.driver.window_handles) - before
+            if opened:
+                self._prefetched = (page_num, opened.pop())
+        except WebDriverException:
+            self._prefetched = None
+
+    def _discard_prefetch(self):
+        if not self._prefetched:
+            return
+        current = self.driver.current_window_handle
+        try:
+            self.driver.switch_to.window(self._prefetched[1])
+            self.driver.close()
+        except WebDriverException:
+            pass
+        self.driver.switch_to.window(current)
+        self._prefetched = None
+
+    def advance(self, page_num):
+        """
+        Move from page_num to the next page. Returns True once it is shown,
+        False on the last page, or None if the move failed.
+        """
+        target = page_num + 1
+        if self._prefetched and self._prefetched[0] == target:
+            if _naver_on_last_page(self.driver):
+                # The prefetched tab is past the end of the list
+                _notify_user(f"[Naver] Reached last page (page {page_num})", "info")
+                self._discard_prefetch()
+                return False
+            _, handle = self._prefetched
+            self._prefetched = None
+            try:
+                self.driver.close()
+                self.driver.switch_to.window(handle)
+                self.driver.execute_script(_NETWORK_TRACKER_SCRIPT)
+                # The tab may still be rendering: wait for its rows and for
+                # the requests it still has in flight
+                self.wait.until(lambda d: d.execute_script(_NAVER_PAGE_DATES_SCRIPT))
+                _wait_for_page_ready(self.driver, timeout=10)
+                return True
+            except WebDriverException:
+                return None
+
+        self._discard_prefetch()
+        moved = _goto_next_naver_page(self.driver, self.wait, page_num)
+        if moved and not self._url_parts:
+            self._learn(self.driver.current_url, target)
+        return moved
+
+    def _load(self, page_num):
+        """Open page_num in the current tab; returns its (newest, oldest) dates or None if empty."""
+        _pace("naver")
+        self.driver.get(self._page_url(page_num))
+        try:
+            texts = WebDriverWait(self.driver, 5, poll_frequency=0.2).until(
+                lambda d: d.execute_script(_NAVER_PAGE_DATES_SCRIPT)
+            )
+        except WebDriverException:
+            return None
+        return [_parse_naver_list_date(text) for text in texts]
+
+    def seek(self, page_num, end_date):
+        """
+        Jump from page_num, which is entirely newer than end_date, to the
+        first page holding a mail dated on or before end_date. Only the first
+        and last row dates of each probed page are read; an exponential probe
+        followed by a binary search costs O(log pages) page loads.
+        Returns the page number now shown, or None if there is no such page
+        or it could not be reached.
+        """
+        if not self._url_parts:
+            # The URL pattern is learned on the first click
+            return page_num + 1 if self.advance(page_num) else None
+        self._discard_prefetch()
+
+        def reached(dates):
+            # An empty page (past the end) or unparseable date ends the search
+            return dates is None or dates[1] is None or dates[1] <= end_date
+
+        lo, step = page_num, 1
+        hi = lo + step
+        probes = {hi: self._load(hi)}
+        while not reached(probes[hi]):
+            lo, step = hi, step * 2
+            hi = lo + step
+            probes[hi] = self._load(hi)
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            probes[mid] = self._load(mid)
+            if reached(probes[mid]):
+                hi = mid
+            else:
+                lo = mid
+
+        if probes[hi] is None:
+            # Past the last page: the oldest page may still end after end_date
+            return None
+        if self.driver.current_url != self._page_url(hi):
+            self._load(hi)
+        self.driver.execute_script(_NETWORK_TRACKER_SCRIPT)
+        _notify_user(
+            f"[Naver] Jumped to page {hi} after {len(probes)} page probes", "info"
+        )
+        return hi
+
+
+def _parse_naver_list_date(date_text):
+    """
+    Parse the date column of the Naver mail list.
+
+    Naver Mail date formats:
+      Today: "오후 03:32" (time only, no dot)
+      Past days: "01.30 16:25" (MM.DD HH:MM)
+    Returns a datetime.date, or None if the text is empty or unparseable.
+    """
+    date_text = (date_text or "").strip()
+    if not date_text:
+        return None
+    try:
+        match = re.search(r"(\d{2}\.\d{2})", date_text)
+        if match:
+            # "MM.DD HH:MM" format (e.g. "02.03 14:32")
+            return datetime.strptime(
+                f"{datetime.now().year}.{match.group(1)}", "%Y.%m.%d"
+            ).date()
+        # Time only (e.g. "오후 03:32") means today
+        return datetime.now().date()
+    except ValueError:
+        return None
 
 
-def fetch_naver_email(
-    headless=False, naver_id=None, naver_passkey=None, start_date=None, end_date=None
+def iter_naver_email(
+    headless=False,
+    naver_id=None,
+    naver_passkey=None,
+    start_date=None,
+    end_date=None,
+    backend="selenium",
+    use_cache=True,
+    outstanding=None,
+    directory=None,
 ):
     """
-    Fetches Naver email using Selenium WebDriver.
+    Streams Naver email using Selenium WebDriver (or IMAP, see backend),
+    yielding each EmailRecord as soon as it is extracted so callers can match
+    and display results while the rest of the mailbox is still being read.
     Parameters:
         headless (bool): Whether to run the browser in headless mode.
         naver_id (str): Naver login ID.
         naver_passkey (str): Naver login password or app password.
         start_date (datetime.date): Start date for email filtering (inclusive). Defaults to 7 days ago.
         end_date (datetime.date): End date for email filtering (inclusive). Defaults to today.
-    Returns:
-        list: List of dicts with sender, subject, content, and attachments from recent emails
-              Example: [{"sender": "example@naver.com", "subject": "Hello", "content": "...", "attachments": ["a.pdf"]}, ...]
+        backend (str): "selenium" (default) scrapes the web UI; "imap" uses
+            iter_naver_email_imap() and needs IMAP enabled on the account.
+        use_cache (bool): Serve already-ingested mails from the local MailStore and
+            only open mails newer than the stored watermark.
+        outstanding (set): Optional live set of student names still missing,
+            e.g. IncrementalMatcher.outstanding. Scanning stops as soon as it is
+            empty, mails whose list data shows they cannot change the result
+            (same sender+subject as one already yielded) are not opened, and
+            mails whose subject or sender name already mentions an outstanding
+            student are yielded from the list row without opening the body.
+        directory (SenderDirectory): Optional learned sender directory (the one
+            given to IncrementalMatcher). Mails from a sender known for one
+            outstanding student are yielded without opening. A sender is never
+            a reason to skip a mail: one whose mails named no student of the
+            selected classes may write about a class selected later.
+    Only the IMAP backend filters on the server (SINCE/BEFORE and UNSEEN).
+    The web list is read unfiltered and read rows are dropped client-side;
+    the date window bounds the scan by whole pages (see _NaverPager.seek()).
+    Yields:
+        EmailRecord: sender, subject, content, and attachments of each new email
     """
+    if backend == "imap":
+        yield from iter_naver_email_imap(
+            naver_id=naver_id,
+            naver_passkey=naver_passkey,
+            start_date=start_date,
+            end_date=end_date,
+            use_cache=use_cache,
+            outstanding=outstanding,
+        )
+        return
 
-    email_list = []
-
-    def _extract_attachment_names(driver):
-        names = set()
-
-        def _add_name(value):
-            if not value:
-                return
-            text = value.strip()
-            if not text:
-                return
-            text = text.splitlines()[0].strip()
-            if text:
-                names.add(text)
-
-        container_selectors = [
-            "div.mail_view_attachment_area",
-            "div.mail_view_attachment",
-            "div.attachment",
-            "div.file_area",
-            "div.file_attachments",
-            "div.file_attachments_inner",
-            "ul.mail_view_attachment_list",
-            "ul.attach_list",
-            "ul.file_list",
-            "li.file_item",
-        ]
-
-        # Note: span.text and span.file_extension are handled separately
-        # in the combined logic below, so they're not included here
-        name_selectors = [
-            "span.file_name",
-            "em.file_name",
-            "strong.file_name",
-            "span.filename",
-            "a.file_download",
-            "a.button_download",
-            "a.link_download",
-            "a[download]",
-        ]
-
-        elements = []
-        for selector in container_selectors:
-            try:
-                elements.extend(driver.find_elements(By.CSS_SELECTOR, selector))
-            except Exception:
-                continue
-
-        if elements:
-            for container in elements:
-                try:
-                    for item in container.find_elements(
-                        By.CSS_SELECTOR, "li.file_item"
-                    ):
-                        base = None
-                        ext = None
-                        try:
-                            base_elem = item.find_element(
-                                By.CSS_SELECTOR, "strong.file_title span.text"
-                            )
-                            base = base_elem.text.strip()
-                        except Exception:
-                            base = None
-                        try:
-                            ext_elem = item.find_element(
-                                By.CSS_SELECTOR, "strong.file_title span.file_extension"
-                            )
-                            ext = ext_elem.text.strip()
-                        except Exception:
-                            ext = None
-
-                        if base and ext:
-                            _add_name(f"{base}{ext}")
-                        elif base:
-                            _add_name(base)
-                except Exception:
-                    pass
+    def _all_found():
+        return outstanding is not None and not outstanding
 
-                for selector in name_selectors:
-                    try:
-                        for elem in container.find_elements(By.CSS_SELECTOR, selector):
-                            _add_name(elem.text)
-                            _add_name(elem.get_attribute("title"))
-                            _add_name(elem.get_attribute("download"))
-                            _add_name(elem.get_attribute("aria-label"))
-                            _add_name(elem.get_attribute("data-file-name"))
-                            _add_name(elem.get_attribute("data-filename"))
-                            _add_name(elem.get_attribute("data-name"))
-                    except Exception:
-                        continue
-        else:
-            for selector in name_selectors:
-                try:
-                    for elem in driver.find_elements(By.CSS_SELECTOR, selector):
-                        _add_name(elem.text)
-                        _add_name(elem.get_attribute("title"))
-                        _add_name(elem.get_attribute("download"))
-                        _add_name(elem.get_attribute("aria-label"))
-                        _add_name(elem.get_attribute("data-file-name"))
-                        _add_name(elem.get_attribute("data-filename"))
-                        _add_name(elem.get_attribute("data-name"))
-                except Exception:
-                    continue
+    emails = EmailIndex()
 
-        return sorted(names)
+    def _add_email(record):
+        # Skip duplicates based on mail id or sender+subject combination
+        if not emails.add(record):
+            return False
+        _notify_user(f"[Naver]   • {record.sender}: {record.subject}", "info")
+        return True
 
     # Step 1: Login to Naver using the reusable function
     driver = login_naver_selenium(
@@ -746,32 +3101,29 @@ def fetch_naver_email(
         raise RuntimeError("Naver login failed. Check your ID and password.")
 
     wait = WebDriverWait(driver, 10)
+    store = MailStore() if use_cache else None
 
     try:
-        # Add random delay to appear more human-like
-        time.sleep(random.uniform(1.5, 2.0))
-
         # Step 2: Navigate to Naver Mail
         _notify_user("[Naver] Navigating to mail...", "info")
+        _pace("naver")
         driver.get("https://mail.naver.com/")
 
-        # Random delay after navigation
-        time.sleep(random.uniform(1.5, 2.0))
-
         # Wait for mail list to load (using actual Naver Mail structure)
         wait.until(
             EC.presence_of_element_located(
                 (By.CSS_SELECTOR, "ol.mail_list, #mail_list_wrap, li.mail_item")
             )
         )
+        driver.execute_script(_NETWORK_TRACKER_SCRIPT)
 
         # Ensure we're on '전체메일' (some accounts default to '받은메일함')
         try:
             all_mail_link = driver.find_element(
                 By.CSS_SELECTOR, "a.mailbox_label[title='전체메일']"
             )
-            all_mail_link.click()
-            time.sleep(random.uniform(1.5, 2.5))  # to avoid bot detection
+            _pace("naver")  # to avoid bot detection
+            _run_and_wait_idle(driver, "arguments[0].click();", all_mail_link)
             wait.until(
                 EC.presence_of_element_located(
                     (By.CSS_SELECTOR, "ol.mail_list, #mail_list_wrap, li.mail_item")
@@ -783,10 +3135,14 @@ def fetch_naver_email(
                 "warning",
             )
 
-        # Add another small random delay before extracting
-        time.sleep(random.uniform(0.5, 1.5))
+        # List as many rows per page as the UI allows. The mailbox's own
+        # unread-only view is not used: opened rows would drop out of it when
+        # the list reloads, and the bulk 안읽음 restore could no longer find
+        # them on the page. Read rows are filtered client-side instead.
+        _maximize_naver_page_size(driver, wait)
+        pager = _NaverPager(driver, wait)
 
-        # Step 3: Extract email subjects (only unread emails via CSS selector)
+        # Step 3: Extract email subjects (only unread emails)
         _notify_user("[Naver] Fetching emails...", "info")
 
         # Keep track of all processed email IDs across pages
@@ -798,338 +3154,913 @@ def fetch_naver_email(
             end_date = datetime.now().date()
         _notify_user(f"[Naver] Fetching emails from {start_date} to {end_date}", "info")
         date_limit_reached = False
+        all_found = False
+        # Set only on reaching the last page, the start date or the watermark;
+        # a list that failed to load or move on leaves the scan incomplete
+        scan_complete = False
         page_num = 1
 
-        while True:
-            # Get unread mail items on current page
-            mail_items = driver.find_elements(
-                By.CSS_SELECTOR, "li.mail_item:not(.read)"
+        # Incremental sync: mails at or below the watermark are served from disk
+        account = f"web:{naver_id or _get_secret('NAVER_ID', os.getenv('NAVER_ID'))}"
+        sync_state = store.get_sync_state(account) if store else None
+        incremental = bool(sync_state) and sync_state["covered_from"] <= start_date
+        watermark = sync_state["last_uid"] if sync_state else 0
+        max_mail_num = 0
+        min_unstored_num = None  # lowest mail not stored with its body
+        watermark_reached = False
+        if incremental:
+            _notify_user(
+                f"[Naver] Incremental sync: opening only mails newer than mail-{watermark}",
+                "info",
             )
 
-            if not mail_items:
+        while True:
+            # One round trip: every row on the page as plain data. The sender
+            # and subject fallbacks go from specific to broad, so they are
+            # always tried in their given order (not SelectorRegistry order)
+            rows = (
+                driver.execute_script(
+                    _NAVER_LIST_SCRIPT,
+                    NAVER_SENDER_SELECTORS,
+                    NAVER_SUBJECT_SELECTORS,
+                )
+                or []
+            )
+            if not rows:
                 if page_num == 1:
                     _notify_user("[Naver] ⚠️ No unread mail items found", "warning")
                 break
 
+            # The list is newest first: decide on whole pages from their dates
+            page_dates = [
+                d for d in (_parse_naver_list_date(row["date"]) for row in rows) if d
+            ]
+            if page_dates and max(page_dates) < start_date:
+                _notify_user(
+                    f"[Naver] Page {page_num} is older than start date, stopping",
+                    "info",
+                )
+                scan_complete = True
+                break
+
+            if page_dates and min(page_dates) > end_date:
+                _notify_user(
+                    f"[Naver] Page {page_num} is newer than end date, seeking",
+                    "info",
+                )
+                next_page = pager.seek(page_num, end_date)
+                if not next_page:
+                    break
+                page_num = next_page
+                continue
+
+            # Load the next page in the background while this one is processed
+            pager.prefetch(page_num + 1)
+
+            # Only unread mails are candidates
+            unread_rows = [row for row in rows if not row["read"]]
             _notify_user(
-                f"[Naver] Page {page_num}: Found {len(mail_items)} unread mail items",
+                f"[Naver] Page {page_num}: Found {len(unread_rows)} unread mail items",
                 "info",
             )
 
             page_mail_ids = []
-
-            for mail_item in mail_items:
-                try:
-                    # Check email date — skip if older than date_limit
-                    # Naver Mail date formats:
-                    #   Today: "오후 03:32" (time only, no dot)
-                    #   Past days: "01.30 16:25" (MM.DD HH:MM)
-                    try:
-                        date_elem = mail_item.find_element(
-                            By.CSS_SELECTOR, "div.mail_date_wrap span.mail_date"
+            try:
+                for row in unread_rows:
+                    mail_num = 0
+                    if _all_found():
+                        _notify_user(
+                            "[Naver] ✅ All students found, stopping mail scan", "info"
                         )
-                        date_text = (
-                            date_elem.text
-                            or date_elem.get_attribute("textContent")
-                            or ""
-                        ).strip()
-                        if re.search(r"\d{2}\.\d{2}", date_text):
-                            # "MM.DD HH:MM" format (e.g. "02.03 14:32")
-                            date_part = re.search(r"(\d{2}\.\d{2})", date_text).group(1)
-                            mail_date = datetime.strptime(
-                                f"{datetime.now().year}.{date_part}", "%Y.%m.%d"
-                            ).date()
-                        else:
-                            # Time only (e.g. "오후 03:32") means today
-                            mail_date = datetime.now().date()
-                        if mail_date < start_date:
+                        all_found = True
+                        break
+                    try:
+                        # Check email date — skip if older than date_limit
+                        # (if date extraction fails, process the email anyway)
+                        mail_date = _parse_naver_list_date(row["date"])
+                        if mail_date is not None:
+                            if mail_date < start_date:
+                                _notify_user(
+                                    f"[Naver] Reached emails older than start date ({row['date']}), stopping",
+                                    "info",
+                                )
+                                date_limit_reached = True
+                                break
+                            if mail_date > end_date:
+                                continue  # Skip emails newer than end_date
+
+                        # Mail ID from the class attribute (e.g., "mail-25317")
+                        mail_id = row["mail_id"]
+
+                        if mail_id and mail_id[len("mail-") :].isdigit():
+                            mail_num = int(mail_id[len("mail-") :])
+                        if incremental and mail_num and mail_num <= watermark:
                             _notify_user(
-                                f"[Naver] Reached emails older than start date ({date_text}), stopping",
+                                f"[Naver] Reached already-synced mail ({mail_id}), using cache for the rest",
                                 "info",
                             )
-                            date_limit_reached = True
+                            watermark_reached = True
                             break
-                        if mail_date > end_date:
-                            continue  # Skip emails newer than end_date
-                    except Exception:
-                        pass  # If date extraction fails, process the email anyway
-
-                    # Get the mail ID from the class attribute (e.g., "mail-25317")
-                    mail_id = None
-                    class_attr = mail_item.get_attribute("class")
-                    if class_attr:
-                        for cls in class_attr.split():
-                            if cls.startswith("mail-"):
-                                mail_id = cls
-                                break
-                    # Extract sender (from actual Naver Mail HTML structure)
-                    sender = None
-                    try:
-                        # First try button.button_sender with title attribute
-                        sender_elem = mail_item.find_element(
-                            By.CSS_SELECTOR, "button.button_sender"
+                        max_mail_num = max(max_mail_num, mail_num)
+
+                        cached = (
+                            store.get(account, mail_id) if store and mail_id else None
                         )
-                        if sender_elem:
-                            # Get sender from title attribute (contains email)
-                            sender = sender_elem.get_attribute("title")
-                            if sender:
-                                sender = sender.strip().strip(
-                                    "<>"
-                                )  # Remove < > brackets if present
-                    except Exception:
-                        # Fallback to other selectors
-                        sender_selectors = [
-                            "div.mail_sender",
-                            "button.toggle_conversation_mail",
-                            "span.mail_sender",
-                            "[class*='sender']",
-                        ]
-                        for selector in sender_selectors:
-                            try:
-                                sender_elem = mail_item.find_element(
-                                    By.CSS_SELECTOR, selector
+                        if cached:
+                            if _add_email(cached):
+                                yield cached
+                            continue
+
+                        sender = row["sender"]
+                        subject = row["subject"]
+                        sender_name = row.get("sender_name") or ""
+
+                        # A duplicate sender+subject would be dropped anyway
+                        if emails.seen(sender or "Unknown", subject or "(no subject)"):
+                            continue
+
+                        # The list row already names a missing student, or the
+                        # sender is known for one: the body cannot change the
+                        # result, so the mail is left unopened
+                        known = (
+                            directory.student_for(sender)
+                            if directory and outstanding is not None
+                            else None
+                        )
+                        if known in (outstanding or ()) or _mentions_outstanding(
+                            outstanding, subject, sender_name
+                        ):
+                            if mail_num:
+                                min_unstored_num = min(
+                                    min_unstored_num or mail_num, mail_num
                                 )
-                                if sender_elem and sender_elem.text.strip():
-                                    sender = sender_elem.text.strip()
-                                    # Clean up sender text (remove date if present)
-                                    sender_lines = [
-                                        line.strip()
-                                        for line in sender.split("\n")
-                                        if line.strip()
-                                    ]
-                                    if sender_lines:
-                                        # Take first line that doesn't look like a date (format: 01-21)
-                                        for line in sender_lines:
-                                            if (
-                                                not line.replace("-", "")
-                                                .replace(".", "")
-                                                .isdigit()
-                                            ):
-                                                sender = line
-                                                break
-                                    break
-                            except Exception:
-                                continue
-
-                    # Extract subject
-                    subject = None
-                    subject_selectors = [
-                        "div.mail_title span.text",  # Actual subject text element
-                        "a.mail_title_link span.text",  # Alternative path to subject
-                        "div.mail_title",
-                        "span.mail_title",
-                        "strong.mail_title",
-                        "div.mail_inner",
-                        "a.mail_subject",
-                        "span.subject",
-                        "[class*='subject']",
-                        "[class*='title']",
-                    ]
-
-                    for selector in subject_selectors:
-                        try:
-                            subject_elem = mail_item.find_element(
-                                By.CSS_SELECTOR, selector
+                            record = EmailRecord(
+                                sender=sender if sender else "Unknown",
+                                subject=subject if subject else "(no subject)",
+                                mail_id=mail_id,
+                                mail_date=mail_date,
+                                sender_name=sender_name,
                             )
-                            if subject_elem and subject_elem.text.strip():
-                                subject = subject_elem.text.strip()
-                                # Split by newlines and take first non-empty line
-                                subject_lines = [
-                                    line.strip()
-                                    for line in subject.split("\n")
-                                    if line.strip()
-                                ]
-                                if subject_lines:
-                                    subject = subject_lines[0]
-                                break
-                        except Exception:
+                            normalize_email(record)
+                            if _add_email(record):
+                                yield record
                             continue
 
-                    # Extract email content by clicking and reading
-                    content = None
-                    attachments = []
-                    try:
-                        # Click on the email title link to open the email
-                        title_link = mail_item.find_element(
-                            By.CSS_SELECTOR, "a.mail_title_link"
-                        )
-                        title_link.click()
-
-                        # Wait for email content to load
-                        time.sleep(random.uniform(1.0, 2.0))
-                        wait.until(
-                            EC.presence_of_element_located(
-                                (
-                                    By.CSS_SELECTOR,
-                                    "div.mail_view_contents_inner, div.mail_view_contents",
+                        # Extract email content by clicking and reading
+                        content = None
+                        attachments = []
+                        opened = False
+                        try:
+                            # Click on the email title link to open the email
+                            if mail_id:
+                                title_link = driver.find_element(
+                                    By.CSS_SELECTOR, f"li.{mail_id} a.mail_title_link"
+                                )
+                            else:
+                                title_link = driver.find_elements(
+                                    By.CSS_SELECTOR, "li.mail_item"
+                                )[row["index"]].find_element(
+                                    By.CSS_SELECTOR, "a.mail_title_link"
+                                )
+                                # Rows have no id: make sure the list did not
+                                # shift under the index since it was read
+                                if subject and subject not in title_link.text:
+                                    raise LookupError("mail list changed")
+                            _pace("naver")
+                            title_link.click()
+
+                            # Wait for email content to load
+                            wait.until(
+                                EC.presence_of_element_located(
+                                    (
+                                        By.CSS_SELECTOR,
+                                        "div.mail_view_contents_inner, div.mail_view_contents",
+                                    )
                                 )
                             )
-                        )
 
-                        # Extract content
-                        content_selectors = [
-                            "div.mail_view_contents_inner",
-                            "div.mail_view_contents",
-                        ]
-                        for content_selector in content_selectors:
-                            try:
-                                content_elem = driver.find_element(
-                                    By.CSS_SELECTOR, content_selector
+                            # Body text and attachment names in one round trip
+                            view = driver.execute_script(_NAVER_VIEW_SCRIPT) or {}
+                            content = view.get("content") or None
+                            attachments = view.get("attachments") or []
+                            opened = True
+
+                            # Go back to mail list
+                            _pace("naver")
+                            driver.back()
+
+                            # Wait for the mail view to go away and the list to reload
+                            wait.until(
+                                EC.invisibility_of_element_located(
+                                    (By.CSS_SELECTOR, "div.mail_view_contents")
+                                )
+                            )
+                            wait.until(
+                                EC.presence_of_element_located(
+                                    (By.CSS_SELECTOR, "ul.mail_list, li.mail_item")
                                 )
-                                if content_elem and content_elem.text.strip():
-                                    content = content_elem.text.strip()
-                                    break
+                            )
+
+                        except Exception as e:
+                            _notify_user(
+                                f"[Naver] ⚠️ Could not fetch content: {type(e).__name__}",
+                                "warning",
+                            )
+                            # Try to go back if we're stuck
+                            try:
+                                driver.back()
+                                _wait_for_page_ready(driver, timeout=5)
                             except Exception:
-                                continue
+                                pass
 
-                        attachments = _extract_attachment_names(driver)
+                        # Track mail_id for unread revert (email was opened regardless of content)
+                        if mail_id:
+                            page_mail_ids.append(mail_id)
 
-                        # Go back to mail list
-                        driver.back()
-                        time.sleep(random.uniform(1.0, 2.0))
+                        # A mail whose open failed is retried on the next run
+                        if not opened and mail_num:
+                            min_unstored_num = min(
+                                min_unstored_num or mail_num, mail_num
+                            )
 
-                        # Wait for mail list to reload
-                        wait.until(
-                            EC.presence_of_element_located(
-                                (By.CSS_SELECTOR, "ul.mail_list, li.mail_item")
+                        # Add to list if we have subject, content, or attachments
+                        if subject or content or attachments:
+                            record = EmailRecord(
+                                sender=sender if sender else "Unknown",
+                                subject=subject if subject else "(no subject)",
+                                content=content if content else "",
+                                attachments=attachments,
+                                mail_id=mail_id,
+                                mail_date=mail_date,
+                                sender_name=sender_name,
                             )
-                        )
+                            normalize_email(record)
+                            if store and mail_id and opened:
+                                store.put(account, record)
+                            if _add_email(record):
+                                yield record
 
                     except Exception as e:
                         _notify_user(
-                            f"[Naver] ⚠️ Could not fetch content: {type(e).__name__}",
+                            f"[Naver] ⚠️ Could not extract email: {type(e).__name__}",
                             "warning",
                         )
-                        # Try to go back if we're stuck
-                        try:
-                            driver.back()
-                            time.sleep(1.0)
-                        except Exception:
-                            pass
-
-                    # Track mail_id for unread revert (email was opened regardless of content)
-                    if mail_id:
-                        page_mail_ids.append(mail_id)
-
-                    # Add to list if we have subject, content, or attachments
-                    if subject or content or attachments:
-                        email_data = {
-                            "sender": sender if sender else "Unknown",
-                            "subject": subject if subject else "(no subject)",
-                            "content": content if content else "",
-                            "attachments": attachments,
-                        }
-                        # Check for duplicates based on sender+subject combination
-                        is_duplicate = any(
-                            e["sender"] == email_data["sender"]
-                            and e["subject"] == email_data["subject"]
-                            for e in email_list
-                        )
-                        if not is_duplicate:
-                            email_list.append(email_data)
-                            _notify_user(
-                                f"[Naver]   • {sender if sender else 'Unknown'}: {subject if subject else '(no subject)'}",
-                                "info",
+                        if mail_num:
+                            min_unstored_num = min(
+                                min_unstored_num or mail_num, mail_num
                             )
+                        continue
+            finally:
+                # Restore this page's opened emails to unread in one bulk action,
+                # also when the consumer stops early and closes this generator
+                if page_mail_ids:
+                    _restore_unread(driver, wait, page_mail_ids)
+                    processed_mail_ids.extend(page_mail_ids)
+
+            # Stop if date limit or sync watermark was reached, or nobody is missing
+            if _all_found():
+                all_found = True
+            if date_limit_reached or watermark_reached:
+                scan_complete = True
+                break
+            if all_found:
+                break
 
-                except Exception as e:
+            moved = pager.advance(page_num)
+            if not moved:
+                if moved is None:
                     _notify_user(
-                        f"[Naver] ⚠️ Could not extract email: {type(e).__name__}",
+                        f"[Naver] ⚠️ Could not move past page {page_num}, "
+                        "older mails will be read again next run",
                         "warning",
                     )
-                    continue
+                scan_complete = moved is False
+                break
+            page_num += 1
 
-            # Mark this page's processed emails as unread before moving on
-            if page_mail_ids:
-                _notify_user(
-                    f"[Naver] Selecting {len(page_mail_ids)} emails on page {page_num}...",
-                    "info",
-                )
-                checked_count = 0
-                for mail_id in page_mail_ids:
-                    try:
-                        mail_item = driver.find_element(
-                            By.CSS_SELECTOR, f"li.{mail_id}"
-                        )
-                        checkbox = mail_item.find_element(
-                            By.CSS_SELECTOR, "label[role='checkbox']"
-                        )
-                        if checkbox.get_attribute("aria-checked") != "true":
-                            checkbox.click()
-                            time.sleep(random.uniform(0.2, 0.4))
-                        checked_count += 1
-                    except Exception as e:
-                        _notify_user(
-                            f"[Naver] ⚠️ Could not check {mail_id}: {type(e).__name__}",
-                            "warning",
-                        )
+        if incremental:
+            for record in store.in_range(account, start_date, end_date):
+                if _all_found():
+                    break
+                if _add_email(record):
+                    yield record
+
+        # Advance the watermark only when the window reaches the present and
+        # was scanned down to its end, otherwise unread mails would be skipped
+        # next run. Mails that were not stored (left unopened, skipped, or
+        # whose open failed) have no cached copy, so it stays below them.
+        if store and end_date >= datetime.now().date() and scan_complete:
+            new_watermark = max_mail_num
+            if min_unstored_num is not None:
+                new_watermark = min(new_watermark, min_unstored_num - 1)
+            store.set_sync_state(
+                account,
+                None,
+                max(watermark, new_watermark),
+                min(sync_state["covered_from"], start_date)
+                if incremental
+                else start_date,
+            )
 
-                if checked_count > 0:
-                    _notify_user(
-                        f"[Naver] Marking {checked_count} emails as unread...", "info"
-                    )
-                    try:
-                        unread_button = wait.until(
-                            EC.element_to_be_clickable(
-                                (
-                                    By.XPATH,
-                                    "//button[contains(@class, 'button_task') and normalize-space(.)='안읽음']",
-                                )
-                            )
-                        )
-                        unread_button.click()
-                        time.sleep(random.uniform(0.5, 1.0))
-                        _notify_user("[Naver] ✅ Marked emails as unread", "success")
-                    except Exception as e:
-                        _notify_user(
-                            f"[Naver] ⚠️ Could not mark as unread: {type(e).__name__}",
-                            "warning",
-                        )
+        _notify_user(
+            f"[Naver] ✅ Fetched {len(emails)} emails "
+            f"({len(processed_mail_ids)} opened and restored to unread)",
+            "success",
+        )
+
+    except Exception as e:
+        _notify_user(f"[Naver] ❌ Error: {e}", "error")
+        driver.save_screenshot("naver_email_error.png")
+    finally:
+        release_driver(driver)
+        if store:
+            store.close()
 
-                processed_mail_ids.extend(page_mail_ids)
 
-            # Stop if date limit was reached
-            if date_limit_reached:
-                break
+class MailPrefetch:
+    """
+    Runs iter_naver_email() in a background thread before the roster is
+    known, so the Naver login (including any 2FA prompt) and mail listing
+    overlap with the user choosing classes. Mails are buffered; stream()
+    replays them and then follows the live fetch, and from then on the
+    matcher's outstanding set drives early stopping and lazy opening.
+    """
+
+    # Keeps the shared set non-empty (no early stop) until a matcher attaches
+    _PENDING = "\0pending"
+
+    def __init__(self, **fetch_kwargs):
+        self.params = fetch_kwargs
+        self._outstanding = {self._PENDING}
+        self._items = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            for record in iter_naver_email(outstanding=self._outstanding, **self.params):
+                self._items.put(record)
+        except Exception as e:
+            self._items.put(e)
+        finally:
+            self._items.put(None)
+
+    def matches(self, **fetch_kwargs):
+        """True if this prefetch was started with the given iter_naver_email() arguments."""
+        return all(self.params.get(key) == value for key, value in fetch_kwargs.items())
+
+    def cancel(self):
+        """
+        Stop the background fetch at its next mail and wait for it to return
+        its browser to the pool, so a following fetch on the same profile
+        does not start a second Chrome. Login cannot be interrupted.
+        """
+        self._outstanding.clear()
+        self._thread.join()
+
+    def close(self):
+        """Cancel an unused prefetch and close the SenderDirectory it was given."""
+        self.cancel()
+        directory = self.params.get("directory")
+        if directory is not None:
+            directory.close()
+
+    def stream(self, matcher):
+        """Yield the prefetched and remaining mails, as iter_naver_email() would."""
+        self._outstanding.update(matcher.outstanding)
+        self._outstanding.discard(self._PENDING)
+        try:
+            while not matcher.done:
+                item = self._items.get()
+                if item is None:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+                self._outstanding.intersection_update(matcher.outstanding)
+        finally:
+            self.cancel()
+
+
+def fetch_naver_email(
+    headless=False,
+    naver_id=None,
+    naver_passkey=None,
+    start_date=None,
+    end_date=None,
+    backend="selenium",
+    use_cache=True,
+    outstanding=None,
+    directory=None,
+):
+    """
+    Fetches Naver email into a list. See iter_naver_email() for the
+    parameters; use that generator directly to process mails as they arrive.
+    Returns:
+        list: EmailRecords with sender, subject, content, and attachments from recent emails
+              Example: [EmailRecord(sender="example@naver.com", subject="Hello", content="...", attachments=["a.pdf"], ...), ...]
+    """
+    return list(
+        iter_naver_email(
+            headless=headless,
+            naver_id=naver_id,
+            naver_passkey=naver_passkey,
+            start_date=start_date,
+            end_date=end_date,
+            backend=backend,
+            use_cache=use_cache,
+            outstanding=outstanding,
+            directory=directory,
+        )
+    )
+
+
+# Messages per IMAP FETCH round trip
+IMAP_FETCH_BATCH_SIZE = 50
+# Most bytes of a mail's text part fetched over IMAP (bodies are cut to
+# MAX_SCANNED_BODY_CHARS anyway, so there is no need to download more)
+IMAP_MAX_TEXT_BYTES = 64 * 1024
+# Folders never searched for homework, by SPECIAL-USE flag or by name
+IMAP_SKIP_FOLDER_FLAGS = {"\\noselect", "\\sent", "\\drafts", "\\trash", "\\junk"}
+IMAP_SKIP_FOLDER_NAMES = {
+    "sent messages",
+    "drafts",
+    "deleted messages",
+    "junk",
+    "spam",
+    "trash",
+    "보낸메일함",
+    "임시보관함",
+    "휴지통",
+    "스팸메일함",
+}
+
+
+def _html_to_text(value):
+    """Crude HTML -> text conversion for mails without a text/plain part."""
+    if not value:
+        return ""
+    text = re.sub(r"(?is)<(script|style).*?</\1>", " ", value)
+    text = re.sub(r"(?i)<br\s*/?>|</p>|</div>", "\n", text)
+    text = re.sub(r"<[^>]+>", " ", text)
+    text = html.unescape(text)
+    return "\n".join(line.strip() for line in text.splitlines() if line.strip())
+
+
+_IMAP_TOKEN_RE = re.compile(rb'\s*(?:(\()|(\))|"((?:[^"\\]|\\.)*)"|([^\s()"]+))')
+_IMAP_LITERAL_RE = re.compile(rb"\s*\{\d+\}$")
+
+
+def _imap_fetch_items(data):
+    """
+    Parse imaplib FETCH response data into one {ITEM: value} dict per message.
+    Parenthesized lists become Python lists, NIL becomes None, and strings,
+    atoms and literals stay bytes.
+    """
+    stack = [[]]
+
+    def _feed(chunk):
+        for match in _IMAP_TOKEN_RE.finditer(chunk):
+            opening, closing, quoted, atom = match.groups()
+            if opening:
+                stack.append([])
+            elif closing:
+                if len(stack) > 1:
+                    inner = stack.pop()
+                    stack[-1].append(inner)
+            elif quoted is not None:
+                stack[-1].append(re.sub(rb"\\(.)", rb"\1", quoted))
+            elif atom.upper() == b"NIL":
+                stack[-1].append(None)
+            else:
+                stack[-1].append(atom)
+
+    for item in data:
+        if isinstance(item, tuple):
+            head, literal = item
+            _feed(_IMAP_LITERAL_RE.sub(b"", head))
+            stack[-1].append(literal)
+        elif item:
+            _feed(item)
+
+    messages = []
+    for value in stack[0]:
+        if isinstance(value, list):
+            messages.append(
+                {
+                    _imap_str(value[i]).upper(): value[i + 1]
+                    for i in range(0, len(value) - 1, 2)
+                    if isinstance(value[i], bytes)
+                }
+            )
+    return messages
+
+
+def _imap_str(value):
+    return value.decode("utf-8", "replace") if isinstance(value, bytes) else ""
+
+
+def _imap_params(values):
+    """BODYSTRUCTURE parameter list -> {lowercase name: value}."""
+    if not isinstance(values, list):
+        return {}
+    return {
+        _imap_str(values[i]).lower(): _imap_str(values[i + 1])
+        for i in range(0, len(values) - 1, 2)
+    }
+
 
-            # Try to go to the next page
+def _imap_filename(params):
+    """Decoded attachment filename from Content-Type/-Disposition params, or ""."""
+    for key in ("filename*", "name*"):
+        if params.get(key):
+            charset, _, value = email.utils.decode_rfc2231(params[key])
+            return unquote(value, encoding=charset or "utf-8", errors="replace")
+    for key in ("filename", "name"):
+        if params.get(key):
             try:
-                next_btn = driver.find_element(
-                    By.CSS_SELECTOR, "button.button_next#next-page"
-                )
-                if next_btn.get_attribute("disabled") is not None:
-                    _notify_user(f"[Naver] Reached last page (page {page_num})", "info")
+                return str(make_header(decode_header(params[key])))
+            except (LookupError, ValueError):
+                return params[key]
+    return ""
+
+
+def _imap_leaf_parts(structure, section=""):
+    """Yield (section, part) for every non-multipart part of a BODYSTRUCTURE."""
+    if structure and isinstance(structure[0], list):
+        children = [child for child in structure if isinstance(child, list)]
+        for index, child in enumerate(children, 1):
+            yield from _imap_leaf_parts(
+                child, f"{section}.{index}" if section else str(index)
+            )
+    elif structure:
+        yield section or "1", structure
+
+
+def _imap_layout(structure):
+    """
+    Read a BODYSTRUCTURE without downloading the message.
+
+    Returns:
+        tuple: ((section, part) of the text/plain part, else the text/html
+            part, or None; sorted attachment filenames)
+    """
+    text_part = html_part = None
+    names = set()
+    for section, part in _imap_leaf_parts(structure):
+        if len(part) < 7:
+            continue
+        ctype = f"{_imap_str(part[0])}/{_imap_str(part[1])}".lower()
+        # Extension data follows the type-specific fields
+        if ctype.startswith("text/"):
+            disposition_at = 9
+        elif ctype == "message/rfc822":
+            disposition_at = 11
+        else:
+            disposition_at = 8
+        disposition = part[disposition_at] if len(part) > disposition_at else None
+        attached = False
+        disposition_params = {}
+        if isinstance(disposition, list) and disposition:
+            attached = _imap_str(disposition[0]).lower() == "attachment"
+            if len(disposition) > 1:
+                disposition_params = _imap_params(disposition[1])
+        name = _imap_filename(disposition_params) or _imap_filename(
+            _imap_params(part[2])
+        )
+        if name:
+            names.add(name.strip())
+        elif attached:
+            continue
+        elif ctype == "text/plain" and text_part is None:
+            text_part = (section, part)
+        elif ctype == "text/html" and html_part is None:
+            html_part = (section, part)
+    return text_part or html_part, sorted(names)
+
+
+def _imap_decode_text(raw, part):
+    """Decode a (possibly truncated) text part fetched with BODY.PEEK[n]."""
+    encoding = _imap_str(part[5]).lower()
+    try:
+        if encoding == "base64":
+            raw = re.sub(rb"\s+", b"", raw)
+            raw = base64.b64decode(raw[: len(raw) // 4 * 4])
+        elif encoding == "quoted-printable":
+            raw = quopri.decodestring(raw)
+    except ValueError:
+        pass
+    charset = _imap_params(part[2]).get("charset") or "utf-8"
+    try:
+        text = raw.decode(charset, "replace")
+    except LookupError:
+        text = raw.decode("utf-8", "replace")
+    if _imap_str(part[1]).lower() == "html":
+        return _html_to_text(text)
+    return text.strip()
+
+
+def _imap_headers(raw):
+    """(sender address, sender name, subject, date) from a BODY[HEADER] literal."""
+    message = BytesHeaderParser(policy=email.policy.default).parsebytes(raw or b"")
+    sender = name = subject = ""
+    sent = None
+    try:
+        addresses = message["from"].addresses if message["from"] else ()
+        if addresses:
+            sender, name = addresses[0].addr_spec, addresses[0].display_name
+    except (AttributeError, IndexError, ValueError):
+        sender = str(message.get("from", ""))
+    try:
+        subject = str(message["subject"] or "")
+    except (IndexError, ValueError):
+        pass
+    try:
+        sent = message["date"].datetime.date() if message["date"] else None
+    except (AttributeError, IndexError, ValueError):
+        pass
+    return sender.strip().strip("<>"), (name or "").strip(), subject.strip(), sent
+
+
+def _imap_search_folders(mailbox):
+    """
+    Folders to search: the server's \\All folder when it has one (like the
+    web's 전체메일), else every selectable folder except sent, drafts, trash
+    and spam, because Naver filters can file homework outside INBOX.
+    """
+    folders = mailbox.folder.list()
+    for info in folders:
+        if "\\all" in {flag.lower() for flag in info.flags}:
+            return [info.name]
+    names = []
+    for info in folders:
+        flags = {flag.lower() for flag in info.flags}
+        if flags & IMAP_SKIP_FOLDER_FLAGS:
+            continue
+        if info.name.lower() in IMAP_SKIP_FOLDER_NAMES:
+            continue
+        names.append(info.name)
+    return names or ["INBOX"]
+
+
+def _iter_imap_folder(mailbox, folder, uids):
+    """
+    Yield (uid, EmailRecord) for the given UIDs of the selected folder, in
+    the given order; the record is None for a mail the server did not return.
+    Mails without subject, body or attachments are left out. Each batch costs two FETCH round trips: BODYSTRUCTURE
+    plus headers first, then only the text part of each mail (capped at
+    IMAP_MAX_TEXT_BYTES), so attachments are known by name but never
+    downloaded. BODY.PEEK leaves \\Seen untouched.
+    """
+    for offset in range(0, len(uids), IMAP_FETCH_BATCH_SIZE):
+        batch = uids[offset : offset + IMAP_FETCH_BATCH_SIZE]
+        typ, data = mailbox.client.uid(
+            "FETCH",
+            ",".join(str(uid) for uid in batch),
+            "(UID BODYSTRUCTURE BODY.PEEK[HEADER])",
+        )
+        if typ != "OK":
+            raise RuntimeError(f"IMAP FETCH failed in {folder}: {data}")
+        heads = {}
+        for item in _imap_fetch_items(data):
+            if item.get("UID") and "BODYSTRUCTURE" in item:
+                heads[int(item["UID"])] = item
+
+        # Mails sharing a text part section are fetched together
+        sections = {}
+        for uid, item in heads.items():
+            text_part, _ = _imap_layout(item["BODYSTRUCTURE"])
+            if text_part:
+                sections.setdefault(text_part[0], []).append(uid)
+        texts = {}
+        for section, section_uids in sections.items():
+            typ, data = mailbox.client.uid(
+                "FETCH",
+                ",".join(str(uid) for uid in section_uids),
+                f"(UID BODY.PEEK[{section}]<0.{IMAP_MAX_TEXT_BYTES}>)",
+            )
+            if typ != "OK":
+                continue
+            for item in _imap_fetch_items(data):
+                for key, value in item.items():
+                    if key.startswith(f"BODY[{section}]") and item.get("UID"):
+                        texts[int(item["UID"])] = value or b""
+
+        for uid in batch:
+            item = heads.get(uid)
+            if item is None:
+                yield uid, None
+                continue
+            text_part, attachments = _imap_layout(item["BODYSTRUCTURE"])
+            sender, sender_name, subject, sent = _imap_headers(item.get("BODY[HEADER]"))
+            content = ""
+            if text_part and uid in texts:
+                content = _imap_decode_text(texts[uid], text_part[1])
+            if not (subject or content or attachments):
+                continue
+            record = EmailRecord(
+                sender=sender if sender else "Unknown",
+                subject=subject if subject else "(no subject)",
+                content=content,
+                attachments=attachments,
+                mail_id=f"uid:{uid}@{folder}",
+                mail_date=sent,
+                sender_name=sender_name,
+            )
+            yield uid, normalize_email(record)
+
+
+def iter_naver_email_imap(
+    naver_id=None,
+    naver_passkey=None,
+    start_date=None,
+    end_date=None,
+    imap_server=None,
+    imap_port=None,
+    imap_ssl=True,
+    folder=None,
+    use_cache=True,
+    outstanding=None,
+):
+    """
+    Streams unread Naver email over IMAP without changing the read state.
+
+    One server-side SEARCH (UNSEEN + date range) per folder selects the
+    messages, then headers, attachment names (from BODYSTRUCTURE) and text
+    bodies are pulled in batched FETCH calls using BODY.PEEK, so \\Seen is
+    never set and attachments themselves are never downloaded.
+
+    Parameters:
+        naver_id (str): Naver login ID.
+        naver_passkey (str): Naver app password (IMAP does not accept the 2FA web login).
+            Defaults to NAVER_APP_PW, then NAVER_PW.
+        start_date (datetime.date): Start date (inclusive). Defaults to 7 days ago.
+        end_date (datetime.date): End date (inclusive). Defaults to today.
+        imap_server (str): IMAP host. Defaults to IMAP_SERVER or "imap.naver.com".
+        imap_port (int): IMAP port. Defaults to 993 (SSL) / 143 (plain).
+        imap_ssl (bool): Use IMAP over SSL. Set False for a local test server.
+        folder (str): Only search this folder. By default every folder that
+            can hold received mail is searched (see _imap_search_folders()).
+        use_cache (bool): Only FETCH UIDs above each folder's MailStore
+            watermark and serve older mails in the window from disk.
+        outstanding (set): Optional live set of student names still missing;
+            fetching stops once it is empty.
+    Yields:
+        EmailRecord: same records as iter_naver_email() (mail_id is "uid:NNN@FOLDER")
+    """
+    _id = naver_id if naver_id else _get_secret("NAVER_ID", os.getenv("NAVER_ID"))
+    _pw = (
+        naver_passkey
+        or _get_secret("NAVER_APP_PW", os.getenv("NAVER_APP_PW"))
+        or _get_secret("NAVER_PW", os.getenv("NAVER_PW"))
+    )
+    if not imap_server:
+        imap_server = _get_secret(
+            "IMAP_SERVER", os.getenv("IMAP_SERVER") or "imap.naver.com"
+        )
+    if not imap_port:
+        imap_port = 993 if imap_ssl else 143
+
+    if start_date is None or end_date is None:
+        start_date = (datetime.now() - timedelta(days=7)).date()
+        end_date = datetime.now().date()
+
+    emails = EmailIndex()
+    mailbox_cls = MailBox if imap_ssl else MailBoxUnencrypted
+    store = MailStore() if use_cache else None
+
+    def _all_found():
+        return outstanding is not None and not outstanding
+
+    def _add_email(record):
+        if not emails.add(record):
+            return False
+        _notify_user(f"[IMAP]   • {record.sender}: {record.subject}", "info")
+        return True
+
+    _notify_user(f"[IMAP] Connecting to {imap_server}...", "info")
+    try:
+        with mailbox_cls(imap_server, port=imap_port).login(
+            _id, _pw, initial_folder=None
+        ) as mailbox:
+            folders = [folder] if folder else _imap_search_folders(mailbox)
+            _notify_user(
+                f"[IMAP] Fetching unread emails from {start_date} to {end_date} "
+                f"in {', '.join(folders)}",
+                "info",
+            )
+            for name in folders:
+                if _all_found():
                     break
-                next_btn.click()
-                page_num += 1
-                time.sleep(random.uniform(1.5, 2.5))
-                wait.until(
-                    EC.presence_of_element_located(
-                        (By.CSS_SELECTOR, "ol.mail_list, li.mail_item")
-                    )
+                mailbox.folder.set(name)
+                account = f"imap:{_id}@{imap_server}/{name}"
+                criteria = AND(
+                    seen=False,
+                    date_gte=start_date,
+                    date_lt=end_date + timedelta(days=1),
                 )
-            except Exception:
-                break
 
-        # print for debugging
-        import pprint
+                # Incremental sync: only UIDs above the watermark are fetched
+                uidvalidity = str(
+                    mailbox.folder.status(name, ["UIDVALIDITY"])["UIDVALIDITY"]
+                )
+                sync_state = store.get_sync_state(account) if store else None
+                incremental = (
+                    bool(sync_state)
+                    and sync_state["uidvalidity"] == uidvalidity
+                    and sync_state["covered_from"] <= start_date
+                )
+                last_uid = sync_state["last_uid"] if incremental else 0
+                if incremental:
+                    _notify_user(
+                        f"[IMAP] {name}: fetching only UIDs above {last_uid}", "info"
+                    )
+                    criteria = AND(criteria, uid=U(last_uid + 1, "*"))
+                # "N:*" always matches the highest UID, even when it is below N
+                uids = sorted(
+                    (int(uid) for uid in mailbox.uids(criteria) if int(uid) > last_uid),
+                    reverse=True,
+                )
 
-        print(f"processed_mail_ids: {processed_mail_ids}")
-        print("email_list:")
-        pprint.pprint(email_list)
+                max_uid = last_uid
+                min_failed_uid = None
+                for uid, record in _iter_imap_folder(mailbox, name, uids):
+                    if _all_found():
+                        break
+                    if record is None:
+                        min_failed_uid = uid
+                        continue
+                    max_uid = max(max_uid, uid)
+                    if store:
+                        store.put(account, record)
+                    if _add_email(record):
+                        yield record
+                if _all_found():
+                    _notify_user("[IMAP] ✅ All students found, stopping", "info")
+                    break
 
-        _notify_user(f"[Naver] ✅ Fetched {len(email_list)} emails", "success")
+                if incremental:
+                    for record in store.in_range(account, start_date, end_date):
+                        if _all_found():
+                            break
+                        if _add_email(record):
+                            yield record
+
+                # Advance the watermark only when the window reaches the present
+                # and the folder was fully fetched, and keep it below any mail
+                # that could not be fetched so the next run retries it
+                if store and end_date >= datetime.now().date() and not _all_found():
+                    if min_failed_uid is not None:
+                        max_uid = min(max_uid, min_failed_uid - 1)
+                    store.set_sync_state(
+                        account,
+                        uidvalidity,
+                        max(last_uid, max_uid),
+                        min(sync_state["covered_from"], start_date)
+                        if incremental
+                        else start_date,
+                    )
 
+        _notify_user(f"[IMAP] ✅ Fetched {len(emails)} emails", "success")
     except Exception as e:
-        _notify_user(f"[Naver] ❌ Error: {e}", "error")
-        driver.save_screenshot("naver_email_error.png")
+        _notify_user(f"[IMAP] ❌ Error: {e}", "error")
+        raise RuntimeError(
+            "Naver IMAP fetch failed. Check IMAP is enabled and the app password."
+        ) from e
     finally:
-        driver.quit()
+        if store:
+            store.close()
 
-    return email_list
+
+def fetch_naver_email_imap(**kwargs):
+    """
+    Fetches unread Naver email over IMAP into a list.
+    Takes the same keyword arguments as iter_naver_email_imap().
+    """
+    return list(iter_naver_email_imap(**kwargs))
+
+
+def _naver_session_valid(driver):
+    """
+    Cheap validity probe for a saved Naver session: load mail.naver.com and
+    check whether it redirects to the nid.naver.com login page.
+    """
+    try:
+        driver.get("https://mail.naver.com/")
+        WebDriverWait(driver, 10).until(
+            lambda d: "nid.naver.com" in d.current_url
+            or d.find_elements(
+                By.CSS_SELECTOR, "ol.mail_list, #mail_list_wrap, li.mail_item"
+            )
+        )
+        return "nid.naver.com" not in driver.current_url
+    except Exception:
+        return False
 
 
-def login_naver_selenium(headless=False, naver_id=None, naver_passkey=None):
+def login_naver_selenium(
+    headless=False, naver_id=None, naver_passkey=None, reuse_session=True
+):
     """
     Logs into Naver using Selenium WebDriver and returns the driver.
 
@@ -1137,9 +4068,12 @@ def login_naver_selenium(headless=False, naver_id=None, naver_passkey=None):
         headless (bool): Whether to run the browser in headless mode.
         naver_id (str): Naver login ID.
         naver_passkey (str): Naver login password or app password.
+        reuse_session (bool): Keep cookies in a persistent Chrome profile and
+            skip the credential/2FA flow while the saved session is valid.
 
     Returns:
-        webdriver: Logged-in Chrome WebDriver instance, or None if login failed.
+        webdriver: Logged-in Chrome WebDriver borrowed from the DriverPool
+            (give it back with release_driver()), or None if login failed.
     """
 
     _id = naver_id if naver_id else _get_secret("NAVER_ID", os.getenv("NAVER_ID"))
@@ -1158,30 +4092,48 @@ def login_naver_selenium(headless=False, naver_id=None, naver_passkey=None):
     options.add_argument(
         "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
     )
+    if reuse_session:
+        _add_session_profile(options, "naver", _id)
+
+    def _new_driver():
+        # Use system chromedriver if available (Streamlit Cloud), otherwise default
+        system_chromedriver = shutil.which("chromedriver")
+        if system_chromedriver:
+            return webdriver.Chrome(
+                service=Service(system_chromedriver), options=options
+            )
+        return webdriver.Chrome(options=options)
 
-    # Use system chromedriver if available (Streamlit Cloud), otherwise default
-    system_chromedriver = shutil.which("chromedriver")
-    if system_chromedriver:
-        from selenium.webdriver.chrome.service import Service
-
-        driver = webdriver.Chrome(service=Service(system_chromedriver), options=options)
-    else:
-        driver = webdriver.Chrome(options=options)
-
+    driver = None
     try:
+        # A warm browser from an earlier run usually still holds the session
+        driver = driver_pool().checkout(
+            ("naver", _id, headless, reuse_session), _new_driver
+        )
+        if reuse_session and _naver_session_valid(driver):
+            _notify_user("[Naver] ✅ Reusing saved session, login skipped", "success")
+            return driver
+
         _notify_user("[Naver] Step 1: Opening login page...", "info")
         driver.get("https://nid.naver.com/nidlogin.login")
-        time.sleep(2)
+        WebDriverWait(driver, 10).until(
+            EC.presence_of_element_located((By.NAME, "pw"))
+        )
 
         _notify_user("[Naver] Step 2: Entering credentials...", "info")
         # Simple JS injection - same approach as working test_naver_login.py
         driver.execute_script(f"document.getElementsByName('id')[0].value='{_id}'")
         driver.execute_script(f"document.getElementsByName('pw')[0].value='{_pw}'")
+        if reuse_session:
+            # "로그인 상태 유지" so the saved session outlives this browser
+            driver.execute_script(
+                "var keep = document.getElementById('keep');"
+                "if (keep && !keep.checked) { keep.click(); }"
+            )
 
         # Click login button
         _notify_user("[Naver] Step 3: Clicking login button...", "info")
         driver.find_element(By.ID, "log.login").click()
-        time.sleep(3)
 
         _notify_user("[Naver] Step 4: Waiting for login to complete...", "info")
         # Wait for login to complete (longer timeout for 2FA verification)
@@ -1196,11 +4148,13 @@ def login_naver_selenium(headless=False, naver_id=None, naver_passkey=None):
         import traceback
 
         _notify_user(f"[Naver] ❌ Login failed: {e}", "error")
-        _notify_user(f"[Naver] Current URL: {driver.current_url}", "error")
         _notify_user(f"[Naver] Traceback: {traceback.format_exc()}", "error")
+        if driver is None:
+            return None  # Chrome did not start
+        _notify_user(f"[Naver] Current URL: {driver.current_url}", "error")
         try:
             driver.save_screenshot("naver_login_error.png")
         except Exception:
             pass
-        driver.quit()
+        driver_pool().discard(driver)
         return None